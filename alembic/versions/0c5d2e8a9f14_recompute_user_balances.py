@@ -0,0 +1,41 @@
+"""recompute user_balances with transfers sent as expenses
+
+Revision ID: 0c5d2e8a9f14
+Revises: b3e8f1c06a27
+Create Date: 2026-10-18 19:05:12.604381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c5d2e8a9f14'
+down_revision: Union[str, None] = 'b3e8f1c06a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases upgraded before the backfill in c4e1a7d92b3f was corrected
+    # counted every transfer a user sent as income. Rebuild every ledger row
+    # from the raw tables with the formula the app now maintains.
+    op.execute("DELETE FROM user_balances")
+    op.execute("""
+        INSERT INTO user_balances (user_id, total_income, total_expense, updated_at)
+        SELECT u.id,
+               COALESCE((SELECT SUM(t.amount) FROM transfers t
+                         WHERE t.receiver_id = u.id), 0),
+               COALESCE((SELECT SUM(e.debit) FROM expenses e
+                         WHERE e.user_id = u.id), 0)
+               + COALESCE((SELECT SUM(t.amount) FROM transfers t
+                           WHERE t.sender_id = u.id AND t.receiver_id <> u.id), 0),
+               CURRENT_TIMESTAMP
+        FROM users u
+    """)
+
+
+def downgrade() -> None:
+    # Data-only: the corrected totals stay valid for the previous revision
+    pass
@@ -0,0 +1,44 @@
+"""split monthly_rollups transfer counters into received and sent
+
+Revision ID: 7e3a9b1d5c60
+Revises: 0c5d2e8a9f14
+Create Date: 2026-10-18 20:12:43.917205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3a9b1d5c60'
+down_revision: Union[str, None] = '0c5d2e8a9f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('monthly_rollups', 'transfer_total', new_column_name='received_total',
+                    existing_type=sa.Float(), existing_nullable=False, existing_server_default='0')
+    op.alter_column('monthly_rollups', 'transfer_count', new_column_name='received_count',
+                    existing_type=sa.Integer(), existing_nullable=False, existing_server_default='0')
+    op.add_column('monthly_rollups', sa.Column('sent_total', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('monthly_rollups', sa.Column('sent_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # The old transfer counters added a cross-user transfer to both sides;
+    # they cannot be split in SQL (buckets follow REPORT_TIMEZONE), so the
+    # table is rebuilt from the raw rows, in the migration's transaction.
+    from app.services.rollup_service import rebuild_monthly_rollups
+    with Session(bind=op.get_bind()) as db:
+        rebuild_monthly_rollups(db)
+
+
+def downgrade() -> None:
+    op.drop_column('monthly_rollups', 'sent_count')
+    op.drop_column('monthly_rollups', 'sent_total')
+    op.alter_column('monthly_rollups', 'received_count', new_column_name='transfer_count',
+                    existing_type=sa.Integer(), existing_nullable=False, existing_server_default='0')
+    op.alter_column('monthly_rollups', 'received_total', new_column_name='transfer_total',
+                    existing_type=sa.Float(), existing_nullable=False, existing_server_default='0')
@@ -0,0 +1,50 @@
+"""add unique index on users.account_number
+
+Revision ID: b3e8f1c06a27
+Revises: a7c4e2b95d18
+Create Date: 2026-10-18 17:02:44.318905
+
+"""
+import secrets
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f1c06a27'
+down_revision: Union[str, None] = 'a7c4e2b95d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _new_number(taken):
+    while True:
+        candidate = str(10 ** 9 + secrets.randbelow(9 * 10 ** 9))
+        if candidate not in taken:
+            taken.add(candidate)
+            return candidate
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    users = sa.table('users', sa.column('id', sa.Integer), sa.column('account_number', sa.String))
+
+    # Numbers were generated without a collision check, and empty/missing ones
+    # cannot receive transfers: keep the oldest holder of each number and give
+    # everyone else a fresh one before the index can be created.
+    rows = bind.execute(sa.select(users.c.id, users.c.account_number).order_by(users.c.id)).all()
+    taken = {number for _, number in rows if number}
+    seen = set()
+    for user_id, number in rows:
+        if number and number not in seen:
+            seen.add(number)
+            continue
+        bind.execute(users.update().where(users.c.id == user_id).values(account_number=_new_number(taken)))
+
+    op.create_index(op.f('ix_users_account_number'), 'users', ['account_number'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_account_number'), table_name='users')
@@ -0,0 +1,48 @@
+"""add user_balances ledger table
+
+Revision ID: c4e1a7d92b3f
+Revises: 5d943d568aa5
+Create Date: 2026-10-18 09:12:41.519204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a7d92b3f'
+down_revision: Union[str, None] = '5d943d568aa5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_balances',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_income', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('total_expense', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from the raw rows, with the formula of balance_service.compute_totals_from_rows:
+    # money received is income, money sent to another user counts as spent
+    op.execute("""
+        INSERT INTO user_balances (user_id, total_income, total_expense, updated_at)
+        SELECT u.id,
+               COALESCE((SELECT SUM(t.amount) FROM transfers t
+                         WHERE t.receiver_id = u.id), 0),
+               COALESCE((SELECT SUM(e.debit) FROM expenses e
+                         WHERE e.user_id = u.id), 0)
+               + COALESCE((SELECT SUM(t.amount) FROM transfers t
+                           WHERE t.sender_id = u.id AND t.receiver_id <> u.id), 0),
+               CURRENT_TIMESTAMP
+        FROM users u
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_balances')
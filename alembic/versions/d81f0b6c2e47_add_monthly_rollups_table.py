@@ -0,0 +1,37 @@
+"""add monthly_rollups table
+
+Revision ID: d81f0b6c2e47
+Revises: c4e1a7d92b3f
+Create Date: 2026-10-18 11:40:07.284913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f0b6c2e47'
+down_revision: Union[str, None] = 'c4e1a7d92b3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Populate afterwards with: python scripts/backfill_monthly_rollups.py
+    op.create_table('monthly_rollups',
+        sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('month', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('category_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('expense_total', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('expense_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('transfer_total', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('transfer_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('user_id', 'year', 'month', 'category_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('monthly_rollups')
@@ -0,0 +1,31 @@
+"""add (user, created_at) composite indexes on expenses and transfers
+
+Revision ID: e5a9c3f17d20
+Revises: d81f0b6c2e47
+Create Date: 2026-10-18 14:05:52.661380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3f17d20'
+down_revision: Union[str, None] = 'd81f0b6c2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_expenses_user_id_created_at', 'expenses', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_transfers_sender_id_created_at', 'transfers', ['sender_id', 'created_at'], unique=False)
+    op.create_index('ix_transfers_receiver_id_created_at', 'transfers', ['receiver_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    # MySQL needs an index on each FK column; the FK indexes created with the tables still cover them.
+    op.drop_index('ix_transfers_receiver_id_created_at', table_name='transfers')
+    op.drop_index('ix_transfers_sender_id_created_at', table_name='transfers')
+    op.drop_index('ix_expenses_user_id_created_at', table_name='expenses')
@@ -0,0 +1,28 @@
+"""add created_at indexes for the admin global transaction view
+
+Revision ID: f2b6d8a41c93
+Revises: e5a9c3f17d20
+Create Date: 2026-10-18 15:12:08.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8a41c93'
+down_revision: Union[str, None] = 'e5a9c3f17d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_expenses_created_at', 'expenses', ['created_at'], unique=False)
+    op.create_index('ix_transfers_created_at', 'transfers', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transfers_created_at', table_name='transfers')
+    op.drop_index('ix_expenses_created_at', table_name='expenses')
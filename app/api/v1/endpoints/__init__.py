@@ -3,3 +3,6 @@ from .expenses import router as expenses
 from .categories import router as categories
 from .transfers import router as transfers
 from .users import router as users
+from .transactions import router as transactions
+from .imports import router as imports
+from .export import router as export
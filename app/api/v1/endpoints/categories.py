@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app import schemas
-from app.services.category_service import create_category, get_categories, get_category, update_category, delete_category
+from app.services.category_service import create_category, get_categories, get_category, update_category, delete_category, bulk_apply_categories
 from app.db.session import get_db
 from app.core.security import get_current_user
 from app.models import User
+from app.core.config import settings
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -12,6 +13,13 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 def create_category_endpoint(category: schemas.CategoryCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     return create_category(db=db, category=category, user_id=current_user.id)
 
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_categories_endpoint(request: schemas.CategoryBulkRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    total = len(request.create) + len(request.update) + len(request.delete)
+    if total > settings.bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.bulk_max_items} items per bulk request")
+    return bulk_apply_categories(db, user_id=current_user.id, request=request)
+
 @router.get("/", response_model=list[schemas.Category])
 def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     categories = get_categories(db, user_id=current_user.id, skip=skip, limit=limit)
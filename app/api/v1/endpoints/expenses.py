@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app import schemas
-from app.services.expense_service import create_debit_expense, create_credit_expense, get_expenses, get_expense, update_expense, delete_expense
+from app.services.expense_service import create_debit_expense, create_credit_expense, get_expenses, get_expense, update_expense, delete_expense, bulk_apply_expenses
 from app.db.session import get_db
 from app.core.security import get_current_user
 from app.models import User
+from app.core.config import settings
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
@@ -16,6 +17,13 @@ def create_debit_expense_endpoint(expense: schemas.DebitCreate, db: Session = De
 def create_credit_expense_endpoint(expense: schemas.CreditCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     return create_credit_expense(db=db, expense=expense, user_id=current_user.id)
 
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_expenses_endpoint(request: schemas.ExpenseBulkRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    total = len(request.create) + len(request.update) + len(request.delete)
+    if total > settings.bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.bulk_max_items} items per bulk request")
+    return bulk_apply_expenses(db, user_id=current_user.id, request=request)
+
 @router.get("/", response_model=list[schemas.Expense])
 def read_expenses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     expenses = get_expenses(db, user_id=current_user.id, skip=skip, limit=limit)
@@ -0,0 +1,52 @@
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.services.report_service import iter_export_rows, encode_export_csv, encode_export_ndjson
+from app.db.session import SessionLocal
+from app.core.security import get_current_user
+from app.models import User
+
+router = APIRouter(tags=["export"])
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _stream_export(user_id: int, file_format: str, filters: dict):
+    # The request's get_db session is closed before the body is sent, so the
+    # stream owns its own session (and connection) until the last row.
+    db = SessionLocal()
+    try:
+        rows = iter_export_rows(db, user_id, **filters)
+        encode = encode_export_ndjson if file_format == "ndjson" else encode_export_csv
+        for chunk in encode(rows):
+            yield chunk
+    finally:
+        db.close()
+
+
+@router.get("")
+def export_transactions(
+    file_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    tx_type: Optional[str] = Query(None, alias="type", pattern="^(expense|income|transfer)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streams the user's expenses, incomes and transfers, oldest first, as CSV
+    or NDJSON. `date_from` / `date_to` are inclusive.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+
+    filters = {"tx_type": tx_type, "tx_from": date_from, "tx_to": date_to}
+    filename = f"transactions-{current_user.username}-{datetime.utcnow():%Y%m%d}.{file_format}"
+    return StreamingResponse(
+        _stream_export(current_user.id, file_format, filters),
+        media_type=_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,37 @@
+import io
+from typing import Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Query
+from sqlalchemy.orm import Session
+from app.services.import_service import import_statement, detect_format
+from app.db.session import get_db
+from app.core.security import get_current_user
+from app.models import User
+
+router = APIRouter(tags=["imports"])
+
+@router.post("/statement")
+def import_statement_endpoint(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ofx)$"),
+    create_categories: bool = False,
+    chunk_size: int = Query(1000, ge=100, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Imports a bank statement (CSV or OFX; detected from the file name unless
+    `format` is given). The upload is parsed as a stream and written in chunks.
+    Returns counts plus a per-row error report.
+    """
+    file_format = file_format or detect_format(file.filename)
+    # utf-8-sig drops the BOM that spreadsheet exports often start with; chunks are
+    # committed as they are read, so an undecodable byte becomes U+FFFD rather than
+    # failing the request halfway through
+    text_stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        return import_statement(
+            db, current_user.id, text_stream,
+            file_format=file_format, chunk_size=chunk_size, create_categories=create_categories
+        )
+    finally:
+        text_stream.detach()
@@ -0,0 +1,26 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.services.report_service import get_transaction_feed
+from app.db.session import get_db
+from app.core.security import get_current_user
+from app.models import User
+
+router = APIRouter(tags=["transactions"])
+
+@router.get("/")
+def read_transaction_feed(
+    cursor: Optional[str] = None,
+    direction: str = "older",
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Expenses and transfers merged newest first, paged with an opaque cursor.
+    Pass `next_cursor` back with direction=older, or `prev_cursor` with direction=newer.
+    """
+    try:
+        return get_transaction_feed(db, current_user, cursor=cursor, direction=direction, page_size=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
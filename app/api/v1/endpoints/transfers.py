@@ -1,12 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user_schema import TransferRequest
-from app.services.transfer_service import transfer_money, validate_account
-from app.db.session import get_db
+from app.services.transfer_service import transfer_money, validate_account_cached
+from app.db.session import get_db, get_async_db
 from app.core.security import get_current_user
 from app.models.user import User
- 
-from fastapi_cache.decorator import cache
 
 router = APIRouter(prefix="/transfers", tags=["transfers"])
 
@@ -19,7 +18,7 @@ def transfer(request: TransferRequest, db: Session = Depends(get_db), current_us
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/validate-account")
-@cache(expire=60)
-def validate_account_endpoint(account_number: str, db: Session = Depends(get_db)):
-    is_valid = validate_account(db, account_number)
+async def validate_account_endpoint(account_number: str, db: AsyncSession = Depends(get_async_db)):
+    # Cached per account number, misses included (see transfer_service)
+    is_valid = await validate_account_cached(db, account_number)
     return {"is_valid": is_valid}
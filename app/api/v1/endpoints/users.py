@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models import User
 from app.core.security import get_current_user
+from app.services.balance_service import get_balance
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -14,7 +15,7 @@ def get_user_balance(
     """
     Get the current authenticated user's total balance.
     """
-    # We fetch the user again to ensure we have the most up-to-date balance from the DB
+    # Fetched again so a user deleted since the token was issued gets a 404
     user = db.query(User).filter(User.id == current_user.id).first()
 
     if not user:
@@ -22,7 +23,7 @@ def get_user_balance(
 
     return {
         "username": user.username,
-        "balance": user.balance,
+        "balance": get_balance(db, user.id),
         "account_number": user.account_number
     }
 
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, expenses, categories, users, transfers
+from app.api.v1.endpoints import auth, expenses, categories, users, transfers, transactions, imports, export
 
 router = APIRouter()
 
@@ -8,3 +8,6 @@ router.include_router(expenses, prefix="/expenses", tags=["expenses"])
 router.include_router(categories, prefix="/categories", tags=["categories"])
 router.include_router(users, prefix="/users", tags=["users"])
 router.include_router(transfers, prefix="/transfers", tags=["transfers"])
+router.include_router(transactions, prefix="/transactions", tags=["transactions"])
+router.include_router(imports, prefix="/imports", tags=["imports"])
+router.include_router(export, prefix="/export", tags=["export"])
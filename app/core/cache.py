@@ -0,0 +1,152 @@
+import time
+import asyncio
+import threading
+import importlib
+from typing import Optional, Tuple
+import anyio.from_thread
+from cachetools import TLRUCache
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends import Backend
+from app.core.config import settings
+
+# ================= RESPONSE CACHE =================
+# FastAPICache is initialised at startup with the backend named by
+# CACHE_BACKEND: "memory" (per worker, bounded), "redis" (shared by all
+# workers; needs the redis package and CACHE_REDIS_URL) or
+# "package.module:factory" for any other fastapi_cache Backend.
+# Every backend is wrapped so hits/misses are counted per namespace.
+
+
+class BoundedMemoryBackend(Backend):
+    """
+    fastapi_cache's InMemoryBackend keeps every key until it is read again,
+    so a stream of never-repeated keys (account enumeration) grows it without
+    bound. This one is capped at `maxsize` entries and drops expired ones.
+    """
+
+    def __init__(self, maxsize: int):
+        self._lock = threading.Lock()
+        # Value: (data, expires_at); each entry lives until its own expires_at
+        self._store = TLRUCache(maxsize=maxsize, ttu=lambda key, value, now: value[1], timer=time.monotonic)
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[str]]:
+        with self._lock:
+            entry = self._store.get(key)
+        if entry is None:
+            return 0, None
+        return max(int(entry[1] - time.monotonic()), 0), entry[0]
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (expire if expire else settings.cache_default_ttl)
+        with self._lock:
+            self._store[key] = (value, expires_at)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        with self._lock:
+            if namespace:
+                keys = [k for k in self._store.keys() if k.startswith(namespace)]
+            else:
+                keys = [key] if key in self._store else []
+            for k in keys:
+                self._store.pop(k, None)
+        return len(keys)
+
+
+class CountingBackend(Backend):
+    """Delegates to `backend`, counting lookups per namespace (the key segment after the prefix)."""
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def _record(self, key: str, hit: bool):
+        parts = key.split(":", 2)
+        namespace = parts[1] if len(parts) > 2 and parts[1] else "default"
+        with self._lock:
+            counters = self.stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counters["hits" if hit else "misses"] += 1
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[str]]:
+        ttl, value = await self.backend.get_with_ttl(key)
+        self._record(key, value is not None)
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.backend.get(key)
+        self._record(key, value is not None)
+        return value
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        await self.backend.set(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await self.backend.clear(namespace, key)
+
+    def snapshot(self):
+        with self._lock:
+            return {namespace: dict(counters) for namespace, counters in self.stats.items()}
+
+
+def build_backend(name: str = None) -> Backend:
+    name = name or settings.cache_backend
+    if name == "memory":
+        return BoundedMemoryBackend(settings.cache_max_entries)
+    if name == "redis":
+        from redis import asyncio as aioredis
+        from fastapi_cache.backends.redis import RedisBackend
+        if not settings.cache_redis_url:
+            raise RuntimeError("CACHE_BACKEND=redis needs CACHE_REDIS_URL")
+        return RedisBackend(aioredis.from_url(settings.cache_redis_url))
+    module_name, _, factory = name.partition(":")
+    if not factory:
+        raise RuntimeError(f"Unknown CACHE_BACKEND '{name}' (use memory, redis or package.module:factory)")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+_backend = None
+
+
+def init_response_cache(backend: Backend = None):
+    """Call once at startup; later calls keep the first backend (as FastAPICache.init does)."""
+    global _backend
+    if _backend is not None:
+        return
+    _backend = CountingBackend(backend or build_backend())
+    FastAPICache.init(_backend, prefix=settings.cache_prefix)
+
+
+def response_cache_stats():
+    """{namespace: {"hits", "misses"}}, or {} before init."""
+    return _backend.snapshot() if _backend is not None else {}
+
+
+def cache_key(namespace: str, key: str) -> str:
+    """Same layout as fastapi_cache's own keys, so clear(namespace=...) covers both."""
+    return f"{FastAPICache.get_prefix()}:{namespace}:{key}"
+
+
+async def invalidate(namespace: str, key: str = None):
+    """Drops one key of `namespace`, or the whole namespace. No-op before init."""
+    if _backend is None:
+        return
+    if key is None:
+        await FastAPICache.clear(namespace=namespace)
+    else:
+        try:
+            await _backend.clear(key=cache_key(namespace, key))
+        except KeyError:
+            # fastapi_cache's InMemoryBackend raises for keys it does not hold
+            pass
+
+
+def invalidate_sync(namespace: str, key: str = None):
+    """invalidate() for sync code: FastAPI threadpool routes, scripts."""
+    try:
+        anyio.from_thread.run(invalidate, namespace, key)
+    except RuntimeError:
+        # Not inside an anyio worker thread (no running event loop to hand off to)
+        asyncio.run(invalidate(namespace, key))
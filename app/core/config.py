@@ -1,13 +1,107 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     database_url: str
+    # Optional; by default DATABASE_URL with its async driver (aiomysql/asyncpg/aiosqlite)
+    async_database_url: Optional[str] = None
+
+    # Connection pool (per engine, per worker process)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    # Recycle before MySQL's wait_timeout drops idle connections; pre-ping catches the rest
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # 0 disables it (MySQL: SELECTs only via max_execution_time; PostgreSQL: statement_timeout)
+    db_statement_timeout_ms: int = 0
+
+    # Per-worker cache of the logged-in user (+ role) for the HTML routes
+    user_cache_ttl: int = 30
+    user_cache_size: int = 4096
+
+    # Verified bearer tokens kept per worker (each entry expires with its token)
+    token_cache_size: int = 10000
+
+    # bcrypt runs on its own thread pool; keep workers below the CPU count
+    password_hash_workers: int = 2
+    password_hash_max_queue: int = 64
+
     secret_key: str = "your-secret-key"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     gmail_email: str
     gmail_app_password: str
 
+    # Outgoing mail; credentials default to the Gmail ones above
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    smtp_starttls: bool = True
+    smtp_username: Optional[str] = None
+    smtp_password: Optional[str] = None
+    smtp_timeout: int = 30
+    email_from: Optional[str] = None
+
+    # Email outbox worker (one background thread per app process)
+    email_worker_enabled: bool = True
+    email_batch_size: int = 50
+    email_poll_interval: float = 2.0
+    email_max_attempts: int = 6
+    email_retry_base_seconds: int = 30
+    email_retry_max_seconds: int = 3600
+    email_claim_lease_seconds: int = 300
+
+    # Timezone used to decide which calendar month a transaction belongs to
+    report_timezone: str = "UTC"
+
+    # In-process cache of the merged (public + personal) category list
+    category_cache_ttl: int = 60
+    category_cache_size: int = 1024
+
+    # Response cache (fastapi_cache): "memory", "redis" or "package.module:factory"
+    cache_backend: str = "memory"
+    cache_redis_url: Optional[str] = None
+    cache_prefix: str = "expense-tracker"
+    cache_default_ttl: int = 60
+    cache_max_entries: int = 100000
+    # validate-account: known accounts / unknown ones (short, so new accounts show up fast)
+    account_cache_ttl: int = 300
+    account_negative_cache_ttl: int = 10
+
+    # Transfers retry this many times on a deadlock / lock wait timeout
+    transfer_max_retries: int = 5
+
+    # Max items (create + update + delete) in one /bulk request
+    bulk_max_items: int = 500
+
+    # Per-request DB timing: Server-Timing header + one log line per request;
+    # requests over either threshold are logged as warnings with their slowest statement
+    request_timing_enabled: bool = True
+    slow_request_ms: int = 500
+    slow_request_queries: int = 25
+
+    # Prometheus /metrics. Each worker flushes its numbers to METRICS_DIR
+    # (default: <tmp>/<CACHE_PREFIX>-metrics, shared by the workers of one host)
+    # and a scrape merges them
+    metrics_enabled: bool = True
+    metrics_dir: Optional[str] = None
+    metrics_flush_interval: float = 5.0
+    # Without a token only loopback clients may scrape. Behind a proxy on the
+    # same host every request looks local, so set METRICS_TOKEN there and
+    # scrape with "Authorization: Bearer <token>"
+    metrics_token: Optional[str] = None
+
+    # Logging (see app/logging_config.py); LOG_FILE empty = console only
+    log_level: str = "INFO"
+    log_format: str = "json"  # "json" or "text"
+    log_file: Optional[str] = "expense_tracker.log"
+    log_file_max_bytes: int = 1000000
+    log_file_backups: int = 5
+    # Records waiting for the writer thread; beyond this they are dropped (and counted)
+    log_queue_size: int = 10000
+    # DEBUG records: the first of each message, then one in this many
+    log_debug_sample_every: int = 100
+
     model_config = SettingsConfigDict(env_file=".env", extra='allow')
 
 settings = Settings()
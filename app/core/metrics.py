@@ -0,0 +1,269 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from functools import lru_cache
+from app.core.config import settings
+
+# ================= PROMETHEUS METRICS =================
+# A small in-process registry (counters, gauges, histograms) rendered in the
+# Prometheus text format, so no client library or push gateway is needed.
+#
+# Under several uvicorn workers a scrape reaches one of them, so every
+# worker writes its snapshot to METRICS_DIR (worker-<pid>.json) every
+# METRICS_FLUSH_INTERVAL seconds; /metrics merges all fresh snapshots
+# (counters, histograms and gauges are summed). Snapshots not refreshed
+# for a few intervals belong to workers that are gone and are dropped.
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Series per metric; later label sets are folded into one "other" series
+MAX_SERIES = 1000
+OTHER = "other"
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> (type, help, labelnames, buckets)
+        self._meta = {}
+        # name -> {label values tuple: value, or [bucket counts..., sum, count] for histograms}
+        self._series = {}
+        self._collectors = []
+
+    def declare(self, name: str, kind: str, help: str, labelnames=(), buckets=None):
+        with self._lock:
+            if name not in self._meta:
+                self._meta[name] = (kind, help, tuple(labelnames), tuple(buckets) if buckets else None)
+                self._series[name] = {}
+
+    def _series_for(self, name, labels):
+        series = self._series[name]
+        if labels not in series and len(series) >= MAX_SERIES:
+            labels = tuple(OTHER for _ in labels)
+        return series, labels
+
+    def inc(self, name: str, labels=(), value: float = 1.0):
+        """Counter increment, or gauge delta."""
+        with self._lock:
+            series, labels = self._series_for(name, tuple(labels))
+            series[labels] = series.get(labels, 0.0) + value
+
+    def set(self, name: str, labels=(), value: float = 0.0):
+        with self._lock:
+            series, labels = self._series_for(name, tuple(labels))
+            series[labels] = value
+
+    def observe(self, name: str, labels, value: float):
+        buckets = self._meta[name][3]
+        with self._lock:
+            series, labels = self._series_for(name, tuple(labels))
+            row = series.get(labels)
+            if row is None:
+                row = series[labels] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def add_collector(self, fn):
+        """fn() is called before every snapshot; it updates gauges / absolute counters via set()."""
+        self._collectors.append(fn)
+
+    def snapshot(self):
+        for collect in self._collectors:
+            collect(self)
+        with self._lock:
+            return {
+                name: {
+                    "type": kind,
+                    "help": help,
+                    "labels": list(labelnames),
+                    "buckets": list(buckets) if buckets else None,
+                    "series": [[list(labels), value] for labels, value in self._series[name].items()],
+                }
+                for name, (kind, help, labelnames, buckets) in self._meta.items()
+            }
+
+
+registry = MetricsRegistry()
+
+
+# ================= STATEMENT FINGERPRINTS =================
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*(?:\?|%s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%s|:\w+|\$\d+))*\s*\)")
+_VALUES_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN|TABLE|ON)\s+[`\"]?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def statement_fingerprint(statement: str) -> str:
+    """
+    "<VERB> <first table> <hash>": literals, IN lists and multi-row VALUES
+    of any length map to the same fingerprint, so the label stays low-cardinality.
+    """
+    normalized = " ".join(statement.split())
+    normalized = _PLACEHOLDER_LISTS.sub("(?)", _LITERALS.sub("?", normalized))
+    normalized = _VALUES_ROWS.sub("(?)", normalized)
+    verb = normalized.split(" ", 1)[0].upper() if normalized else "?"
+    table = _TABLE.search(normalized)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:10]
+    return f"{verb} {table.group(1) if table else '-'} {digest}"
+
+
+# ================= CROSS-WORKER SNAPSHOTS =================
+
+def metrics_dir() -> str:
+    return settings.metrics_dir or os.path.join(tempfile.gettempdir(), f"{settings.cache_prefix}-metrics")
+
+
+def _snapshot_path(pid: int = None) -> str:
+    return os.path.join(metrics_dir(), f"worker-{pid or os.getpid()}.json")
+
+
+def write_snapshot():
+    directory = metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def remove_snapshot():
+    try:
+        os.remove(_snapshot_path())
+    except FileNotFoundError:
+        pass
+
+
+def _fresh_snapshots():
+    stale_after = max(settings.metrics_flush_interval * 3, 30)
+    now = time.time()
+    snapshots = []
+    try:
+        names = os.listdir(metrics_dir())
+    except FileNotFoundError:
+        return snapshots
+    for name in names:
+        if not (name.startswith("worker-") and name.endswith(".json")):
+            continue
+        path = os.path.join(metrics_dir(), name)
+        try:
+            if now - os.path.getmtime(path) > stale_after:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            # Removed or replaced mid-read; it will be there next scrape
+            continue
+    return snapshots
+
+
+def merge_snapshots(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "series": {}})
+            for labels, value in metric["series"]:
+                key = tuple(labels)
+                if key not in target["series"]:
+                    target["series"][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target["series"][key] = [a + b for a, b in zip(target["series"][key], value)]
+                else:
+                    target["series"][key] += value
+    return merged
+
+
+def collect_all():
+    """Snapshots of every live worker (this one refreshed first), merged."""
+    write_snapshot()
+    snapshots = _fresh_snapshots()
+    merged = merge_snapshots(snapshots)
+    merged["app_workers"] = {
+        "type": GAUGE, "help": "Workers whose metrics are included", "labels": [], "buckets": None,
+        "series": {(): len(snapshots)},
+    }
+    return merged
+
+
+class SnapshotWriter:
+    """Background thread flushing this worker's snapshot every METRICS_FLUSH_INTERVAL seconds."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(settings.metrics_flush_interval):
+            try:
+                write_snapshot()
+            except OSError:
+                pass
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            write_snapshot()
+            self._thread = threading.Thread(target=self._loop, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+            remove_snapshot()
+
+
+snapshot_writer = SnapshotWriter()
+
+
+# ================= TEXT FORMAT =================
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(metrics) -> str:
+    lines = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labels"]
+        for labels, value in sorted(metric["series"].items()):
+            if metric["type"] == HISTOGRAM:
+                buckets = metric["buckets"]
+                for bound, count in zip(buckets, value):
+                    lines.append(f"{name}_bucket{_labels(names, labels, [('le', _number(float(bound)))])} {count}")
+                lines.append(f"{name}_bucket{_labels(names, labels, [('le', '+Inf')])} {value[-1]}")
+                lines.append(f"{name}_sum{_labels(names, labels)} {_number(float(value[-2]))}")
+                lines.append(f"{name}_count{_labels(names, labels)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
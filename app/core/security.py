@@ -1,8 +1,14 @@
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from cachetools import TLRUCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
@@ -10,50 +16,174 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.db.session import get_db
 from app.models import User
+from app.services.user_cache import get_user_snapshot_sync
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, user_id: int = None
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        # Stable principal id: `sub` (email) can change through update-profile
+        to_encode["uid"] = user_id
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
+# ================= PASSWORD HASHING POOL =================
+# bcrypt costs ~100-300 ms of CPU per call. Every hash/verify runs on a small
+# dedicated thread pool (bcrypt releases the GIL) so a burst of logins can
+# neither block the event loop nor take every CPU away from other requests.
+# Work beyond `password_hash_max_queue` waiting calls is rejected outright.
+
+class PasswordHashingBusy(RuntimeError):
+    """Too many password operations queued; the caller should retry later."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.stats = {
+            "queued": 0, "running": 0, "completed": 0, "rejected": 0, "max_queued": 0,
+            "wait_ms_total": 0.0, "wait_ms_max": 0.0, "run_ms_total": 0.0, "run_ms_max": 0.0,
+        }
+
+    def _run(self, submitted_at, fn, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self.stats["queued"] -= 1
+            self.stats["running"] += 1
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                wait_ms, run_ms = (started - submitted_at) * 1000, (finished - started) * 1000
+                self.stats["running"] -= 1
+                self.stats["completed"] += 1
+                self.stats["wait_ms_total"] += wait_ms
+                self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+                self.stats["run_ms_total"] += run_ms
+                self.stats["run_ms_max"] = max(self.stats["run_ms_max"], run_ms)
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self.stats["queued"] >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise PasswordHashingBusy("Too many password operations in progress")
+            self.stats["queued"] += 1
+            self.stats["max_queued"] = max(self.stats["max_queued"], self.stats["queued"])
+        return self._executor.submit(self._run, time.perf_counter(), fn, *args)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        completed = stats["completed"] or 1
+        stats["wait_ms_avg"] = stats["wait_ms_total"] / completed
+        stats["run_ms_avg"] = stats["run_ms_total"] / completed
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()}
+        }
+
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_max_queue)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    """Blocking; for sync (threadpool) callers. Still bounded by the hashing pool."""
+    return password_hasher.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.submit(pwd_context.hash, password).result()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """For `async def` handlers: awaits the hashing pool instead of blocking the event loop."""
+    return await asyncio.wrap_future(password_hasher.submit(pwd_context.verify, plain_password, hashed_password))
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(password_hasher.submit(pwd_context.hash, password))
 
 
 def create_access_token_for_user(user):
-    access_token = create_access_token(subject=user.email)
+    access_token = create_access_token(subject=user.email, user_id=user.id)
     return access_token
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+# ================= VERIFIED TOKEN CACHE =================
+# API clients send the same bearer token on every call. Verified claims are
+# kept in an LRU keyed by the token's SHA-256 digest (the token itself is
+# never stored) and each entry expires together with the token's own `exp`,
+# so a cached token can never outlive its validity. Failed verifications are
+# not cached.
+
+def _token_ttu(key, claims, now):
+    # TLRUCache clocks with time.monotonic(); `exp` is wall-clock epoch seconds
+    return now + (claims["exp"] - time.time())
+
+
+_token_lock = threading.Lock()
+_token_cache = TLRUCache(maxsize=settings.token_cache_size, ttu=_token_ttu)
+
+token_cache_stats = {"hits": 0, "misses": 0}
+
+
+def decode_access_token(token: str) -> dict:
+    """Verified claims of `token` (cached). Raises JWTError if invalid or expired."""
+    digest = hashlib.sha256(token.encode()).digest()
+    with _token_lock:
+        claims = _token_cache.get(digest)
+        token_cache_stats["hits" if claims is not None else "misses"] += 1
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    if "exp" in claims:
+        with _token_lock:
+            _token_cache[digest] = claims
+    return claims
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    The token's user as a read-only UserSnapshot. Tokens with a `uid` claim
+    resolve through the user cache by primary key; older tokens fall back to
+    the email in `sub`.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == username).first()
+
+    user_id = payload.get("uid")
+    if user_id is None:
+        user_id = db.query(User.id).filter(User.email == username).scalar()
+        if user_id is None:
+            raise credentials_exception
+
+    user = get_user_snapshot_sync(db, user_id)
     if user is None:
         raise credentials_exception
     return user
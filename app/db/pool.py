@@ -0,0 +1,175 @@
+import time
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.core.config import settings
+
+# ================= CONNECTION POOL =================
+# Pool sizing/recycling comes from Settings (DB_POOL_* env vars) and every
+# pool reports what it is doing through PoolMetrics, so the pool can be
+# sized against the real number of workers and concurrent requests.
+
+
+class _TimedCheckout:
+    """Pool mixin: times connect() (queue wait + opening a new connection if needed)."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_metrics.record(self, "timeouts")
+            raise
+        finally:
+            pool_metrics.record_wait(self, time.perf_counter() - started)
+
+
+class MeteredQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(database_url, is_async: bool = False):
+    """create_engine() keyword arguments for the pool settings."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite uses a single-connection pool; sizing does not apply
+        return {}
+    return {
+        "poolclass": MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+_STATEMENT_TIMEOUT_SQL = {
+    "mysql": "SET SESSION max_execution_time = {ms}",  # SELECTs only (MySQL 5.7.8+)
+    "postgresql": "SET statement_timeout = {ms}",
+}
+
+
+def install_statement_timeout(engine, timeout_ms: int = None):
+    """Applies the per-statement timeout to every new connection of `engine` (a sync Engine)."""
+    timeout_ms = settings.db_statement_timeout_ms if timeout_ms is None else timeout_ms
+    sql = _STATEMENT_TIMEOUT_SQL.get(engine.dialect.name)
+    if not timeout_ms or not sql:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_statement_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(sql.format(ms=int(timeout_ms)))
+        cursor.close()
+
+
+class PoolMetrics:
+    """Counters fed by pool events, one set per attached engine."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines = {}
+        self._by_pool = {}
+        self._counters = {}
+
+    def attach(self, engine, name: str):
+        """`engine` is a sync Engine (use async_engine.sync_engine for the async one)."""
+        self._engines[name] = engine
+        self._by_pool[id(engine.pool)] = name
+        with self._lock:
+            self._stats(name)
+
+        @event.listens_for(engine, "do_connect")
+        def _connect_started(dialect, conn_rec, cargs, cparams):
+            conn_rec.info["connect_started"] = time.perf_counter()
+
+        @event.listens_for(engine.pool, "connect")
+        def _connected(dbapi_connection, conn_rec):
+            started = conn_rec.info.pop("connect_started", None)
+            with self._lock:
+                stats = self._stats(name)
+                stats["connects"] += 1
+                if started is not None:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    stats["connect_ms_total"] += elapsed
+                    stats["connect_ms_max"] = max(stats["connect_ms_max"], elapsed)
+
+        @event.listens_for(engine.pool, "checkout")
+        def _checkout(dbapi_connection, conn_rec, conn_proxy):
+            self.record(name, "checkouts")
+
+        @event.listens_for(engine.pool, "invalidate")
+        def _invalidate(dbapi_connection, conn_rec, exception):
+            self.record(name, "invalidations")
+
+        @event.listens_for(engine.pool, "close")
+        def _close(dbapi_connection, conn_rec):
+            self.record(name, "closes")
+
+    def _stats(self, name):
+        return self._counters.setdefault(name, {
+            "checkouts": 0, "connects": 0, "closes": 0, "invalidations": 0, "timeouts": 0,
+            "connect_ms_total": 0.0, "connect_ms_max": 0.0,
+            "wait_count": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0,
+        })
+
+    def _name(self, pool_or_name):
+        if isinstance(pool_or_name, str):
+            return pool_or_name
+        # Engine.dispose() swaps in a recreated pool; fall back to matching by engine
+        name = self._by_pool.get(id(pool_or_name))
+        if name is None:
+            for engine_name, engine in self._engines.items():
+                if engine.pool is pool_or_name:
+                    self._by_pool[id(pool_or_name)] = name = engine_name
+        return name
+
+    def record(self, pool_or_name, counter: str):
+        name = self._name(pool_or_name)
+        if name is None:
+            return
+        with self._lock:
+            self._stats(name)[counter] += 1
+
+    def record_wait(self, pool, seconds: float):
+        name = self._name(pool)
+        if name is None:
+            return
+        elapsed = seconds * 1000
+        with self._lock:
+            stats = self._stats(name)
+            stats["wait_count"] += 1
+            stats["wait_ms_total"] += elapsed
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], elapsed)
+
+    def snapshot(self):
+        """{engine name: live pool state + counters}."""
+        result = {}
+        with self._lock:
+            counters = {name: dict(self._stats(name)) for name in self._engines}
+        for name, engine in self._engines.items():
+            pool = engine.pool
+            stats = counters[name]
+            live = {"pool_class": type(pool).__name__, "status": pool.status()}
+            if isinstance(pool, QueuePool):
+                live.update({
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "checked_in": pool.checkedin(),
+                    "overflow": max(pool.overflow(), 0),
+                    "timeout": pool.timeout(),
+                })
+            stats["connect_ms_avg"] = round(stats["connect_ms_total"] / stats["connects"], 2) if stats["connects"] else 0.0
+            stats["wait_ms_avg"] = round(stats["wait_ms_total"] / stats["wait_count"], 2) if stats["wait_count"] else 0.0
+            result[name] = {**live, **{k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()}}
+        return result
+
+
+pool_metrics = PoolMetrics()
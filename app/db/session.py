@@ -1,13 +1,52 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import settings
+from app.db.pool import engine_options, install_statement_timeout, pool_metrics
 
-engine = create_engine(settings.database_url)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+install_statement_timeout(engine)
+pool_metrics.attach(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Registers the flush hooks that keep the balance ledger and monthly rollups in sync with every write.
+import app.services.balance_service  # noqa: E402,F401
+import app.services.rollup_service  # noqa: E402,F401
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# ================= ASYNC ENGINE =================
+# The HTML routes are `async def`, so they use an AsyncSession on an async
+# driver instead of blocking the event loop. The v1 API (plain `def` routes,
+# run in the threadpool) keeps the sync engine above.
+
+_ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(database_url: str):
+    """Same database as DATABASE_URL, on the matching async driver."""
+    url = make_url(database_url)
+    if url.get_dialect().is_async:
+        return url
+    return url.set(drivername=_ASYNC_DRIVERS[url.get_backend_name()])
+
+_async_url = settings.async_database_url or async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True))
+install_statement_timeout(async_engine.sync_engine)
+pool_metrics.attach(async_engine.sync_engine, "async")
+# expire_on_commit=False: attributes can't lazy-refresh in async code after a commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,21 +1,161 @@
+import json
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime, timezone
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from app.core.config import settings
+
+# ================= LOGGING PIPELINE =================
+# Loggers under "expense_tracker" only put records on a bounded queue; one
+# QueueListener thread formats them and does the console/file I/O, so a
+# slow disk never blocks the event loop. When the queue is full the record
+# is dropped and counted instead of waiting. DEBUG records are sampled
+# (the first of each message, then one in LOG_DEBUG_SAMPLE_EVERY).
+# Every record carries the id of the request it was logged in.
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+request_id_var = ContextVar("request_id", default=None)
+
+_lock = threading.Lock()
+_listener = None
+_queue = None
+
+log_stats = {"dropped": 0, "sampled_out": 0}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id; runs in the caller, before the record is queued."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(every, 1)
+        self._seen = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        with _lock:
+            seen = self._seen.get(key, 0)
+            # Bounded: messages first seen after the table is full are never sampled
+            if seen or len(self._seen) < 10000:
+                self._seen[key] = seen + 1
+        if seen % self.every == 0:
+            return True
+        with _lock:
+            log_stats["sampled_out"] += 1
+        return False
+
+
+class BoundedQueueHandler(QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _lock:
+                log_stats["dropped"] += 1
+
+    def prepare(self, record):
+        # Resolve the message and traceback here: args may be mutated after the
+        # call returns, and the listener must not touch live objects
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields (e.g. "request") are included as they are."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Unlike records, the stop marker must not be dropped on a full queue
+        self.queue.put(self._sentinel)
+
+
+def _formatter():
+    if settings.log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+
 
 def setup_logging():
+    global _listener, _queue
     logger = logging.getLogger("expense_tracker")
-    logger.setLevel(logging.INFO)
+    if logger.handlers:
+        # Already configured (e.g. the app module imported twice)
+        return logger
+    logger.setLevel(settings.log_level.upper())
 
-    # Create handlers
-    console_handler = logging.StreamHandler()
-    file_handler = RotatingFileHandler("expense_tracker.log", maxBytes=1000000, backupCount=5)
+    formatter = _formatter()
+    handlers = [logging.StreamHandler()]
+    if settings.log_file:
+        handlers.append(RotatingFileHandler(
+            settings.log_file, maxBytes=settings.log_file_max_bytes, backupCount=settings.log_file_backups
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
 
-    # Create formatters
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
-
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    _queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = BoundedQueueHandler(_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(DebugSampler(settings.log_debug_sample_every))
+    logger.addHandler(queue_handler)
 
+    _listener = _Listener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
     return logger
+
+
+def shutdown_logging():
+    """Flushes what is queued and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        logging.getLogger("expense_tracker").handlers.clear()
+
+
+atexit.register(shutdown_logging)
+
+
+def logging_stats():
+    with _lock:
+        stats = dict(log_stats)
+    stats["queued"] = _queue.qsize() if _queue is not None else 0
+    return stats
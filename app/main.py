@@ -1,40 +1,68 @@
 from fastapi import FastAPI, Request, Form, Depends, status, HTTPException, UploadFile, File
-from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-import random
-import string
+from datetime import date
+from urllib.parse import urlencode
 import shutil
+import secrets
 import os
+import logging
 import math
 
 # --- Internal Imports ---
-from app.db.session import get_db
+from app.db.session import get_async_db, SessionLocal, engine, async_engine
+from app.db.pool import pool_metrics
+from app.core.config import settings
+from app.core.cache import init_response_cache, response_cache_stats
+from app.logging_config import setup_logging, shutdown_logging
+from app.middleware.request_timing import RequestTimingMiddleware, instrument_engine
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.core.metrics import snapshot_writer, collect_all, render
+from app.services.metrics_service import hit_ratios, outbox_depth
 from app.api.v1.router import router as v1_router
-from app.services.auth_service import authenticate_user
-from app.services.email_service import send_password_change_email
+from app.services.auth_service import authenticate_user_async
+from app.core.security import (
+    PasswordHashingBusy,
+    password_hasher,
+    get_password_hash_async,
+    verify_password_async,
+    token_cache_stats
+)
+from app.services.email_service import send_password_change_email, outbox_worker
+from app.services.balance_service import get_balance_async
+from app.services.user_cache import get_user_snapshot, invalidate_user, cache_stats as user_cache_stats
+from app.services.transfer_service import invalidate_account
+from app.services.account_directory import (
+    warm_directory,
+    remember_account,
+    assign_account_number_async,
+    directory_stats
+)
+from app.services.category_service import (
+    get_merged_categories_async,
+    invalidate_user_categories,
+    invalidate_public_categories,
+    cache_stats as category_cache_stats
+)
 from app.models import User, Category, Expense, Transfer, Role
 from app.services.report_service import (
-    get_monthly_expense_report,
-    get_monthly_transfers,
-    get_recent_expenses,
-    get_recent_transfers,
-    get_user_categories,
-    get_category_pie_data,
-    get_paginated_expenses,
-    get_paginated_transfers,
-    get_total_transaction_count
+    get_dashboard_snapshot_async,
+    get_transaction_feed_async,
+    get_admin_transactions_page_async
 )
 
 # --- App Configuration ---
 app = FastAPI()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger("expense_tracker.app")
 
 # --- Middleware ---
 app.add_middleware(
@@ -48,6 +76,15 @@ app.add_middleware(
 # WARNING: Change this secret key for production!
 app.add_middleware(SessionMiddleware, secret_key="super-secret-key-change-this")
 
+# Outermost: their timing covers the other middleware too
+app.add_middleware(RequestTimingMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+# Around everything, so every log line of the request carries its id
+app.add_middleware(RequestIdMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 # --- Static Files & Templates ---
 os.makedirs("static/profile_pics", exist_ok=True) 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -57,14 +94,93 @@ templates = Jinja2Templates(directory="templates")
 app.include_router(v1_router, prefix="/api/v1")
 
 
+@app.on_event("startup")
+def init_logging():
+    setup_logging()
+
+
+@app.on_event("startup")
+def init_cache_backend():
+    init_response_cache()
+
+
+@app.on_event("startup")
+def warm_account_directory():
+    db = SessionLocal()
+    try:
+        warm_directory(db)
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def start_email_outbox_worker():
+    if settings.email_worker_enabled:
+        outbox_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_email_outbox_worker():
+    outbox_worker.stop()
+
+
+@app.on_event("startup")
+def start_metrics_writer():
+    if settings.metrics_enabled:
+        snapshot_writer.start()
+
+
+@app.on_event("shutdown")
+def stop_metrics_writer():
+    snapshot_writer.stop()
+
+
+@app.on_event("shutdown")
+def stop_logging():
+    # Last: flushes what the other shutdown hooks logged
+    shutdown_logging()
+
+
+_BUSY_MESSAGE = "Too many login attempts in progress, please retry shortly"
+# HTML form posts that hash a password get their page back instead of JSON
+_BUSY_FORM_TEMPLATES = {"/login": "login.html", "/register": "register.html"}
+_BUSY_FORM_REDIRECTS = {"/change-password": "/settings"}
+
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    """Login storms are shed with a 503 instead of queueing without bound."""
+    path = request.url.path
+    if path in _BUSY_FORM_TEMPLATES:
+        return templates.TemplateResponse(
+            _BUSY_FORM_TEMPLATES[path], {"request": request, "error": _BUSY_MESSAGE},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"}
+        )
+    if path in _BUSY_FORM_REDIRECTS:
+        return RedirectResponse(
+            url=f"{_BUSY_FORM_REDIRECTS[path]}?{urlencode({'error': _BUSY_MESSAGE})}",
+            status_code=status.HTTP_303_SEE_OTHER
+        )
+    return JSONResponse(
+        {"detail": _BUSY_MESSAGE},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"}
+    )
+
+
 # ================= DEPENDENCIES =================
 
-def get_current_user(request: Request, db: Session = Depends(get_db)):
-    """Retrieves the currently logged-in user from the session."""
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Retrieves the currently logged-in user from the session, as a read-only
+    UserSnapshot (role included) served from a short-TTL per-worker cache.
+    Routes that modify the user must load the User row themselves.
+    """
     user_id = request.session.get("user_id")
     if not user_id:
         return None
-    return db.query(User).filter(User.id == user_id).first()
+    return await get_user_snapshot(db, user_id)
 
 def get_admin_user(user: User = Depends(get_current_user)):
     """Checks if the current user has 'admin' privileges."""
@@ -91,9 +207,9 @@ async def login_post(
     request: Request, 
     username: str = Form(...), 
     password: str = Form(...), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user_async(db, username, password)
     if not user:
         return templates.TemplateResponse("login.html", {
             "request": request, 
@@ -113,41 +229,40 @@ async def register_user(
     username: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # 1. Check if user already exists
-    existing_user = db.query(User).filter((User.username == username) | (User.email == email)).first()
+    existing_user = await db.scalar(select(User).where((User.username == username) | (User.email == email)).limit(1))
     if existing_user:
         return templates.TemplateResponse("register.html", {
             "request": request, 
             "error": "Username or Email already exists!"
         })
 
-    # 2. Hash password
-    hashed_pw = pwd_context.hash(password)
+    # 2. Hash password (connection released to the pool while bcrypt runs)
+    await db.commit()
+    hashed_pw = await get_password_hash_async(password)
     
-    # 3. Generate Account Number
-    generated_account_num = "".join(random.choices(string.digits, k=10))
-
-    # 4. Assign Default Role ('user')
-    user_role = db.query(Role).filter(Role.name == "user").first()
+    # 3. Assign Default Role ('user')
+    user_role = await db.scalar(select(Role).where(Role.name == "user"))
     if not user_role:
         user_role = Role(name="user")
         db.add(user_role)
-        db.commit()
-        db.refresh(user_role)
+        await db.commit()
 
-    # 5. Create User
+    # 4. Create User with a unique account number
     new_user = User(
         username=username, 
         email=email, 
         hashed_password=hashed_pw, 
-        role_id=user_role.id,
-        account_number=generated_account_num
+        role_id=user_role.id
     )
     
-    db.add(new_user)
-    db.commit()
+    generated_account_num = await assign_account_number_async(db, new_user)
+    await db.commit()
+    remember_account(generated_account_num, new_user.id)
+    # A lookup made before the account existed may have cached it as unknown
+    await invalidate_account(generated_account_num)
 
     return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -161,63 +276,35 @@ async def logout(request: Request):
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(
     request: Request, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
         return RedirectResponse(url="/login")
 
-    # Monthly Stats (For Charts/Cards)
-    monthly_expenses = get_monthly_expense_report(db, user)
-    monthly_transfers = get_monthly_transfers(db, user)
-    
-    # Recent Activity
-    recent_expenses = get_recent_expenses(db, user, limit=5)
-    recent_transfers = get_recent_transfers(db, user, limit=5)
-    
-    # --- LIFETIME BALANCE CALCULATION ---
-    total_income_all = db.query(func.sum(Transfer.amount)).filter(
-        (Transfer.receiver_id == user.id) | (Transfer.sender_id == user.id)
-    ).scalar() or 0.0
-
-    total_expense_all = db.query(func.sum(Expense.debit)).filter(
-        Expense.user_id == user.id
-    ).scalar() or 0.0
-
-    balance = total_income_all - total_expense_all
-    
-    chart_labels, chart_data = get_category_pie_data(db, user)
-    
-    # Fetch Categories (Public + Personal for dropdown)
-    personal_cats = db.query(Category).filter(Category.user_id == user.id).all()
-    public_cats = db.query(Category).join(User).join(Role).filter(Role.name == "admin").all()
-    
-    # Merge for dropdown: create a dict to avoid duplicates by name
-    # Admin categories are added first, then overridden by personal categories if names match
-    all_categories_dict = {c.name: c for c in public_cats}
-    for c in personal_cats:
-        all_categories_dict[c.name] = c
-    final_categories = list(all_categories_dict.values())
+    # All cards, lists, chart data and categories in two round trips
+    snapshot = await get_dashboard_snapshot_async(db, user)
 
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
         "user": user,
-        "monthly_expenses": monthly_expenses,
-        "monthly_transfers": monthly_transfers,
-        "balance": balance,
-        "recent_expenses": recent_expenses,
-        "recent_transfers": recent_transfers,
-        "chart_labels": chart_labels,
-        "chart_data": chart_data,
-        "categories": final_categories
+        "monthly_expenses": snapshot["monthly_expenses"],
+        "monthly_transfers": snapshot["monthly_transfers"],
+        "balance": snapshot["balance"],
+        "recent_expenses": snapshot["recent_expenses"],
+        "recent_transfers": snapshot["recent_transfers"],
+        "chart_labels": snapshot["chart_labels"],
+        "chart_data": snapshot["chart_data"],
+        "categories": snapshot["categories"]
     })
 
 
 @app.get("/transactions", response_class=HTMLResponse)
 async def transactions_page(
     request: Request, 
-    page: int = 1, 
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    direction: str = "older",
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
@@ -225,44 +312,21 @@ async def transactions_page(
 
     PAGE_SIZE = 10 
     
-    expenses = get_paginated_expenses(db, user, page, PAGE_SIZE)
-    transfers = get_paginated_transfers(db, user, page, PAGE_SIZE)
-    
-    all_transactions = []
-    for exp in expenses:
-        t = exp.__dict__.copy()
-        if '_sa_instance_state' in t: del t['_sa_instance_state']
-        t['type'] = 'expense'
-        t['amount'] = exp.debit
-        all_transactions.append(t)
-        
-    for tr in transfers:
-        t = tr.__dict__.copy()
-        if '_sa_instance_state' in t: del t['_sa_instance_state']
-        t['type'] = 'transfer'
-        if not t.get('description'): t['description'] = "Transfer"
-        all_transactions.append(t)
-
-    all_transactions.sort(key=lambda x: x['created_at'], reverse=True)
-    
-    total_items = get_total_transaction_count(db, user)
-    total_pages = math.ceil(total_items / PAGE_SIZE) if total_items > 0 else 1
-    
-    # --- FETCH CATEGORIES FOR MODAL ---
-    personal_cats = db.query(Category).filter(Category.user_id == user.id).all()
-    public_cats = db.query(Category).join(User).join(Role).filter(Role.name == "admin").all()
+    # Keyset pagination over expenses + transfers in a single query
+    try:
+        feed = await get_transaction_feed_async(db, user, cursor=cursor, direction=direction, page_size=PAGE_SIZE)
+    except ValueError:
+        return RedirectResponse(url="/transactions")
     
-    all_categories_dict = {c.name: c for c in public_cats}
-    for c in personal_cats:
-        all_categories_dict[c.name] = c
-    final_categories = list(all_categories_dict.values())
+    # --- CATEGORIES FOR MODAL (cached) ---
+    final_categories = await get_merged_categories_async(db, user.id)
     
     return templates.TemplateResponse("transactions.html", {
         "request": request,
         "user": user, 
-        "transactions": all_transactions, 
-        "current_page": page,
-        "total_pages": total_pages,
+        "transactions": feed["items"], 
+        "next_cursor": feed["next_cursor"],
+        "prev_cursor": feed["prev_cursor"],
         "categories": final_categories
     })
 
@@ -274,17 +338,15 @@ async def add_transaction(
     amount: float = Form(...),
     type: str = Form(...),
     category_id: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
         return RedirectResponse(url="/login")
     
     if type == "expense":
-        # Calculate Balance First
-        total_income = db.query(func.sum(Transfer.amount)).filter(Transfer.receiver_id == user.id).scalar() or 0.0
-        total_expense = db.query(func.sum(Expense.debit)).filter(Expense.user_id == user.id).scalar() or 0.0
-        current_balance = total_income - total_expense
+        # Check Balance First
+        current_balance = await get_balance_async(db, user.id)
 
         if current_balance < amount:
             return RedirectResponse(url="/dashboard?error=insufficient_balance", status_code=status.HTTP_303_SEE_OTHER)
@@ -308,24 +370,24 @@ async def add_transaction(
         )
         db.add(new_entry)
         
-    db.commit()
+    await db.commit()
     return RedirectResponse(url="/transactions", status_code=status.HTTP_303_SEE_OTHER)
 
 @app.post("/transactions/delete/{type}/{id}")
 async def delete_transaction(
     type: str,
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if type == "expense":
-        entry = db.query(Expense).filter(Expense.id == id, Expense.user_id == user.id).first()
+        entry = await db.scalar(select(Expense).where(Expense.id == id, Expense.user_id == user.id))
     else:
-        entry = db.query(Transfer).filter(Transfer.id == id, (Transfer.sender_id == user.id) | (Transfer.receiver_id == user.id)).first()
+        entry = await db.scalar(select(Transfer).where(Transfer.id == id, (Transfer.sender_id == user.id) | (Transfer.receiver_id == user.id)))
 
     if entry:
-        db.delete(entry)
-        db.commit()
+        await db.delete(entry)
+        await db.commit()
 
     return RedirectResponse(url="/dashboard", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -336,26 +398,14 @@ async def delete_transaction(
 @app.get("/categories", response_class=HTMLResponse)
 async def categories_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
         return RedirectResponse(url="/login")
 
-    # 1. User's Personal Categories
-    personal_cats = db.query(Category).filter(Category.user_id == user.id).all()
-
-    # 2. Admin's Public Categories
-    public_cats = db.query(Category).join(User).join(Role).filter(Role.name == "admin").all()
-
-    # 3. Merge (Admin ones first, User ones override if duplicates logic needed)
-    all_categories_dict = {}
-    for c in public_cats:
-        all_categories_dict[c.name] = c
-    for c in personal_cats:
-        all_categories_dict[c.name] = c
-        
-    final_list = list(all_categories_dict.values())
+    # Admin's public categories + user's personal ones (personal override on the same name)
+    final_list = await get_merged_categories_async(db, user.id)
 
     return templates.TemplateResponse("categories.html", {
         "request": request,
@@ -367,7 +417,7 @@ async def categories_page(
 async def add_category(
     request: Request,
     name: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
@@ -376,10 +426,10 @@ async def add_category(
     clean_name = name.strip()
     
     # Check if category already exists for the current user
-    existing = db.query(Category).filter(
+    existing = await db.scalar(select(Category).where(
         Category.name == clean_name, 
         Category.user_id == user.id
-    ).first()
+    ).limit(1))
     
     if existing:
         return RedirectResponse(url="/categories?error=Category already exists!", status_code=303)
@@ -387,40 +437,54 @@ async def add_category(
     try:
         new_cat = Category(name=clean_name, user_id=user.id)
         db.add(new_cat)
-        db.commit()
+        await db.commit()
+        invalidate_user_categories(user.id)
         return RedirectResponse(url="/categories?msg=Category Added Successfully", status_code=303)
     except Exception as e:
-        db.rollback()
-        print(f"Error adding category: {e}")
+        await db.rollback()
+        logger.exception("Error adding category %r for user %s", clean_name, user.id)
         return RedirectResponse(url=f"/categories?error=Server Error: {e}", status_code=303)
 
 @app.post("/categories/delete/{cat_id}")
 async def delete_category(
     cat_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user) 
 ):
-    category = db.query(Category).filter(Category.id == cat_id).first()
+    category = await db.get(Category, cat_id)
     
     if category:
         # Security: Allow delete only if User created it OR User is Admin
         if user.role.name == 'admin' or category.user_id == user.id:
-            db.delete(category)
-            db.commit()
+            owner_id = category.user_id
+            await db.delete(category)
+            await db.commit()
+            invalidate_user_categories(owner_id)
         else:
-            print("Unauthorized delete attempt on public category")
+            logger.warning("User %s tried to delete category %s they do not own", user.id, cat_id)
             
     return RedirectResponse(url="/categories", status_code=status.HTTP_303_SEE_OTHER)
 
 
 # ================= SETTINGS & ADMIN PANEL ===============
 
+def _parse_date(value: Optional[str]):
+    """'YYYY-MM-DD' from a filter form field, or None if empty/invalid."""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
 @app.get("/settings", response_class=HTMLResponse)
 async def settings_page(
     request: Request,
     page: int = 1, 
     user_page: int = 1, 
-    db: Session = Depends(get_db),
+    tx_user: Optional[str] = None,
+    tx_type: Optional[str] = None,
+    tx_from: Optional[str] = None,
+    tx_to: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
@@ -433,43 +497,25 @@ async def settings_page(
     USER_PAGE_SIZE = 5
     total_pages = 1
     user_total_pages = 1
+    tx_filters = {"tx_user": tx_user or "", "tx_type": tx_type or "", "tx_from": tx_from or "", "tx_to": tx_to or ""}
 
     # --- ADMIN LOGIC ---
     if user.role.name == "admin":
         # 1. Fetch Users (Paginated)
-        total_users = db.query(User).count()
+        total_users = await db.scalar(select(func.count(User.id)))
         user_total_pages = math.ceil(total_users / USER_PAGE_SIZE) if total_users > 0 else 1
         user_start = (user_page - 1) * USER_PAGE_SIZE
-        all_users = db.query(User).offset(user_start).limit(USER_PAGE_SIZE).all()
-
-        # 2. Fetch Transactions (Simplified merge for admin view)
-        all_expenses = db.query(Expense).all()
-        all_transfers = db.query(Transfer).all()
-
-        for exp in all_expenses:
-            t = exp.__dict__.copy()
-            if '_sa_instance_state' in t: del t['_sa_instance_state']
-            t['type'] = 'expense'
-            t['amount'] = exp.debit
-            t['user_name'] = exp.user.username if exp.user else "Unknown"
-            global_transactions.append(t)
-
-        for tr in all_transfers:
-            t = tr.__dict__.copy()
-            if '_sa_instance_state' in t: del t['_sa_instance_state']
-            t['type'] = 'transfer'
-            t['description'] = t.get('description', 'Transfer')
-            t['user_name'] = tr.receiver.username if tr.receiver else "Unknown"
-            global_transactions.append(t)
-
-        # Sort and Paginate List
-        global_transactions.sort(key=lambda x: x['created_at'], reverse=True)
-        total_items = len(global_transactions)
+        all_users = (await db.scalars(
+            select(User).options(joinedload(User.role)).order_by(User.id).offset(user_start).limit(USER_PAGE_SIZE)
+        )).all()
+
+        # 2. Fetch Transactions (one page, paginated and joined in the DB)
+        global_transactions, total_items = await get_admin_transactions_page_async(
+            db, page=page, page_size=PAGE_SIZE,
+            username=tx_user or None, tx_type=tx_type or None,
+            tx_from=_parse_date(tx_from), tx_to=_parse_date(tx_to)
+        )
         total_pages = math.ceil(total_items / PAGE_SIZE) if total_items > 0 else 1
-        
-        start = (page - 1) * PAGE_SIZE
-        end = start + PAGE_SIZE
-        global_transactions = global_transactions[start:end]
 
     # --- RENDER TEMPLATE ---
     return templates.TemplateResponse("settings.html", {
@@ -480,7 +526,9 @@ async def settings_page(
         "current_page": page,
         "total_pages": total_pages,
         "user_current_page": user_page,
-        "user_total_pages": user_total_pages
+        "user_total_pages": user_total_pages,
+        "tx_filters": tx_filters,
+        "tx_query": urlencode({k: v for k, v in tx_filters.items() if v})
     })
 
 
@@ -491,21 +539,23 @@ async def update_profile(
     username: str = Form(...),
     email: str = Form(...),
     profile_pic: UploadFile = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
         return RedirectResponse(url="/login")
 
     # Check uniqueness (excluding self)
-    existing = db.query(User).filter(
+    existing = await db.scalar(select(User).where(
         (User.username == username) | (User.email == email),
         User.id != user.id
-    ).first()
+    ).limit(1))
 
     if existing:
         return RedirectResponse(url="/settings?error=Username or Email already taken", status_code=303)
 
+    db_user = await db.get(User, user.id)
+
     # --- FILE UPLOAD LOGIC ---
     if profile_pic and profile_pic.filename:
         # Create directory if not exists
@@ -520,12 +570,13 @@ async def update_profile(
             shutil.copyfileobj(profile_pic.file, buffer)
 
         # Update DB column
-        user.profile_picture = file_name
+        db_user.profile_picture = file_name
 
     # Update Text Data
-    user.username = username
-    user.email = email
-    db.commit()
+    db_user.username = username
+    db_user.email = email
+    await db.commit()
+    invalidate_user(user.id)
     
     return RedirectResponse(url="/settings?msg=Profile Updated", status_code=303)
 
@@ -534,25 +585,25 @@ async def update_profile(
 async def change_password(
     old_password: str = Form(...),
     new_password: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     if not user:
         return RedirectResponse(url="/login")
 #test
-    #Verify Old Password
-    if not pwd_context.verify(old_password, user.hashed_password):
+    #Verify Old Password (connection released to the pool while bcrypt runs)
+    db_user = await db.get(User, user.id)
+    await db.commit()
+    if not await verify_password_async(old_password, db_user.hashed_password):
         return RedirectResponse(url="/settings?error=Incorrect Old Password", status_code=303)
 
    
-    user.hashed_password = pwd_context.hash(new_password)
-    db.commit()
-
-   
-    try:
-        send_password_change_email(user.email, user.username)
-    except Exception as e:
-        print(f"Email Error: {e}")
+    db_user.hashed_password = await get_password_hash_async(new_password)
+    # Queued in the same transaction; the outbox worker delivers it
+    send_password_change_email(db, user.email, user.username)
+    await db.commit()
+    invalidate_user(user.id)
+    outbox_worker.wake()
 
     return RedirectResponse(url="/settings?msg=Password Changed Successfully. Email Sent!", status_code=303)
 
@@ -562,66 +613,136 @@ async def change_password(
 @app.post("/users/promote/{user_id}")
 async def promote_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user = Depends(get_admin_user) 
 ):
-    target_user = db.query(User).filter(User.id == user_id).first()
+    target_user = await db.get(User, user_id)
     if target_user:
-        admin_role = db.query(Role).filter(Role.name == "admin").first()
+        admin_role = await db.scalar(select(Role).where(Role.name == "admin"))
         if admin_role:
             target_user.role_id = admin_role.id
-            db.commit()
+            await db.commit()
+            invalidate_user(target_user.id)
+            invalidate_public_categories()
     return RedirectResponse(url="/settings", status_code=status.HTTP_303_SEE_OTHER)
 
 @app.post("/users/demote/{user_id}")
 async def demote_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user = Depends(get_admin_user) 
 ):
     if user_id == admin_user.id:
         return RedirectResponse(url="/settings?error=Cannot demote yourself", status_code=303)
 
-    target_user = db.query(User).filter(User.id == user_id).first()
+    target_user = await db.get(User, user_id)
     if target_user:
-        user_role = db.query(Role).filter(Role.name == "user").first()
+        user_role = await db.scalar(select(Role).where(Role.name == "user"))
         if user_role:
             target_user.role_id = user_role.id
-            db.commit()
+            await db.commit()
+            invalidate_user(target_user.id)
+            invalidate_public_categories()
     return RedirectResponse(url="/settings", status_code=status.HTTP_303_SEE_OTHER)
 
 @app.post("/admin/transactions/delete/{type}/{id}")
 async def admin_delete_transaction(
     type: str, 
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_admin_user)
 ):
     if type == "expense":
-        entry = db.query(Expense).filter(Expense.id == id).first()
+        entry = await db.get(Expense, id)
     else:
-        entry = db.query(Transfer).filter(Transfer.id == id).first()
+        entry = await db.get(Transfer, id)
         
     if entry:
-        db.delete(entry)
-        db.commit()
+        await db.delete(entry)
+        await db.commit()
         
     return RedirectResponse(url="/settings", status_code=status.HTTP_303_SEE_OTHER)
 
 
+# --- API: Connection Pool Metrics (For sizing the pool) ---
+@app.get("/admin/pool-metrics")
+async def get_pool_metrics(admin_user = Depends(get_admin_user)):
+    return JSONResponse({
+        "pid": os.getpid(),
+        "settings": {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+            "statement_timeout_ms": settings.db_statement_timeout_ms
+        },
+        "engines": pool_metrics.snapshot(),
+        "password_hashing": password_hasher.snapshot()
+    })
+
+
+# --- API: Cache hit/miss counters (this worker) ---
+@app.get("/admin/cache-stats")
+async def get_cache_stats(admin_user = Depends(get_admin_user)):
+    return JSONResponse({
+        "pid": os.getpid(),
+        "backend": settings.cache_backend,
+        "response_cache": response_cache_stats(),
+        "users": dict(user_cache_stats),
+        "categories": dict(category_cache_stats),
+        "tokens": dict(token_cache_stats),
+        "account_directory": dict(directory_stats)
+    })
+
+
+# --- Prometheus scrape endpoint (all workers of this host, merged) ---
+_LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def _may_scrape(request: Request) -> bool:
+    if settings.metrics_token:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and secrets.compare_digest(token.encode(), settings.metrics_token.encode())
+    return request.client is not None and request.client.host in _LOOPBACK_HOSTS
+
+
+def _render_metrics(outbox_rows):
+    # Reads and writes the per-worker snapshot files: run in a worker thread
+    metrics = collect_all()
+    metrics["cache_hit_ratio"] = hit_ratios(metrics)
+    metrics["email_outbox_rows"] = outbox_rows
+    return render(metrics)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request, db: AsyncSession = Depends(get_async_db)):
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _may_scrape(request):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    outbox_rows = await db.run_sync(outbox_depth)
+    text = await run_in_threadpool(_render_metrics, outbox_rows)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
 # --- API: Get Single User Details (For Admin Modal) ---
 @app.get("/admin/user-details/{target_user_id}")
 async def get_user_details(
     target_user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user = Depends(get_admin_user) # Only Admin can access
 ):
-    user = db.query(User).filter(User.id == target_user_id).first()
+    user = await db.scalar(select(User).options(joinedload(User.role)).where(User.id == target_user_id))
     if not user:
         return JSONResponse({"error": "User not found"}, status_code=404)
 
-    expenses = db.query(Expense).filter(Expense.user_id == user.id).all()
-    transfers = db.query(Transfer).filter((Transfer.sender_id == user.id) | (Transfer.receiver_id == user.id)).all()
+    expenses = (await db.scalars(
+        select(Expense).options(selectinload(Expense.category)).where(Expense.user_id == user.id)
+    )).all()
+    transfers = (await db.scalars(
+        select(Transfer).where((Transfer.sender_id == user.id) | (Transfer.receiver_id == user.id))
+    )).all()
 
     transactions = []
     total_income = 0
@@ -638,13 +759,18 @@ async def get_user_details(
         })
 
     for tr in transfers:
-        total_income += tr.amount
+        # Sent to someone else: money out. Received (incl. own income): money in.
+        sent = tr.sender_id == user.id and tr.receiver_id != user.id
+        if sent:
+            total_expense += tr.amount
+        else:
+            total_income += tr.amount
         transactions.append({
             "type": "transfer",
             "description": tr.description or "Transfer",
             "amount": tr.amount,
             "date": tr.created_at.strftime('%Y-%m-%d'),
-            "category": "Income"
+            "category": "Transfer sent" if sent else "Income"
         })
 
     transactions.sort(key=lambda x: x['date'], reverse=True)
@@ -0,0 +1,58 @@
+import time
+from app.core.metrics import registry, statement_fingerprint, COUNTER, GAUGE, HISTOGRAM, REQUEST_BUCKETS, QUERY_BUCKETS
+
+# ================= HTTP + DB METRICS =================
+# Latency is labelled with the route template (/admin/user-details/{target_user_id}),
+# never the raw path, and statements with their fingerprint, so the number of
+# series stays bounded.
+
+registry.declare(
+    "http_request_duration_seconds", HISTOGRAM, "HTTP request latency by route template and status",
+    ("method", "route", "status"), REQUEST_BUCKETS
+)
+registry.declare("http_requests_in_flight", GAUGE, "HTTP requests being served")
+registry.declare(
+    "db_query_duration_seconds", HISTOGRAM, "SQL statement latency by statement fingerprint",
+    ("fingerprint",), QUERY_BUCKETS
+)
+registry.declare("db_query_errors_total", COUNTER, "SQL statements that raised")
+
+
+def observe_query(statement: str, seconds: float):
+    registry.observe("db_query_duration_seconds", (statement_fingerprint(statement),), seconds)
+
+
+def count_query_error():
+    registry.inc("db_query_errors_total")
+
+
+class MetricsMiddleware:
+    """ASGI middleware: in-flight gauge + latency histogram per route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry.inc("http_requests_in_flight", value=1)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.inc("http_requests_in_flight", value=-1)
+            # Set by the router once a route matched; 404s and static files share one label
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            registry.observe(
+                "http_request_duration_seconds", (scope["method"], route, str(status)), time.perf_counter() - started
+            )
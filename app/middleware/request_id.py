@@ -0,0 +1,36 @@
+import re
+import uuid
+from app.logging_config import request_id_var
+
+# ================= REQUEST ID =================
+# Every HTTP request gets an id (the caller's X-Request-ID when it looks
+# sane, otherwise a new one). It is echoed in the response header and
+# stamped on every log record written while the request is served,
+# including from the threadpool and run_sync.
+
+HEADER = b"x-request-id"
+_VALID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(HEADER, b"").decode("latin-1")
+        request_id = incoming if _VALID.match(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
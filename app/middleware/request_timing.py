@@ -0,0 +1,130 @@
+import time
+import logging
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.core.config import settings
+from app.middleware.metrics import observe_query, count_query_error
+
+# ================= PER-REQUEST DB TIMING =================
+# Cursor events on both engines add every statement to the stats of the
+# request that ran it (a ContextVar set by the middleware: it follows the
+# request into the threadpool for the sync v1 routes and into
+# AsyncSession.run_sync greenlets). Each response gets a Server-Timing
+# header and one log line; requests over SLOW_REQUEST_MS or
+# SLOW_REQUEST_QUERIES are logged as warnings with their slowest statement.
+# Every statement, in a request or not, also feeds the /metrics histogram.
+
+logger = logging.getLogger("expense_tracker.requests")
+
+_SQL_PREVIEW = 500
+
+_current = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_ms", "slowest_ms", "slowest_sql")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.queries += 1
+        self.db_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = statement
+
+
+def current_request_stats():
+    """Stats of the request being served, or None outside a request."""
+    return _current.get()
+
+
+def instrument_engine(engine):
+    """`engine` is a sync Engine (use async_engine.sync_engine for the async one)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        observe_query(statement, elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        # after_cursor_execute does not fire for a failed statement
+        count_query_error()
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+def server_timing(stats: RequestStats, total_ms: float) -> str:
+    return (
+        f'db;dur={stats.db_ms:.2f};desc="{stats.queries} queries", '
+        f'db-slowest;dur={stats.slowest_ms:.2f}, '
+        f'total;dur={total_ms:.2f}'
+    )
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware: Server-Timing header + one log line per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.request_timing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # What ran before the headers; a streamed body's queries only reach the log line
+                header = server_timing(stats, (time.perf_counter() - started) * 1000)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._log(scope, status, stats, (time.perf_counter() - started) * 1000)
+
+    def _log(self, scope, status, stats, total_ms):
+        route = scope.get("route")
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status,
+            "duration_ms": round(total_ms, 2),
+            "db_queries": stats.queries,
+            "db_ms": round(stats.db_ms, 2),
+            "db_slowest_ms": round(stats.slowest_ms, 2),
+        }
+        slow = total_ms >= settings.slow_request_ms or stats.queries >= settings.slow_request_queries
+        if slow:
+            fields["db_slowest_sql"] = " ".join((stats.slowest_sql or "").split())[:_SQL_PREVIEW]
+        if not logger.isEnabledFor(logging.WARNING if slow else logging.INFO):
+            return
+        message = " ".join(f"{key}={value}" for key, value in fields.items() if key != "db_slowest_sql")
+        if slow:
+            logger.warning("slow request %s sql=%r", message, fields["db_slowest_sql"], extra={"request": fields})
+        else:
+            logger.info("request %s", message, extra={"request": fields})
@@ -2,4 +2,7 @@ from .rbac import Role, Permission
 from .user import User
 from .category import Category
 from .expense import Expense
-from .transfer import Transfer
\ No newline at end of file
+from .transfer import Transfer
+from .balance import UserBalance
+from .rollup import MonthlyRollup
+from .outbox import EmailOutbox
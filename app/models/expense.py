@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base import Base
@@ -16,6 +16,13 @@ class Expense(Base):
     user = relationship("User", back_populates="expenses")
     category = relationship("Category", back_populates="expenses")
 
+    # Serves "WHERE user_id = ? [AND created_at range] ORDER BY created_at DESC"
+    __table_args__ = (
+        Index("ix_expenses_user_id_created_at", "user_id", "created_at"),
+        # Admin global view orders every user's rows by created_at
+        Index("ix_expenses_created_at", "created_at"),
+    )
+
 
 
 
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Float
+from app.db.base import Base
+
+class MonthlyRollup(Base):
+    """
+    Per user / month / category sums, maintained on every Expense/Transfer write
+    by app.services.rollup_service.
+    category_id 0 is the bucket for uncategorised expenses and for transfers
+    (received, and sent to another user).
+    """
+    __tablename__ = "monthly_rollups"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    month = Column(Integer, primary_key=True, autoincrement=False)
+    category_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    expense_total = Column(Float, nullable=False, default=0.0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    received_total = Column(Float, nullable=False, default=0.0)
+    received_count = Column(Integer, nullable=False, default=0)
+    sent_total = Column(Float, nullable=False, default=0.0)
+    sent_count = Column(Integer, nullable=False, default=0)
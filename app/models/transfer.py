@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.db.base import Base
 
 class Transfer(Base):
@@ -10,7 +11,7 @@ class Transfer(Base):
     description = Column(String(255), nullable=False)
     amount = Column(Float, nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -18,6 +19,13 @@ class Transfer(Base):
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_transfers")
     receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_transfers")
 
+    # One index per side of the "sender_id = ? OR receiver_id = ?" predicates
+    __table_args__ = (
+        Index("ix_transfers_sender_id_created_at", "sender_id", "created_at"),
+        Index("ix_transfers_receiver_id_created_at", "receiver_id", "created_at"),
+        Index("ix_transfers_created_at", "created_at"),
+    )
+
 
 
 
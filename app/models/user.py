@@ -10,7 +10,8 @@ class User(Base):
     username = Column(String(50), unique=True, index=True)
     email = Column(String(100), unique=True, index=True)
     hashed_password = Column(String(255))
-    account_number = Column(String(20), nullable=True)
+    # Unique index: transfers resolve the recipient by it
+    account_number = Column(String(20), nullable=True, unique=True, index=True)
     profile_picture = Column(String(255), nullable=True)
     balance = Column(Integer, default=0)
 
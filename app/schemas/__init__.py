@@ -1,3 +1,4 @@
 from .expense_schema import *
 from .user_schema import *
 from .category_schema import *
+from .bulk_schema import *
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+class BulkItemResult(BaseModel):
+    op: str
+    index: int
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[BulkItemResult]
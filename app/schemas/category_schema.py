@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class CategoryCreate(BaseModel):
     name: str
@@ -18,3 +18,16 @@ class Category(BaseModel):
 class CategoryUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
+
+class CategoryBulkCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+
+class CategoryBulkUpdate(BaseModel):
+    id: int
+    name: str = Field(..., min_length=1, max_length=255)
+
+class CategoryBulkRequest(BaseModel):
+    create: List[CategoryBulkCreate] = []
+    update: List[CategoryBulkUpdate] = []
+    delete: List[int] = []
+    atomic: bool = False
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class DebitCreate(BaseModel):
     description: str
@@ -16,10 +16,11 @@ class Expense(BaseModel):
     id: int
     description: str
     debit: float
-    credit: float
-    is_active: bool
+    # Not stored on expenses (incomes are transfers); kept for API compatibility
+    credit: float = 0.0
+    is_active: bool = True
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
     user_id: int
     category_id: Optional[int] = None
 
@@ -30,3 +31,24 @@ class ExpenseUpdate(BaseModel):
     debit: Optional[float] = None
     credit: Optional[float] = None
     category_id: Optional[int] = None
+
+class ExpenseBulkCreate(BaseModel):
+    description: str = Field(..., max_length=255)
+    debit: float = Field(..., gt=0)
+    category_id: Optional[int] = None
+    # When the expense happened (offline clients); defaults to now
+    created_at: Optional[datetime] = None
+
+class ExpenseBulkUpdate(BaseModel):
+    id: int
+    description: Optional[str] = Field(None, max_length=255)
+    debit: Optional[float] = Field(None, gt=0)
+    category_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class ExpenseBulkRequest(BaseModel):
+    create: List[ExpenseBulkCreate] = []
+    update: List[ExpenseBulkUpdate] = []
+    delete: List[int] = []
+    # All or nothing: if any item fails, nothing is written
+    atomic: bool = False
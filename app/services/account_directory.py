@@ -0,0 +1,129 @@
+import secrets
+import threading
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import User
+
+# ================= ACCOUNT NUMBER DIRECTORY =================
+# account_number -> user_id, held per worker. Warmed from the users table
+# at startup and updated on registration, so resolving a transfer
+# recipient is a dict lookup. The unique index on users.account_number is
+# the source of truth: a number missing here (e.g. registered through
+# another worker) falls back to an indexed lookup and is then remembered.
+
+ACCOUNT_NUMBER_DIGITS = 10
+
+_lock = threading.Lock()
+_directory = {}
+
+directory_stats = {"hits": 0, "misses": 0, "warmed": 0}
+
+
+def warm_directory(db: Session, chunk_size: int = 5000) -> int:
+    """Loads every (account_number, user_id) pair. Returns the number loaded."""
+    entries = {}
+    stmt = select(User.account_number, User.id).where(User.account_number.is_not(None))
+    for account_number, user_id in db.execute(stmt.execution_options(yield_per=chunk_size)):
+        entries[account_number] = user_id
+    with _lock:
+        _directory.clear()
+        _directory.update(entries)
+        directory_stats["warmed"] = len(entries)
+    return len(entries)
+
+
+def remember_account(account_number: str, user_id: int):
+    """Call after committing a new account."""
+    with _lock:
+        _directory[account_number] = user_id
+
+
+def forget_account(account_number: str):
+    with _lock:
+        _directory.pop(account_number, None)
+
+
+def _cached_user_id(account_number: str):
+    with _lock:
+        user_id = _directory.get(account_number)
+        directory_stats["hits" if user_id is not None else "misses"] += 1
+        return user_id
+
+
+def lookup_user_id(db: Session, account_number: str):
+    """user_id owning account_number, or None."""
+    if not account_number:
+        return None
+    user_id = _cached_user_id(account_number)
+    if user_id is None:
+        user_id = db.scalar(select(User.id).where(User.account_number == account_number))
+        if user_id is not None:
+            remember_account(account_number, user_id)
+    return user_id
+
+
+async def lookup_user_id_async(db: AsyncSession, account_number: str):
+    if not account_number:
+        return None
+    user_id = _cached_user_id(account_number)
+    if user_id is None:
+        user_id = await db.scalar(select(User.id).where(User.account_number == account_number))
+        if user_id is not None:
+            remember_account(account_number, user_id)
+    return user_id
+
+
+def lookup_user(db: Session, account_number: str):
+    """The User owning account_number, or None (drops a stale entry if the user is gone)."""
+    user_id = lookup_user_id(db, account_number)
+    if user_id is None:
+        return None
+    user = db.get(User, user_id)
+    if user is None or user.account_number != account_number:
+        forget_account(account_number)
+        return None
+    return user
+
+
+# ================= ALLOCATION =================
+
+def _candidate() -> str:
+    # No leading zero, so the number survives being treated as an integer
+    low = 10 ** (ACCOUNT_NUMBER_DIGITS - 1)
+    return str(low + secrets.randbelow(9 * low))
+
+
+def _account_number_taken(db: Session, account_number: str) -> bool:
+    return db.scalar(select(User.id).where(User.account_number == account_number)) is not None
+
+
+def assign_account_number(db: Session, user: User, attempts: int = 5) -> str:
+    """
+    Gives a new (pending) `user` a unique account number and flushes it.
+    Candidates already in the directory are skipped without a query; the
+    unique index settles races with other workers, in which case the
+    INSERT is retried (inside a savepoint) with a fresh number.
+    The caller commits and then calls remember_account().
+    """
+    for _ in range(attempts):
+        candidate = _candidate()
+        with _lock:
+            if candidate in _directory:
+                continue
+        user.account_number = candidate
+        try:
+            with db.begin_nested():
+                db.add(user)
+        except IntegrityError:
+            if not _account_number_taken(db, candidate):
+                # Not an account-number clash (e.g. username/email); let the caller handle it
+                raise
+            continue
+        return candidate
+    raise RuntimeError("Could not allocate a unique account number")
+
+
+async def assign_account_number_async(db: AsyncSession, user: User, attempts: int = 5) -> str:
+    return await db.run_sync(assign_account_number, user, attempts)
@@ -1,15 +1,13 @@
-import random
-import string
 from sqlalchemy.orm import Session
 # Import 'or_' to allow login by Username OR Email (optional but recommended)
-from sqlalchemy import or_ 
+from sqlalchemy import or_ , select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import user as user_model
 from app.schemas import user_schema as user_schema
-from app.core.security import get_password_hash, verify_password, create_access_token
-
-def generate_account_number():
-    import uuid
-    return str(uuid.uuid4().int)[:20]
+from app.core.security import get_password_hash, verify_password, verify_password_async, create_access_token
+from app.services.transfer_service import invalidate_account_sync
+from app.services.account_directory import assign_account_number, remember_account
+from app.services.balance_service import get_balance
 
 def create_user(db: Session, user: user_schema.UserCreate):
     existing_user = db.query(user_model.User).filter(
@@ -18,10 +16,12 @@ def create_user(db: Session, user: user_schema.UserCreate):
     if existing_user:
         raise ValueError("User with this email or username already exists")
     hashed_password = get_password_hash(user.password)
-    account_number = generate_account_number()
-    db_user = user_model.User(username=user.username, email=user.email, hashed_password=hashed_password, account_number=account_number, balance=0)
-    db.add(db_user)
+    db_user = user_model.User(username=user.username, email=user.email, hashed_password=hashed_password, balance=0)
+    account_number = assign_account_number(db, db_user)
     db.commit()
+    remember_account(account_number, db_user.id)
+    # A lookup made before the account existed may have cached it as unknown
+    invalidate_account_sync(account_number)
     db.refresh(db_user)
     return db_user
 
@@ -45,16 +45,37 @@ def authenticate_user(db: Session, identifier: str, password: str):
         
     return user
 
+async def authenticate_user_async(db: AsyncSession, identifier: str, password: str):
+    """Same as authenticate_user; the bcrypt check is awaited on the hashing pool."""
+    user = await db.scalar(
+        select(user_model.User).where(
+            or_(
+                user_model.User.email == identifier,
+                user_model.User.username == identifier
+            )
+        ).limit(1)
+    )
+
+    if not user:
+        return False
+
+    # End the read transaction so the connection goes back to the pool while bcrypt runs
+    await db.commit()
+    if not await verify_password_async(password, user.hashed_password):
+        return False
+
+    return user
+
 def create_access_token_for_user(user: user_model.User):
     # Ensure you are encoding the subject as a string (usually email or ID)
-    access_token = create_access_token(subject=str(user.email))
+    access_token = create_access_token(subject=str(user.email), user_id=user.id)
     return access_token
 
 def get_user_balance(db: Session, user_id: int):
     user = db.query(user_model.User).filter(user_model.User.id == user_id).first()
     if not user:
         raise ValueError("User not found")
-    return user.balance
+    return get_balance(db, user_id)
 
 
 
@@ -0,0 +1,279 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, func, select, update, insert, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Expense, Transfer, User, UserBalance
+from app.services.flush_tracking import iter_flush_changes, insert_or_update, UNKNOWN
+
+# ================= BALANCE LEDGER =================
+# Lifetime balance = SUM(transfers received) - SUM(expense debits)
+#                    - SUM(transfers sent to other users).
+# An income is a transfer from the user to themselves, so it only counts
+# as received. Instead of re-scanning both tables on every page view we
+# keep one `user_balances` row per user and move it by the delta of every write.
+
+_TRACKED = {
+    Expense: ("user_id", "debit"),
+    Transfer: ("sender_id", "receiver_id", "amount"),
+}
+
+
+def _contributions(model, values):
+    """
+    Returns [(user_id, income, expense)] that one Expense/Transfer row adds to the ledger.
+    A transfer is income for the receiver and, between two different users,
+    an expense for the sender: money moves, the total across users does not change.
+    """
+    if model is Expense:
+        if values["user_id"] is None:
+            return []
+        return [(values["user_id"], 0.0, values["debit"] or 0.0)]
+
+    amount = values["amount"] or 0.0
+    sender_id, receiver_id = values["sender_id"], values["receiver_id"]
+    contributions = []
+    if receiver_id is not None:
+        contributions.append((receiver_id, amount, 0.0))
+    if sender_id is not None and sender_id != receiver_id:
+        contributions.append((sender_id, 0.0, amount))
+    return contributions
+
+
+def apply_balance_deltas(connection, deltas):
+    """
+    Moves the ledger rows by {user_id: [income, expense]} using the given connection,
+    so the change commits (or rolls back) together with the rows that caused it.
+    Users without a ledger row yet are seeded from their raw rows instead.
+    """
+    table = UserBalance.__table__
+    for user_id, (income, expense) in deltas.items():
+        if not income and not expense:
+            continue
+        statement = (
+            update(table)
+            .where(table.c.user_id == user_id)
+            .values(
+                total_income=table.c.total_income + income,
+                total_expense=table.c.total_expense + expense,
+                updated_at=datetime.utcnow()
+            )
+        )
+        if connection.execute(statement).rowcount == 0:
+            # Raw rows are already flushed here, so they include this change.
+            # A concurrent seed could not see them, so on a conflict only the delta is applied.
+            insert_or_update(
+                connection,
+                _insert_statement(user_id, *compute_totals_from_rows(connection, user_id)),
+                lambda statement=statement: connection.execute(statement)
+            )
+
+
+def apply_inserted_rows(connection, model, rows):
+    """
+    Ledger update for rows written with a Core INSERT (which bypasses the flush
+    hook). `rows` are the inserted parameter dicts; call on the same connection,
+    after the INSERT.
+    """
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    keys = _TRACKED[model]
+    for row in rows:
+        for user_id, income, expense in _contributions(model, {key: row.get(key) for key in keys}):
+            deltas[user_id][0] += income
+            deltas[user_id][1] += expense
+    apply_balance_deltas(connection, deltas)
+
+
+def _collect_flush_deltas(session):
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    rebuild = set()
+
+    def add(contributions, sign):
+        for user_id, income, expense in contributions:
+            deltas[user_id][0] += sign * income
+            deltas[user_id][1] += sign * expense
+
+    for model, before, after in iter_flush_changes(session, _TRACKED):
+        if before is UNKNOWN:
+            # Previous values were never loaded; recount these users from scratch.
+            if after is not None:
+                rebuild.update(user_id for user_id, _, _ in _contributions(model, after))
+            continue
+        if before is not None:
+            add(_contributions(model, before), -1)
+        if after is not None:
+            add(_contributions(model, after), 1)
+
+    return deltas, rebuild
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_balances_after_flush(session, flush_context):
+    deltas, rebuild = _collect_flush_deltas(session)
+    if not deltas and not rebuild:
+        return
+    connection = session.connection()
+    apply_balance_deltas(connection, {k: v for k, v in deltas.items() if k not in rebuild})
+    for user_id in rebuild:
+        _store_totals(connection, user_id, *compute_totals_from_rows(connection, user_id))
+
+
+
+# ================= TRANSFERS =================
+
+def ensure_ledger_rows(connection, user_ids):
+    """Seeds missing ledger rows from the raw tables so they can be locked and updated."""
+    table = UserBalance.__table__
+    existing = set(connection.execute(select(table.c.user_id).where(table.c.user_id.in_(user_ids))).scalars())
+    for user_id in sorted(set(user_ids) - existing):
+        _insert_totals(connection, user_id, *compute_totals_from_rows(connection, user_id))
+
+
+def move_funds(connection, sender_id: int, receiver_id: int, amount: float) -> bool:
+    """
+    Debits the sender and credits the receiver for a transfer between two users.
+    Both ledger rows are updated in ascending user_id order, so two opposite
+    transfers lock them in the same order and cannot deadlock each other.
+    The debit is a conditional UPDATE (balance >= amount), atomic under the
+    row lock. Returns False if the balance does not cover it; the receiver may
+    already be credited by then, so the caller must roll back.
+    """
+    table = UserBalance.__table__
+    now = datetime.utcnow()
+    for user_id in sorted((sender_id, receiver_id)):
+        if user_id == sender_id:
+            result = connection.execute(
+                update(table)
+                .where(table.c.user_id == sender_id, table.c.total_income - table.c.total_expense >= amount)
+                .values(total_expense=table.c.total_expense + amount, updated_at=now)
+            )
+            if result.rowcount == 0:
+                return False
+        else:
+            connection.execute(
+                update(table)
+                .where(table.c.user_id == receiver_id)
+                .values(total_income=table.c.total_income + amount, updated_at=now)
+            )
+    return True
+
+# ================= READS =================
+
+def compute_totals_from_rows(connection, user_id: int):
+    """Slow path: (total_income, total_expense) straight from expenses/transfers."""
+    total_income = connection.execute(
+        select(func.sum(Transfer.amount)).where(Transfer.receiver_id == user_id)
+    ).scalar() or 0.0
+    total_sent = connection.execute(
+        select(func.sum(Transfer.amount)).where(Transfer.sender_id == user_id, Transfer.receiver_id != user_id)
+    ).scalar() or 0.0
+    total_expense = connection.execute(
+        select(func.sum(Expense.debit)).where(Expense.user_id == user_id)
+    ).scalar() or 0.0
+    return total_income, total_expense + total_sent
+
+
+def get_balance_totals(db: Session, user_id: int):
+    """
+    Returns (total_income, total_expense) for the user from the ledger (single PK lookup).
+    Users that never had a transaction have no row yet and fall back to the raw tables.
+    """
+    row = db.execute(
+        select(UserBalance.total_income, UserBalance.total_expense).where(UserBalance.user_id == user_id)
+    ).first()
+    if row is None:
+        return compute_totals_from_rows(db, user_id)
+    return row.total_income, row.total_expense
+
+
+def get_balance(db: Session, user_id: int) -> float:
+    total_income, total_expense = get_balance_totals(db, user_id)
+    return total_income - total_expense
+
+
+async def get_balance_async(db: AsyncSession, user_id: int) -> float:
+    return await db.run_sync(get_balance, user_id)
+
+
+# ================= RECONCILIATION =================
+
+def _store_totals(connection, user_id, total_income, total_expense):
+    table = UserBalance.__table__
+    statement = (
+        update(table)
+        .where(table.c.user_id == user_id)
+        .values(total_income=total_income, total_expense=total_expense, updated_at=datetime.utcnow())
+    )
+    if connection.execute(statement).rowcount == 0:
+        insert_or_update(
+            connection,
+            _insert_statement(user_id, total_income, total_expense),
+            lambda: connection.execute(statement)
+        )
+
+
+def _insert_statement(user_id, total_income, total_expense):
+    return insert(UserBalance.__table__).values(
+        user_id=user_id,
+        total_income=total_income,
+        total_expense=total_expense,
+        updated_at=datetime.utcnow()
+    )
+
+
+def _insert_totals(connection, user_id, total_income, total_expense):
+    connection.execute(_insert_statement(user_id, total_income, total_expense))
+
+
+def compute_all_totals(db: Session):
+    """{user_id: (total_income, total_expense)} for every user, using two grouped scans."""
+    income = dict(db.execute(
+        select(Transfer.receiver_id, func.sum(Transfer.amount)).group_by(Transfer.receiver_id)
+    ).all())
+    # Money sent to another user counts as spent, next to the expense debits
+    outgoing = union_all(
+        select(Expense.user_id.label("user_id"), Expense.debit.label("amount")),
+        select(Transfer.sender_id.label("user_id"), Transfer.amount.label("amount"))
+        .where(Transfer.sender_id != Transfer.receiver_id)
+    ).subquery()
+    expense = dict(db.execute(
+        select(outgoing.c.user_id, func.sum(outgoing.c.amount)).group_by(outgoing.c.user_id)
+    ).all())
+
+    user_ids = db.execute(select(User.id)).scalars().all()
+    return {uid: (income.get(uid) or 0.0, expense.get(uid) or 0.0) for uid in user_ids}
+
+
+def reconcile_balances(db: Session, apply: bool = True, tolerance: float = 0.005):
+    """
+    Rebuilds the ledger from raw rows and returns the rows that had drifted:
+    [{"user_id", "stored_income", "stored_expense", "actual_income", "actual_expense"}].
+    With apply=False nothing is written (report only).
+    """
+    stored = {
+        row.user_id: (row.total_income, row.total_expense)
+        for row in db.execute(select(UserBalance.user_id, UserBalance.total_income, UserBalance.total_expense))
+    }
+
+    drift = []
+    for user_id, (actual_income, actual_expense) in compute_all_totals(db).items():
+        # A missing row only matters once the user has any activity.
+        stored_income, stored_expense = stored.get(user_id, (None, None))
+        if (
+            abs((stored_income or 0.0) - actual_income) <= tolerance
+            and abs((stored_expense or 0.0) - actual_expense) <= tolerance
+        ):
+            continue
+        drift.append({
+            "user_id": user_id,
+            "stored_income": stored_income,
+            "stored_expense": stored_expense,
+            "actual_income": actual_income,
+            "actual_expense": actual_expense
+        })
+        if apply:
+            _store_totals(db.connection(), user_id, actual_income, actual_expense)
+
+    if apply:
+        db.commit()
+    return drift
@@ -0,0 +1,70 @@
+from datetime import timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# ================= BULK REQUEST RESULTS =================
+# Shared by the /bulk endpoints: every item gets a result in request order
+# (per operation), valid items are flushed in one transaction, and with
+# atomic=True a single failure rolls the whole request back instead.
+# A constraint the checks could not see (e.g. a concurrent request taking
+# the same name) fails the flush as a whole: it is rolled back and every
+# item that was going to be applied is reported as failed.
+
+OK = "ok"
+ERROR = "error"
+SKIPPED = "skipped"
+
+CONFLICT_ERROR = "Conflicting change in the database; nothing in this request was applied"
+
+
+def naive_utc(value):
+    """Client timestamps may carry an offset; stored timestamps are naive UTC."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class BulkResults:
+    def __init__(self):
+        self.items = []
+        self._created = []
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for item in self.items if item["status"] == ERROR)
+
+    def ok(self, op: str, index: int, item_id: int = None, created=None):
+        """`created`: a new ORM object whose id is only known after the flush."""
+        item = {"op": op, "index": index, "status": OK, "id": item_id, "error": None}
+        self.items.append(item)
+        if created is not None:
+            self._created.append((item, created))
+
+    def fail(self, op: str, index: int, error: str, item_id: int = None):
+        self.items.append({"op": op, "index": index, "status": ERROR, "id": item_id, "error": error})
+
+    def commit(self, db: Session, atomic: bool = False):
+        """Writes the pending changes in `db` (or discards them) and returns the report."""
+        failed = self.failed
+        if atomic and failed:
+            db.rollback()
+            for item in self.items:
+                if item["status"] == OK:
+                    item["status"] = SKIPPED
+            return {"applied": 0, "failed": failed, "results": self.items}
+
+        try:
+            db.flush()
+            for item, obj in self._created:
+                item["id"] = obj.id
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            for item in self.items:
+                if item["status"] == OK:
+                    item["status"] = ERROR
+                    item["error"] = CONFLICT_ERROR
+            for item, _ in self._created:
+                item["id"] = None
+            return {"applied": 0, "failed": len(self.items), "results": self.items}
+        return {"applied": len(self.items) - failed, "failed": failed, "results": self.items}
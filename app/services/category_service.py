@@ -1,6 +1,12 @@
-from sqlalchemy.orm import Session
+import threading
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import schemas
-from app.models import Category
+from app.core.config import settings
+from app.models import Category, User, Role
+from app.services.bulk_service import BulkResults
 
 # --- CREATE ---
 def create_category(db: Session, category: schemas.CategoryCreate, user_id: int):
@@ -13,6 +19,7 @@ def create_category(db: Session, category: schemas.CategoryCreate, user_id: int)
     
     db.add(db_category)
     db.commit()
+    invalidate_user_categories(user_id)
     db.refresh(db_category)
     return db_category
 
@@ -37,6 +44,7 @@ def update_category(db: Session, category_id: int, category_update: schemas.Cate
                 setattr(db_category, field, value)
         
         db.commit()
+        invalidate_user_categories(user_id)
         db.refresh(db_category)
         
     return db_category
@@ -48,5 +56,170 @@ def delete_category(db: Session, category_id: int, user_id: int):
     if db_category:
         db.delete(db_category)
         db.commit()
+        invalidate_user_categories(user_id)
         
-    return db_category
\ No newline at end of file
+    return db_category
+
+
+# --- BULK ---
+def bulk_apply_categories(db: Session, user_id: int, request: schemas.CategoryBulkRequest):
+    """
+    Creates/renames/deletes the user's own categories in one transaction.
+    Ownership is checked with one IN query, name clashes with one more.
+    Returns {"applied", "failed", "results": [...]} like the expense bulk endpoint.
+    """
+    results = BulkResults()
+
+    target_ids = {item.id for item in request.update} | set(request.delete)
+    owned = {}
+    if target_ids:
+        stmt = select(Category).where(Category.id.in_(target_ids), Category.user_id == user_id)
+        if request.delete:
+            # Deleting detaches the category's expenses; load them with it instead of one query per category
+            stmt = stmt.options(selectinload(Category.expenses))
+        owned = {c.id: c for c in db.scalars(stmt)}
+
+    names = [item.name.strip() for item in request.create] + [item.name.strip() for item in request.update]
+    taken = {}
+    if names:
+        taken = dict(db.execute(
+            select(Category.name, Category.id).where(Category.user_id == user_id, Category.name.in_(names))
+        ).all())
+
+    def claim_name(name, category_id=None):
+        """False if another category of the user (existing or earlier in this request) has it."""
+        holder = taken.get(name)
+        if holder is not None and holder != category_id:
+            return False
+        taken[name] = category_id if category_id is not None else 0
+        return True
+
+    new_categories = []
+    for index, item in enumerate(request.create):
+        name = item.name.strip()
+        if not claim_name(name):
+            results.fail("create", index, f"Category '{name}' already exists")
+            continue
+        db_category = Category(name=name, user_id=user_id)
+        new_categories.append(db_category)
+        results.ok("create", index, created=db_category)
+
+    seen = set()
+    for index, item in enumerate(request.update):
+        db_category = owned.get(item.id)
+        name = item.name.strip()
+        if db_category is None:
+            results.fail("update", index, "Category not found", item.id)
+        elif item.id in seen:
+            results.fail("update", index, "Category appears more than once in this request", item.id)
+        elif not claim_name(name, item.id):
+            results.fail("update", index, f"Category '{name}' already exists", item.id)
+        else:
+            seen.add(item.id)
+            db_category.name = name
+            results.ok("update", index, item.id)
+
+    for index, category_id in enumerate(request.delete):
+        db_category = owned.get(category_id)
+        if db_category is None:
+            results.fail("delete", index, "Category not found", category_id)
+        elif category_id in seen:
+            results.fail("delete", index, "Category appears more than once in this request", category_id)
+        else:
+            seen.add(category_id)
+            db.delete(db_category)
+            results.ok("delete", index, category_id)
+
+    db.add_all(new_categories)
+    report = results.commit(db, request.atomic)
+    if report["applied"]:
+        invalidate_user_categories(user_id)
+    return report
+
+# ================= MERGED CATEGORY LIST (CACHED) =================
+# Category dropdowns render on almost every page: public (admin-owned)
+# categories first, the user's own ones override on the same name.
+# Both halves are cached in-process -- personal lists per user, public ones
+# in a single shared entry -- and dropped right after any write commits.
+# The TTL bounds staleness across workers, which each hold their own copy.
+
+_PUBLIC = "public"
+
+_cache_lock = threading.Lock()
+_personal_cache = TTLCache(maxsize=settings.category_cache_size, ttl=settings.category_cache_ttl)
+_public_cache = TTLCache(maxsize=1, ttl=settings.category_cache_ttl)
+# Bumped by every invalidation; a read that started before it must not store its result
+_generation = 0
+
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def _category_dicts(db: Session, stmt):
+    return [
+        {"id": row.id, "name": row.name, "user_id": row.user_id}
+        for row in db.execute(stmt.order_by(Category.id))
+    ]
+
+
+def _cached(db: Session, cache, key, stmt):
+    with _cache_lock:
+        value = cache.get(key)
+        generation = _generation
+        cache_stats["hits" if value is not None else "misses"] += 1
+    if value is not None:
+        return value
+
+    value = _category_dicts(db, stmt)
+    with _cache_lock:
+        if generation == _generation:
+            cache[key] = value
+    return value
+
+
+def get_public_categories(db: Session):
+    """Categories owned by admins, visible to everyone."""
+    stmt = select(Category.id, Category.name, Category.user_id)\
+        .join(User, Category.user_id == User.id)\
+        .join(Role)\
+        .where(Role.name == "admin")
+    return _cached(db, _public_cache, _PUBLIC, stmt)
+
+
+def get_personal_categories(db: Session, user_id: int):
+    stmt = select(Category.id, Category.name, Category.user_id).where(Category.user_id == user_id)
+    return _cached(db, _personal_cache, user_id, stmt)
+
+
+def get_merged_categories(db: Session, user_id: int):
+    """
+    Public + personal categories as dicts ({"id", "name", "user_id"}),
+    merged by name. Served from the cache, so usually zero queries.
+    """
+    merged = {c["name"]: c for c in get_public_categories(db)}
+    for c in get_personal_categories(db, user_id):
+        merged[c["name"]] = c
+    return list(merged.values())
+
+
+async def get_merged_categories_async(db: AsyncSession, user_id: int):
+    return await db.run_sync(get_merged_categories, user_id)
+
+
+def invalidate_user_categories(user_id: int):
+    """
+    Call after committing a category write owned by user_id. The public entry
+    goes too: the owner may be an admin, and rebuilding it is one query.
+    """
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _personal_cache.pop(user_id, None)
+        _public_cache.clear()
+
+
+def invalidate_public_categories():
+    """Call after promoting/demoting a user (their categories change visibility)."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _public_cache.clear()
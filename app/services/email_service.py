@@ -1,21 +1,49 @@
+import html
+import uuid
+import random
+import logging
 import smtplib
+import threading
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import os
-from dotenv import load_dotenv
+from sqlalchemy import select, update, func, or_
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import EmailOutbox
 
-# Environment variables load karein
-# load_dotenv()  # Commented out since config.py already loads .env
+# ================= EMAIL OUTBOX =================
+# Emails are never sent inside a request. enqueue_email() adds an outbox row
+# to the caller's session, so it commits (or rolls back) together with the
+# event it describes. OutboxWorker drains the table in the background over
+# one reused SMTP connection, retrying with exponential backoff and moving
+# rows that keep failing to status "dead".
 
-def send_password_change_email(to_email: str, username: str):
-    sender_email = os.getenv("GMAIL_EMAIL")
-    sender_password = os.getenv("GMAIL_APP_PASSWORD")
+logger = logging.getLogger("expense_tracker.email")
 
-    if not sender_email or not sender_password:
-        print("Error: Gmail credentials not found in .env file")
-        return
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
 
+
+def enqueue_email(db, to_email: str, subject: str, body: str):
+    """Adds the email to `db` (Session or AsyncSession); the caller commits."""
+    entry = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(entry)
+    return entry
+
+
+def send_password_change_email(db, to_email: str, username: str):
     subject = "Security Alert: Password Changed"
+    username = html.escape(username)
     body = f"""
     <html>
     <body>
@@ -27,20 +55,258 @@ def send_password_change_email(to_email: str, username: str):
     </body>
     </html>
     """
+    return enqueue_email(db, to_email, subject, body)
+
+
+def send_transfer_notification(db, sender_email: str, receiver_email: str, amount: float, description: str):
+    """Queues one email for each side of a transfer."""
+    # Both bodies carry text chosen by the sender; never let it become markup
+    to_text, from_text, description_text = (
+        html.escape(receiver_email), html.escape(sender_email), html.escape(description or "")
+    )
+    sent_body = f"""
+    <html>
+    <body>
+        <h2>Transfer sent</h2>
+        <p>You sent <b>{amount:.2f}</b> to {to_text}.</p>
+        <p>Description: {description_text}</p>
+        <br>
+        <p>Regards,<br>Tracker Team</p>
+    </body>
+    </html>
+    """
+    received_body = f"""
+    <html>
+    <body>
+        <h2>Transfer received</h2>
+        <p>You received <b>{amount:.2f}</b> from {from_text}.</p>
+        <p>Description: {description_text}</p>
+        <br>
+        <p>Regards,<br>Tracker Team</p>
+    </body>
+    </html>
+    """
+    return [
+        enqueue_email(db, sender_email, "Transfer sent", sent_body),
+        enqueue_email(db, receiver_email, "Transfer received", received_body),
+    ]
+
+
+# ================= SMTP CONNECTION =================
+
+class SMTPSender:
+    """One SMTP connection reused across messages; reconnects when the server drops it."""
+
+    def __init__(self, host=None, port=None, starttls=None, username=None, password=None, sender=None):
+        self.host = host or settings.smtp_host
+        self.port = port or settings.smtp_port
+        self.starttls = settings.smtp_starttls if starttls is None else starttls
+        # SMTP_USERNAME= (empty) disables AUTH, e.g. for a local aiosmtpd
+        if username is None:
+            username = settings.gmail_email if settings.smtp_username is None else settings.smtp_username
+        if password is None:
+            password = settings.gmail_app_password if settings.smtp_password is None else settings.smtp_password
+        self.username = username
+        self.password = password
+        self.sender = sender or settings.email_from or self.username
+        self._server = None
+        self.connects = 0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=settings.smtp_timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self._server = server
+        self.connects += 1
+
+    def send(self, to_email: str, subject: str, body: str):
+        message = MIMEMultipart()
+        message["From"] = self.sender
+        message["To"] = to_email
+        message["Subject"] = subject
+        message.attach(MIMEText(body, "html"))
+
+        if self._server is None:
+            self._connect()
+        try:
+            self._server.sendmail(self.sender, to_email, message.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # Idle connection closed by the server: reconnect once and retry
+            self._server = None
+            self._connect()
+            self._server.sendmail(self.sender, to_email, message.as_string())
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._server = None
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies (bad address, rejected content) will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500 and not isinstance(error, smtplib.SMTPAuthenticationError)
+    return False
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped."""
+    delay = min(settings.email_retry_base_seconds * 2 ** (attempts - 1), settings.email_retry_max_seconds)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+# ================= BACKGROUND WORKER =================
+
+class OutboxWorker:
+    """
+    Drains the outbox in batches. Safe to run in every app worker process:
+    a batch is claimed with a conditional UPDATE (status + next_attempt_at),
+    so two processes never send the same row, and a claim that is never
+    finished (crash) becomes due again when its lease runs out.
+    """
+
+    def __init__(self, session_factory, sender_factory=SMTPSender):
+        self.session_factory = session_factory
+        self.sender_factory = sender_factory
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.stats = {"sent": 0, "retried": 0, "dead": 0, "batches": 0}
+
+    def _claim_batch(self, db, batch_size: int):
+        now = datetime.utcnow()
+        due = or_(EmailOutbox.status == PENDING, EmailOutbox.status == SENDING)
+        ids = db.execute(
+            select(EmailOutbox.id)
+            .where(due, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return []
+
+        token = uuid.uuid4().hex
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), due, EmailOutbox.next_attempt_at <= now)
+            .values(
+                status=SENDING,
+                claim_token=token,
+                next_attempt_at=now + timedelta(seconds=settings.email_claim_lease_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return db.execute(
+            select(EmailOutbox).where(EmailOutbox.claim_token == token).order_by(EmailOutbox.id)
+        ).scalars().all()
+
+    def _finish(self, db, entry, error: Exception = None):
+        if error is None:
+            entry.status = SENT
+            entry.sent_at = datetime.utcnow()
+            entry.last_error = None
+            self.stats["sent"] += 1
+            logger.debug("Email %s sent", entry.id)
+            return
+
+        entry.attempts += 1
+        entry.last_error = f"{type(error).__name__}: {error}"[:2000]
+        if _is_permanent(error) or entry.attempts >= settings.email_max_attempts:
+            entry.status = DEAD
+            self.stats["dead"] += 1
+            logger.warning("Email %s dead-lettered after %s attempts: %s", entry.id, entry.attempts, entry.last_error)
+        else:
+            entry.status = PENDING
+            entry.next_attempt_at = datetime.utcnow() + retry_delay(entry.attempts)
+            self.stats["retried"] += 1
+
+    def run_once(self, batch_size: int = None) -> int:
+        """Sends one batch over a single SMTP connection. Returns rows processed."""
+        batch_size = batch_size or settings.email_batch_size
+        db = self.session_factory()
+        sender = self.sender_factory()
+        try:
+            batch = self._claim_batch(db, batch_size)
+            for entry in batch:
+                try:
+                    sender.send(entry.to_email, entry.subject, entry.body)
+                except (smtplib.SMTPException, OSError) as e:
+                    self._finish(db, entry, e)
+                    if not _is_permanent(e):
+                        # Start the next message on a fresh connection
+                        sender.close()
+                else:
+                    self._finish(db, entry)
+                db.commit()
+            if batch:
+                self.stats["batches"] += 1
+            return len(batch)
+        finally:
+            sender.close()
+            db.close()
+
+    def drain(self, batch_size: int = None) -> int:
+        """Runs batches until nothing is due. Returns rows processed."""
+        total = 0
+        while True:
+            processed = self.run_once(batch_size)
+            total += processed
+            if not processed:
+                return total
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception:
+                logger.exception("Email outbox worker error")
+                processed = 0
+            if not processed:
+                self._wake.wait(settings.email_poll_interval)
+                self._wake.clear()
+
+    def wake(self):
+        """Skip the rest of the poll interval (call after committing new emails)."""
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+outbox_worker = OutboxWorker(SessionLocal)
+
+
+def outbox_counts(db):
+    """{status: rows} for the outbox."""
+    return dict(db.execute(select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status)).all())
+
 
-    message = MIMEMultipart()
-    message["From"] = sender_email
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.attach(MIMEText(body, "html"))
-
-    try:
-        # Connect to Gmail SMTP Server
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, to_email, message.as_string())
-        server.quit()
-        print(f"Email sent successfully to {to_email}")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
\ No newline at end of file
+def requeue_dead(db) -> int:
+    """Moves dead-lettered emails back to pending with a fresh attempt budget."""
+    result = db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == DEAD)
+        .values(status=PENDING, attempts=0, next_attempt_at=datetime.utcnow(), claim_token=None)
+    )
+    db.commit()
+    return result.rowcount
@@ -1,7 +1,10 @@
+from sqlalchemy import select, or_
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app import schemas
-from app.models import expense as expense_model, Category, User, Expense
+from app.models import expense as expense_model, Category, User, Role, Expense
+from app.services.bulk_service import BulkResults, naive_utc
+from app.services.balance_service import get_balance
 
 
 
@@ -19,31 +22,26 @@ def create_debit_expense(db: Session, expense: schemas.DebitCreate, user_id: int
 
     # 3. BUSINESS LOGIC: Check Balance
     # If the user creates a 'debit' (spending), they must have enough money.
-    if user.balance < expense.debit:
+    # The balance is the ledger (same as the dashboard); the expense moves it on flush.
+    balance = get_balance(db, user_id)
+    if balance < expense.debit:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient balance. You have {user.balance}, but tried to spend {expense.debit}."
+            detail=f"Insufficient balance. You have {balance:.2f}, but tried to spend {expense.debit}."
         )
 
-    # 4. Deduct Balance
-    # We subtract the expense amount from the user's wallet
-    user.balance = user.balance - expense.debit
-
-    # 5. Create the Expense Record
+    # 4. Create the Expense Record
     db_expense = Expense(
         description=expense.description,
         debit=expense.debit,
-        credit=0, # Debit means no credit
         user_id=user_id,
         category_id=expense.category_id
     )
 
-    # 6. Save Changes
+    # 5. Save Changes
     db.add(db_expense)
-    db.add(user) # IMPORTANT: We must add 'user' to save the new balance
     db.commit()
     db.refresh(db_expense)
-    db.refresh(user)
 
     return db_expense
 
@@ -97,3 +95,91 @@ def delete_expense(db: Session, expense_id: int, user_id: int):
         db.delete(db_expense)
         db.commit()
     return db_expense
+
+
+# ================= BULK =================
+# One request, one transaction: ownership of every referenced category and
+# expense is checked with one IN query each, then the inserts/updates/deletes
+# go through a single flush, which batches them per statement and keeps the
+# balance ledger and monthly rollups in sync via the flush hooks.
+
+def _usable_category_ids(db: Session, user_id: int, category_ids):
+    """The subset of category_ids the user may file expenses under (own or public)."""
+    if not category_ids:
+        return set()
+    return set(db.scalars(
+        select(Category.id)
+        .outerjoin(User, User.id == Category.user_id)
+        .outerjoin(Role, Role.id == User.role_id)
+        .where(Category.id.in_(category_ids), or_(Category.user_id == user_id, Role.name == "admin"))
+    ))
+
+
+def bulk_apply_expenses(db: Session, user_id: int, request: schemas.ExpenseBulkRequest):
+    """Returns {"applied", "failed", "results": [{"op", "index", "status", "id", "error"}]}."""
+    results = BulkResults()
+
+    category_ids = {item.category_id for item in request.create if item.category_id}
+    category_ids |= {item.category_id for item in request.update if item.category_id and item.category_id > 0}
+    usable_categories = _usable_category_ids(db, user_id, category_ids)
+
+    target_ids = {item.id for item in request.update} | set(request.delete)
+    owned = {}
+    if target_ids:
+        owned = {e.id: e for e in db.scalars(
+            select(Expense).where(Expense.id.in_(target_ids), Expense.user_id == user_id)
+        )}
+
+    new_expenses = []
+    for index, item in enumerate(request.create):
+        if item.category_id and item.category_id not in usable_categories:
+            results.fail("create", index, f"Category with id {item.category_id} not found")
+            continue
+        db_expense = Expense(
+            description=item.description,
+            debit=item.debit,
+            category_id=item.category_id or None,
+            user_id=user_id
+        )
+        if item.created_at is not None:
+            db_expense.created_at = naive_utc(item.created_at)
+        new_expenses.append(db_expense)
+        results.ok("create", index, created=db_expense)
+
+    seen = set()
+    for index, item in enumerate(request.update):
+        db_expense = owned.get(item.id)
+        update_data = item.model_dump(exclude_unset=True, exclude={"id"})
+        category_id = update_data.get("category_id")
+        if db_expense is None:
+            results.fail("update", index, "Expense not found", item.id)
+        elif item.id in seen:
+            results.fail("update", index, "Expense appears more than once in this request", item.id)
+        elif category_id and category_id > 0 and category_id not in usable_categories:
+            results.fail("update", index, f"Category with id {category_id} not found", item.id)
+        else:
+            seen.add(item.id)
+            for field, value in update_data.items():
+                if field == "category_id":
+                    value = value if value and value > 0 else None
+                elif value is None:
+                    # Only category_id can be cleared; a null date would drop the row out of every report
+                    continue
+                elif field == "created_at":
+                    value = naive_utc(value)
+                setattr(db_expense, field, value)
+            results.ok("update", index, item.id)
+
+    for index, expense_id in enumerate(request.delete):
+        db_expense = owned.get(expense_id)
+        if db_expense is None:
+            results.fail("delete", index, "Expense not found", expense_id)
+        elif expense_id in seen:
+            results.fail("delete", index, "Expense appears more than once in this request", expense_id)
+        else:
+            seen.add(expense_id)
+            db.delete(db_expense)
+            results.ok("delete", index, expense_id)
+
+    db.add_all(new_expenses)
+    return results.commit(db, request.atomic)
@@ -0,0 +1,76 @@
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+
+# ================= FLUSH CHANGE TRACKING =================
+# Shared by the materialized tables (balance ledger, monthly rollups) that
+# listen to Session "after_flush" and move their counters by the delta of
+# each Expense/Transfer write.
+
+UNKNOWN = object()
+
+
+def _old_value(obj, key):
+    history = inspect(obj).attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    if history.added:
+        # Changed without the previous value ever being loaded
+        return UNKNOWN
+    return getattr(obj, key)
+
+
+def row_values(obj, keys, old=False):
+    """
+    dict of `keys` for obj, either as it is now or as it was before this flush.
+    Returns UNKNOWN when an old value is not available.
+    """
+    if not old:
+        return {key: getattr(obj, key) for key in keys}
+    values = {key: _old_value(obj, key) for key in keys}
+    if UNKNOWN in values.values():
+        return UNKNOWN
+    return values
+
+
+def iter_flush_changes(session, tracked):
+    """
+    Yields (model, before, after) for every tracked row touched by the flush.
+    `tracked` maps model class -> column names to capture.
+    before is None for inserts, after is None for deletes, and before may be UNKNOWN.
+    Must be called from an after_flush listener (history is still intact there).
+    """
+    for obj in session.new:
+        keys = tracked.get(type(obj))
+        if keys:
+            yield type(obj), None, row_values(obj, keys)
+
+    for obj in session.deleted:
+        keys = tracked.get(type(obj))
+        if keys and inspect(obj).has_identity:
+            yield type(obj), row_values(obj, keys, old=True), None
+
+    for obj in session.dirty:
+        keys = tracked.get(type(obj))
+        if keys and session.is_modified(obj):
+            yield type(obj), row_values(obj, keys, old=True), row_values(obj, keys)
+
+
+def insert_or_update(connection, insert_statement, update_again):
+    """
+    Seeds a counter row after an UPDATE matched nothing. Two transactions can
+    both get there for the same key; the INSERT runs in a savepoint so the one
+    that loses the race on the primary key rolls back only that statement and
+    applies its change with `update_again()` (the UPDATE, re-run) instead.
+    Re-raises if the row still is not there (e.g. a foreign key failure).
+    """
+    savepoint = connection.begin_nested()
+    try:
+        connection.execute(insert_statement)
+    except IntegrityError:
+        savepoint.rollback()
+        if update_again().rowcount == 0:
+            raise
+        return
+    savepoint.commit()
@@ -0,0 +1,309 @@
+import re
+import csv
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import Expense, Transfer, Category
+from app.services.balance_service import apply_inserted_rows as apply_balance_rows
+from app.services.rollup_service import apply_inserted_rows as apply_rollup_rows, report_timezone
+from app.services.category_service import get_merged_categories, invalidate_user_categories
+
+# ================= BANK STATEMENT IMPORT =================
+# Streams a CSV/OFX statement row by row (the file is never loaded whole),
+# validates each row, resolves category names through an in-memory map and
+# writes expenses / incomes with one executemany INSERT per table per chunk,
+# committing chunk by chunk. Negative amounts (or a debit column) become
+# expenses; positive amounts become income, stored the same way the
+# "Add income" form does it (a transfer from the user to themselves).
+# Statement history is imported as-is: no balance check per row.
+#
+# Core INSERTs bypass the ORM flush hooks, so the balance ledger and the
+# monthly rollups are moved explicitly in the same transaction as each chunk.
+
+CSV = "csv"
+OFX = "ofx"
+
+MAX_REPORTED_ERRORS = 1000
+
+_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y")
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+class ImportAborted(ImportRowError):
+    """The file cannot be read past `line`; rows before it are kept."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(message)
+        self.line = line
+
+
+def detect_format(filename: str) -> str:
+    return OFX if (filename or "").lower().endswith((".ofx", ".qfx")) else CSV
+
+
+# --- Parsing (generators: one dict per statement line) ---
+
+def iter_csv_rows(text_stream):
+    """
+    Yields (line_no, raw dict) from a CSV with a header row. Recognised columns
+    (case-insensitive): date, description, amount (signed) or debit/credit,
+    category, type (expense/income).
+    """
+    reader = csv.DictReader(text_stream)
+    try:
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        for row in reader:
+            yield reader.line_num, row
+    except csv.Error as e:
+        # e.g. a field over csv.field_size_limit(); the reader cannot resume after it.
+        # The underlying reader has already counted the failing line.
+        raise ImportAborted(reader.reader.line_num, f"unreadable CSV: {e}")
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def iter_ofx_rows(text_stream, chunk_size: int = 64 * 1024):
+    """
+    Yields (transaction_no, raw dict) for each <STMTTRN> of an OFX file, reading
+    it in chunks. Handles both the SGML (OFX 1.x, unclosed leaf tags) and the
+    XML (OFX 2.x) flavour.
+    """
+    buffer = ""
+    current = None
+    number = 0
+    while True:
+        chunk = text_stream.read(chunk_size)
+        buffer += chunk or ""
+        # Only parse up to the last complete tag; keep the tail for the next chunk
+        cut = len(buffer) if not chunk else buffer.rfind("<")
+        if cut <= 0 and chunk:
+            continue
+        for closing, tag, value in _OFX_TAG.findall(buffer[:cut]):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    number += 1
+                    yield number, current
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+        buffer = buffer[cut:]
+        if not chunk:
+            return
+
+
+def _parse_date(value: str, tz):
+    value = (value or "").strip()
+    if not value:
+        raise ImportRowError("missing date")
+    # OFX: YYYYMMDD[HHMMSS[.XXX]][[offset:TZ]]
+    ofx = re.match(r"^(\d{8})(\d{6})?", value)
+    if ofx:
+        local = datetime.strptime(ofx.group(1) + (ofx.group(2) or "000000"), "%Y%m%d%H%M%S")
+    else:
+        for fmt in _DATE_FORMATS:
+            try:
+                local = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ImportRowError(f"unrecognised date '{value}'")
+    # Statement dates are local to the reporting timezone; stored as naive UTC
+    return local.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# 1,234.56 / 1,234,567: commas are thousands separators only next to a decimal
+# point or in more than one group; "12,50" or "1,250" could mean either
+_GROUPED = re.compile(r"^[+-]?\d{1,3}(?:,\d{3})+\.\d*$|^[+-]?\d{1,3}(?:,\d{3}){2,}$")
+
+
+def _parse_amount(value, field: str, decimal_comma: bool = False):
+    """
+    decimal_comma: a lone comma is the decimal separator (OFX allows either
+    "." or ","; it has no thousands separators). Otherwise commas must be
+    unambiguous thousands separators.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    if "," in value:
+        if decimal_comma and value.count(",") == 1 and "." not in value:
+            value = value.replace(",", ".")
+        elif not decimal_comma and _GROUPED.match(value):
+            value = value.replace(",", "")
+        else:
+            raise ImportRowError(f"ambiguous {field} '{value}' (use '.' as the decimal separator)")
+    try:
+        return float(value)
+    except ValueError:
+        raise ImportRowError(f"invalid {field} '{value}'")
+
+
+def normalize_csv_row(raw: dict, tz):
+    """Returns (kind, description, amount, category_name, created_at)."""
+    amount = _parse_amount(raw.get("amount"), "amount")
+    if amount is None:
+        debit = _parse_amount(raw.get("debit"), "debit") or 0.0
+        credit = _parse_amount(raw.get("credit"), "credit") or 0.0
+        if not debit and not credit:
+            raise ImportRowError("missing amount")
+        amount = credit - debit
+
+    kind = (raw.get("type") or "").strip().lower()
+    if kind not in ("", "expense", "income"):
+        raise ImportRowError(f"unknown type '{kind}'")
+    if not kind:
+        kind = "expense" if amount < 0 else "income"
+    if amount == 0:
+        raise ImportRowError("zero amount")
+
+    description = (raw.get("description") or raw.get("memo") or "").strip() or "Imported"
+    return kind, description[:255], abs(amount), (raw.get("category") or "").strip(), _parse_date(raw.get("date"), tz)
+
+
+def normalize_ofx_row(raw: dict, tz):
+    amount = _parse_amount(raw.get("TRNAMT"), "TRNAMT", decimal_comma=True)
+    if not amount:
+        raise ImportRowError("missing or zero TRNAMT")
+    description = raw.get("NAME") or raw.get("MEMO") or "Imported"
+    if raw.get("NAME") and raw.get("MEMO"):
+        description = f"{raw['NAME']} - {raw['MEMO']}"
+    kind = "expense" if amount < 0 else "income"
+    return kind, description[:255], abs(amount), "", _parse_date(raw.get("DTPOSTED"), tz)
+
+
+# --- Writing ---
+
+class _CategoryMap:
+    """Lower-cased name -> id over the user's visible categories, loaded once."""
+
+    def __init__(self, db: Session, user_id: int, create_missing: bool):
+        self.db = db
+        self.user_id = user_id
+        self.create_missing = create_missing
+        self.created = 0
+        self.reload()
+
+    def reload(self):
+        if self.created:
+            invalidate_user_categories(self.user_id)
+        self.ids = {c["name"].strip().lower(): c["id"] for c in get_merged_categories(self.db, self.user_id)}
+
+    def resolve(self, name: str):
+        if not name:
+            return None
+        key = name.lower()
+        if key in self.ids:
+            return self.ids[key]
+        if not self.create_missing:
+            raise ImportRowError(f"unknown category '{name}'")
+        category = Category(name=name[:100], user_id=self.user_id)
+        self.db.add(category)
+        self.db.flush()
+        self.ids[key] = category.id
+        self.created += 1
+        return category.id
+
+
+def _write_chunk(db: Session, expenses, incomes):
+    connection = db.connection()
+    if expenses:
+        connection.execute(insert(Expense.__table__), expenses)
+        apply_balance_rows(connection, Expense, expenses)
+        apply_rollup_rows(connection, Expense, expenses)
+    if incomes:
+        connection.execute(insert(Transfer.__table__), incomes)
+        apply_balance_rows(connection, Transfer, incomes)
+        apply_rollup_rows(connection, Transfer, incomes)
+    db.commit()
+
+
+def import_statement(
+    db: Session,
+    user_id: int,
+    text_stream,
+    file_format: str = CSV,
+    chunk_size: int = 1000,
+    create_categories: bool = False
+):
+    """
+    Imports a statement for user_id. Returns a report:
+    {"imported", "expenses", "incomes", "failed", "categories_created", "errors": [{"line", "error"}]}
+    Only the first MAX_REPORTED_ERRORS errors are listed; "failed" counts all of them.
+    A CSV line the reader cannot parse ends the import there, as an error for that line.
+    """
+    tz = report_timezone()
+    rows = iter_ofx_rows(text_stream) if file_format == OFX else iter_csv_rows(text_stream)
+    normalize = normalize_ofx_row if file_format == OFX else normalize_csv_row
+    categories = _CategoryMap(db, user_id, create_categories)
+
+    report = {"imported": 0, "expenses": 0, "incomes": 0, "failed": 0, "categories_created": 0, "errors": []}
+    expenses, incomes, lines = [], [], []
+
+    def fail(line, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line, "error": message})
+
+    def flush():
+        if not expenses and not incomes:
+            return
+        try:
+            _write_chunk(db, expenses, incomes)
+        except Exception as e:
+            db.rollback()
+            # Categories created in this chunk were rolled back with it
+            categories.reload()
+            for line in lines:
+                fail(line, f"database error: {e.__class__.__name__}")
+        else:
+            report["imported"] += len(expenses) + len(incomes)
+            report["expenses"] += len(expenses)
+            report["incomes"] += len(incomes)
+        expenses.clear()
+        incomes.clear()
+        lines.clear()
+
+    try:
+        for line, raw in rows:
+            try:
+                kind, description, amount, category_name, created_at = normalize(raw, tz)
+                if kind == "expense":
+                    expenses.append({
+                        "user_id": user_id,
+                        "description": description,
+                        "debit": amount,
+                        "category_id": categories.resolve(category_name),
+                        "created_at": created_at
+                    })
+                else:
+                    incomes.append({
+                        "sender_id": user_id,
+                        "receiver_id": user_id,
+                        "amount": amount,
+                        "description": description,
+                        "created_at": created_at
+                    })
+                lines.append(line)
+            except ImportRowError as e:
+                fail(line, str(e))
+                continue
+
+            if len(lines) >= chunk_size:
+                flush()
+    except ImportAborted as e:
+        fail(e.line, str(e))
+    flush()
+
+    report["categories_created"] = categories.created
+    if categories.created:
+        invalidate_user_categories(user_id)
+    return report
@@ -0,0 +1,98 @@
+from app.core.metrics import registry, COUNTER, GAUGE
+from app.core.cache import response_cache_stats
+from app.logging_config import logging_stats
+from app.core.security import password_hasher, token_cache_stats
+from app.db.pool import pool_metrics
+from app.services.user_cache import cache_stats as user_cache_stats
+from app.services.category_service import cache_stats as category_cache_stats
+from app.services.account_directory import directory_stats
+from app.services.email_service import outbox_worker, outbox_counts, PENDING, SENDING, SENT, DEAD
+
+# ================= /metrics COLLECTORS =================
+# The pools, caches and queues already keep their own counters (the ones
+# behind /admin/pool-metrics and /admin/cache-stats); they are copied into
+# the registry right before each snapshot rather than counted twice.
+
+registry.declare("db_pool_connections", GAUGE, "Pool connections by state", ("engine", "state"))
+registry.declare("db_pool_checkouts_total", COUNTER, "Connections handed out by the pool", ("engine",))
+registry.declare("db_pool_timeouts_total", COUNTER, "Checkouts that timed out waiting for a connection", ("engine",))
+registry.declare("db_pool_connects_total", COUNTER, "New DB connections opened", ("engine",))
+registry.declare("db_pool_wait_seconds_total", COUNTER, "Time spent waiting for a connection", ("engine",))
+
+registry.declare("cache_requests_total", COUNTER, "Cache lookups by cache and result", ("cache", "result"))
+
+registry.declare("password_hash_queue_depth", GAUGE, "bcrypt jobs waiting for a hashing thread")
+registry.declare("password_hash_running", GAUGE, "bcrypt jobs running")
+registry.declare("password_hash_rejected_total", COUNTER, "bcrypt jobs shed because the queue was full")
+registry.declare("email_outbox_processed_total", COUNTER, "Outbox emails handled by this worker's sender", ("result",))
+
+registry.declare("log_queue_depth", GAUGE, "Log records waiting for the writer thread")
+registry.declare("log_records_dropped_total", COUNTER, "Log records dropped because the queue was full")
+registry.declare("log_records_sampled_out_total", COUNTER, "DEBUG records skipped by sampling")
+
+_POOL_STATES = ("size", "checked_out", "checked_in", "overflow")
+
+
+def _caches():
+    caches = {
+        "users": user_cache_stats,
+        "categories": category_cache_stats,
+        "tokens": token_cache_stats,
+        "account_directory": directory_stats,
+    }
+    for namespace, counters in response_cache_stats().items():
+        caches[f"response:{namespace}"] = counters
+    return caches
+
+
+def collect_app_metrics(registry):
+    for engine, stats in pool_metrics.snapshot().items():
+        for state in _POOL_STATES:
+            if state in stats:
+                registry.set("db_pool_connections", (engine, state), stats[state])
+        registry.set("db_pool_checkouts_total", (engine,), stats["checkouts"])
+        registry.set("db_pool_timeouts_total", (engine,), stats["timeouts"])
+        registry.set("db_pool_connects_total", (engine,), stats["connects"])
+        registry.set("db_pool_wait_seconds_total", (engine,), stats["wait_ms_total"] / 1000)
+
+    for cache, counters in _caches().items():
+        registry.set("cache_requests_total", (cache, "hit"), counters["hits"])
+        registry.set("cache_requests_total", (cache, "miss"), counters["misses"])
+
+    hashing = password_hasher.snapshot()
+    registry.set("password_hash_queue_depth", (), hashing["queued"])
+    registry.set("password_hash_running", (), hashing["running"])
+    registry.set("password_hash_rejected_total", (), hashing["rejected"])
+    for result in ("sent", "retried", "dead"):
+        registry.set("email_outbox_processed_total", (result,), outbox_worker.stats[result])
+
+    logs = logging_stats()
+    registry.set("log_queue_depth", (), logs["queued"])
+    registry.set("log_records_dropped_total", (), logs["dropped"])
+    registry.set("log_records_sampled_out_total", (), logs["sampled_out"])
+
+
+def hit_ratios(merged):
+    """cache_hit_ratio gauge from the merged (all workers) lookup counters."""
+    totals = {}
+    for (cache, result), value in merged.get("cache_requests_total", {}).get("series", {}).items():
+        totals.setdefault(cache, {"hit": 0, "miss": 0})[result] = value
+    return {
+        "type": GAUGE, "help": "Cache hits / lookups since the workers started", "labels": ["cache"], "buckets": None,
+        "series": {
+            (cache,): counts["hit"] / (counts["hit"] + counts["miss"])
+            for cache, counts in totals.items() if counts["hit"] + counts["miss"]
+        },
+    }
+
+
+def outbox_depth(db):
+    """Outbox rows by status; read from the DB at scrape time, so it is not summed per worker."""
+    rows = {PENDING: 0, SENDING: 0, SENT: 0, DEAD: 0, **outbox_counts(db)}
+    return {
+        "type": GAUGE, "help": "Email outbox rows by status", "labels": ["status"], "buckets": None,
+        "series": {(status,): count for status, count in rows.items()},
+    }
+
+
+registry.add_collector(collect_app_metrics)
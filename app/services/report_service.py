@@ -1,7 +1,15 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, or_
-from datetime import datetime
-from app.models import Expense, Transfer, Category
+import io
+import csv
+import json
+import base64
+from datetime import date, datetime, time, timedelta
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, and_, true, select, union_all, literal, type_coerce, null, String, Float
+from app.models import Expense, Transfer, Category, User, UserBalance, MonthlyRollup
+from app.services.balance_service import get_balance_totals
+from app.services.rollup_service import current_month, get_month_totals, category_totals_query
+from app.services.category_service import get_merged_categories
 
 # ================= EXPENSE REPORTS =================
 
@@ -9,16 +17,8 @@ def get_monthly_expense_report(db: Session, user):
     """
     Calculates total expenses (debit) for the current month.
     """
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-
-    total = db.query(func.sum(Expense.debit)).filter(
-        Expense.user_id == user.id,
-        extract('month', Expense.created_at) == current_month,
-        extract('year', Expense.created_at) == current_year
-    ).scalar()
-
-    return total if total is not None else 0.0
+    expense_total, _ = get_month_totals(db, user.id, *current_month())
+    return expense_total
 
 def get_recent_expenses(db: Session, user, limit: int = 5):
     """
@@ -34,18 +34,10 @@ def get_recent_expenses(db: Session, user, limit: int = 5):
 def get_monthly_transfers(db: Session, user):
     """
     Calculates total Income for the current month.
-    Checks if user is Sender OR Receiver (P2P Logic).
+    Only transfers the user received count; sent ones are expenses.
     """
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-
-    total = db.query(func.sum(Transfer.amount)).filter(
-        or_(Transfer.sender_id == user.id, Transfer.receiver_id == user.id),
-        extract('month', Transfer.created_at) == current_month,
-        extract('year', Transfer.created_at) == current_year
-    ).scalar()
-
-    return total if total is not None else 0.0
+    _, received_total = get_month_totals(db, user.id, *current_month())
+    return received_total
 
 def get_recent_transfers(db: Session, user, limit: int = 5):
     """
@@ -140,12 +132,8 @@ def get_category_pie_data(db: Session, user):
     """
     Returns data for Pie Chart: Labels (Category Names) and Data (Total Amounts).
     """
-    # SQL Query: Join Expense and Category tables, Group by Category Name
-    results = db.query(Category.name, func.sum(Expense.debit))\
-        .join(Expense, Category.id == Expense.category_id)\
-        .filter(Expense.user_id == user.id)\
-        .group_by(Category.name)\
-        .all()
+    # Summed from the monthly rollups (one row per month/category, not per expense)
+    results = db.execute(category_totals_query(user.id)).all()
     
     labels = []
     data = []
@@ -180,4 +168,456 @@ def get_total_transaction_count(db: Session, user):
          or_(Transfer.sender_id == user.id, Transfer.receiver_id == user.id)
     ).scalar()
     
-    return e_count + t_count
\ No newline at end of file
+    return e_count + t_count
+
+# ================= DASHBOARD SNAPSHOT =================
+# The dashboard used to fire ~9 queries (monthly cards, recent lists, lifetime
+# sums, pie chart, two category lookups). Over a remote MySQL link the round
+# trips cost more than the queries, so everything is folded into two statements:
+#   1. numbers  -> (kind, label, amount) rows
+#   2. lists    -> (kind, id, text, amount, created_at, owner_id) rows
+# Categories are served by the category_service cache.
+
+def _dashboard_numbers_query(user, current_year: int, current_month: int):
+    no_label = type_coerce(null(), String)
+
+    month_totals = select(
+        literal("month_totals").label("kind"),
+        no_label.label("label"),
+        func.sum(MonthlyRollup.expense_total).label("amount"),
+        func.sum(MonthlyRollup.received_total).label("amount_2")
+    ).where(
+        MonthlyRollup.user_id == user.id,
+        MonthlyRollup.year == current_year,
+        MonthlyRollup.month == current_month
+    )
+
+    ledger = select(
+        literal("ledger"), no_label, UserBalance.total_income, UserBalance.total_expense
+    ).where(UserBalance.user_id == user.id)
+
+    pie = category_totals_query(user.id).subquery()
+    pie = select(literal("pie"), pie.c[0], pie.c[1], type_coerce(null(), Float))
+
+    return union_all(month_totals, ledger, pie)
+
+
+def _dashboard_lists_query(user, limit: int):
+    recent_expenses = select(
+        Expense.id, Expense.description, Expense.debit, Expense.created_at, Expense.user_id
+    ).where(Expense.user_id == user.id)\
+     .order_by(Expense.created_at.desc())\
+     .limit(limit).subquery()
+
+    recent_transfers = select(
+        Transfer.id, Transfer.description, Transfer.amount, Transfer.created_at, Transfer.receiver_id
+    ).where(or_(Transfer.sender_id == user.id, Transfer.receiver_id == user.id))\
+     .order_by(Transfer.created_at.desc())\
+     .limit(limit).subquery()
+
+    return union_all(
+        select(literal("expense").label("kind"), *[c for c in recent_expenses.c]),
+        select(literal("transfer"), *[c for c in recent_transfers.c])
+    )
+
+
+def get_dashboard_snapshot(db: Session, user, recent_limit: int = 5):
+    """
+    Everything the dashboard renders, fetched in two round trips (plus the cached categories).
+    Recent rows and categories come back as plain dicts (same keys the templates read).
+    """
+    snapshot = {
+        "monthly_expenses": 0.0,
+        "monthly_transfers": 0.0,
+        "total_income": None,
+        "total_expense": None,
+        "chart_labels": [],
+        "chart_data": [],
+        "recent_expenses": [],
+        "recent_transfers": [],
+    }
+
+    # --- Statement 1: numbers ---
+    for kind, label, amount, amount_2 in db.execute(_dashboard_numbers_query(user, *current_month())):
+        if kind == "month_totals":
+            snapshot["monthly_expenses"] = amount if amount is not None else 0.0
+            snapshot["monthly_transfers"] = amount_2 if amount_2 is not None else 0.0
+        elif kind == "ledger":
+            snapshot["total_income"], snapshot["total_expense"] = amount, amount_2
+        else:
+            snapshot["chart_labels"].append(label)
+            snapshot["chart_data"].append(amount)
+
+    if snapshot["total_income"] is None:
+        # No ledger row yet (user never had a transaction)
+        snapshot["total_income"], snapshot["total_expense"] = get_balance_totals(db, user.id)
+    snapshot["balance"] = snapshot["total_income"] - snapshot["total_expense"]
+
+    # --- Statement 2: recent lists ---
+    for kind, row_id, text, amount, created_at, owner_id in db.execute(_dashboard_lists_query(user, recent_limit)):
+        if kind == "expense":
+            snapshot["recent_expenses"].append({
+                "id": row_id, "type": "expense", "description": text,
+                "debit": amount, "amount": amount, "created_at": created_at
+            })
+        else:
+            snapshot["recent_transfers"].append({
+                "id": row_id, "type": "transfer", "description": text,
+                "amount": amount, "created_at": created_at
+            })
+
+    # UNION ALL does not keep each branch's ORDER BY, so re-sort the (tiny) lists
+    snapshot["recent_expenses"].sort(key=lambda x: x["created_at"], reverse=True)
+    snapshot["recent_transfers"].sort(key=lambda x: x["created_at"], reverse=True)
+
+    # Categories come from the in-process cache (no query on a hit)
+    snapshot["categories"] = get_merged_categories(db, user.id)
+
+    return snapshot
+
+
+# ================= UNIFIED TRANSACTION FEED (KEYSET) =================
+# Expenses and transfers in one UNION ALL, newest first, ordered by the key
+# (created_at, type, id). Pages are addressed by an opaque cursor holding the
+# key of a boundary row instead of OFFSET, so page 500 costs the same as
+# page 1: every branch is an index range scan that stops after `limit` rows.
+
+FEED_OLDER = "older"
+FEED_NEWER = "newer"
+
+
+def encode_feed_cursor(row) -> str:
+    raw = f"{row['created_at'].isoformat()}|{row['type']}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_feed_cursor(cursor: str):
+    """Returns (created_at, type, id); raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, kind, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), kind, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _keyset_filter(created_col, id_col, kind: str, cursor, direction: str):
+    """Rows of one branch (constant `kind`) that sort strictly after/before the cursor key."""
+    if cursor is None:
+        return true()
+    ts, cursor_kind, cursor_id = cursor
+
+    if direction == FEED_OLDER:
+        if kind < cursor_kind:
+            return created_col <= ts
+        if kind > cursor_kind:
+            return created_col < ts
+        return or_(created_col < ts, and_(created_col == ts, id_col < cursor_id))
+
+    if kind > cursor_kind:
+        return created_col >= ts
+    if kind < cursor_kind:
+        return created_col > ts
+    return or_(created_col > ts, and_(created_col == ts, id_col > cursor_id))
+
+
+def _feed_branch(kind, id_col, description, amount, created_col, where, cursor, direction, limit):
+    if direction == FEED_OLDER:
+        order = (created_col.desc(), id_col.desc())
+    else:
+        order = (created_col.asc(), id_col.asc())
+
+    return select(
+        literal(kind).label("type"),
+        id_col.label("id"),
+        description.label("description"),
+        amount.label("amount"),
+        created_col.label("created_at")
+    ).where(where, _keyset_filter(created_col, id_col, kind, cursor, direction))\
+     .order_by(*order)\
+     .limit(limit)\
+     .subquery()
+
+
+def transaction_feed_query(user, cursor=None, direction: str = FEED_OLDER, limit: int = 10):
+    """
+    One statement: expenses + sent transfers + received transfers.
+    Each branch is limited on its own index before the union is merged.
+    """
+    transfer_description = func.coalesce(Transfer.description, "Transfer")
+    branches = [
+        _feed_branch("expense", Expense.id, Expense.description, Expense.debit, Expense.created_at,
+                     Expense.user_id == user.id, cursor, direction, limit),
+        _feed_branch("transfer", Transfer.id, transfer_description, Transfer.amount, Transfer.created_at,
+                     Transfer.sender_id == user.id, cursor, direction, limit),
+        # Self-transfers are already returned by the sender branch
+        _feed_branch("transfer", Transfer.id, transfer_description, Transfer.amount, Transfer.created_at,
+                     and_(Transfer.receiver_id == user.id, Transfer.sender_id != user.id), cursor, direction, limit),
+    ]
+    feed = union_all(*[select(*branch.c) for branch in branches]).subquery()
+
+    if direction == FEED_OLDER:
+        order = (feed.c.created_at.desc(), feed.c.type.desc(), feed.c.id.desc())
+    else:
+        order = (feed.c.created_at.asc(), feed.c.type.asc(), feed.c.id.asc())
+    return select(feed).order_by(*order).limit(limit)
+
+
+def get_transaction_feed(db: Session, user, cursor: str = None, direction: str = FEED_OLDER, page_size: int = 10):
+    """
+    One page of the user's expenses and transfers, newest first.
+    Returns {"items": [...], "next_cursor": str|None, "prev_cursor": str|None};
+    next_cursor pages towards older rows, prev_cursor towards newer ones.
+    """
+    if direction not in (FEED_OLDER, FEED_NEWER):
+        raise ValueError("direction must be 'older' or 'newer'")
+    key = decode_feed_cursor(cursor) if cursor else None
+    if key is None:
+        direction = FEED_OLDER
+
+    # One extra row tells us whether another page exists in that direction
+    rows = db.execute(transaction_feed_query(user, key, direction, page_size + 1)).mappings().all()
+    has_more = len(rows) > page_size
+    items = [dict(row) for row in rows[:page_size]]
+
+    if direction == FEED_NEWER:
+        items.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = key is not None, has_more
+
+    return {
+        "items": items,
+        "next_cursor": encode_feed_cursor(items[-1]) if items and has_older else None,
+        "prev_cursor": encode_feed_cursor(items[0]) if items and has_newer else None,
+    }
+
+
+# ================= DATE RANGE FILTERS =================
+# Shared by the admin feed and the export.
+
+def _date_range_filters(created_col, tx_from: date = None, tx_to: date = None):
+    """created_col conditions for the inclusive days tx_from..tx_to (either may be None)."""
+    filters = []
+    if tx_from:
+        filters.append(created_col >= datetime.combine(tx_from, time.min))
+    if tx_to:
+        filters.append(created_col < datetime.combine(tx_to + timedelta(days=1), time.min))
+    return filters
+
+
+# ================= ADMIN: GLOBAL TRANSACTIONS =================
+# Paginated in the database: each branch is cut to offset + page_size rows
+# on the created_at index and only one page ever reaches Python, with the
+# username joined in the same statement (no per-row lazy loads).
+
+def _admin_transaction_selects(username: str = None, tx_type: str = None, tx_from: date = None, tx_to: date = None):
+    """Returns {type: select} for the branches that pass the type filter."""
+    user_id = select(User.id).where(User.username == username).scalar_subquery() if username else None
+    branches = {}
+
+    if tx_type in (None, "", "expense"):
+        where = _date_range_filters(Expense.created_at, tx_from, tx_to)
+        if user_id is not None:
+            where.append(Expense.user_id == user_id)
+        branches["expense"] = select(
+            literal("expense").label("type"),
+            Expense.id.label("id"),
+            Expense.description.label("description"),
+            Expense.debit.label("amount"),
+            Expense.created_at.label("created_at"),
+            func.coalesce(User.username, "Unknown").label("user_name")
+        ).outerjoin(User, User.id == Expense.user_id).where(*where)
+
+    if tx_type in (None, "", "transfer"):
+        where = _date_range_filters(Transfer.created_at, tx_from, tx_to)
+        if user_id is not None:
+            where.append(or_(Transfer.sender_id == user_id, Transfer.receiver_id == user_id))
+        branches["transfer"] = select(
+            literal("transfer").label("type"),
+            Transfer.id.label("id"),
+            func.coalesce(Transfer.description, "Transfer").label("description"),
+            Transfer.amount.label("amount"),
+            Transfer.created_at.label("created_at"),
+            func.coalesce(User.username, "Unknown").label("user_name")
+        ).outerjoin(User, User.id == Transfer.receiver_id).where(*where)
+
+    return branches
+
+
+def get_admin_transactions_page(
+    db: Session,
+    page: int = 1,
+    page_size: int = 10,
+    username: str = None,
+    tx_type: str = None,
+    tx_from: date = None,
+    tx_to: date = None
+):
+    """
+    One page of all users' expenses and transfers, newest first.
+    Returns (items, total_items); items are dicts with the keys the settings template reads.
+    """
+    branches = _admin_transaction_selects(username, tx_type, tx_from, tx_to)
+    if not branches:
+        return [], 0
+
+    page = max(page, 1)
+    offset = (page - 1) * page_size
+
+    # Each branch only needs its own first offset + page_size rows
+    limited = [
+        stmt.order_by(stmt.selected_columns.created_at.desc(), stmt.selected_columns.id.desc())
+            .limit(offset + page_size).subquery()
+        for stmt in branches.values()
+    ]
+    merged = union_all(*[select(*sub.c) for sub in limited]).subquery()
+    rows = db.execute(
+        select(merged)
+        .order_by(merged.c.created_at.desc(), merged.c.type.desc(), merged.c.id.desc())
+        .offset(offset).limit(page_size)
+    ).mappings().all()
+
+    # Both counts in one round trip
+    counts = [select(func.count()).select_from(stmt.subquery()).scalar_subquery() for stmt in branches.values()]
+    total = counts[0]
+    for count in counts[1:]:
+        total = total + count
+    total_items = db.execute(select(total)).scalar() or 0
+
+    return [dict(row) for row in rows], total_items
+
+
+# ================= EXPORT (STREAMING) =================
+# A user's full history as one UNION ALL ordered by (created_at, id), read
+# through a server-side cursor in yield_per batches: the database does the
+# sort and only one batch of rows is held in the worker at a time, however
+# many years are exported. Self-transfers are the app's incomes.
+
+EXPORT_COLUMNS = ("date", "type", "id", "description", "amount", "category", "counterparty")
+
+
+def _transfer_export_columns(kind: str, counterparty):
+    return (
+        Transfer.created_at.label("date"),
+        literal(kind).label("type"),
+        Transfer.id.label("id"),
+        func.coalesce(Transfer.description, "Transfer").label("description"),
+        Transfer.amount.label("amount"),
+        type_coerce(null(), String).label("category"),
+        counterparty.label("counterparty")
+    )
+
+
+def export_query(user_id: int, tx_type: str = None, tx_from: date = None, tx_to: date = None):
+    """
+    tx_type: None (everything), "expense", "income" or "transfer" (both directions).
+    tx_from / tx_to are inclusive days.
+    """
+    counterparty = aliased(User)
+    branches = []
+
+    if tx_type in (None, "", "expense"):
+        branches.append(select(
+            Expense.created_at.label("date"),
+            literal("expense").label("type"),
+            Expense.id.label("id"),
+            Expense.description.label("description"),
+            Expense.debit.label("amount"),
+            Category.name.label("category"),
+            type_coerce(null(), String).label("counterparty")
+        ).outerjoin(Category, Category.id == Expense.category_id)
+         .where(Expense.user_id == user_id, *_date_range_filters(Expense.created_at, tx_from, tx_to)))
+
+    transfer_dates = _date_range_filters(Transfer.created_at, tx_from, tx_to)
+
+    if tx_type in (None, "", "income"):
+        branches.append(select(*_transfer_export_columns("income", type_coerce(null(), String)))
+                        .where(Transfer.sender_id == user_id, Transfer.receiver_id == user_id, *transfer_dates))
+    if tx_type in (None, "", "transfer"):
+        branches.append(select(*_transfer_export_columns("transfer_out", counterparty.username))
+                        .outerjoin(counterparty, counterparty.id == Transfer.receiver_id)
+                        .where(Transfer.sender_id == user_id, Transfer.receiver_id != user_id, *transfer_dates))
+        branches.append(select(*_transfer_export_columns("transfer_in", counterparty.username))
+                        .outerjoin(counterparty, counterparty.id == Transfer.sender_id)
+                        .where(Transfer.receiver_id == user_id, Transfer.sender_id != user_id, *transfer_dates))
+
+    if not branches:
+        return None
+    merged = union_all(*branches).subquery()
+    return select(merged).order_by(merged.c.date, merged.c.type, merged.c.id)
+
+
+def iter_export_rows(db: Session, user_id: int, chunk_size: int = 1000, **filters):
+    """Yields one dict per row (keys EXPORT_COLUMNS) without materialising the result."""
+    stmt = export_query(user_id, **filters)
+    if stmt is None:
+        return
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    try:
+        for partition in result.mappings().partitions():
+            for row in partition:
+                yield dict(row)
+    finally:
+        result.close()
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+# Cells a spreadsheet would evaluate as a formula (descriptions, category
+# and counterparty names are user input) are prefixed with a quote
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    value = _export_value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_export_csv(rows, rows_per_chunk: int = 500):
+    """Header + rows as CSV text, yielded in chunks of rows_per_chunk lines."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_cell(row[column]) for column in EXPORT_COLUMNS])
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def encode_export_ndjson(rows, rows_per_chunk: int = 500):
+    """One JSON object per line, yielded in chunks of rows_per_chunk lines."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: _export_value(row[column]) for column in EXPORT_COLUMNS}))
+        if len(lines) >= rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+# ================= ASYNC (AsyncSession) =================
+# The HTML routes hold an AsyncSession. These run the functions above through
+# AsyncSession.run_sync: same statements and row handling, but every round
+# trip goes through the async driver and yields to the event loop.
+
+async def get_dashboard_snapshot_async(db: AsyncSession, user, recent_limit: int = 5):
+    return await db.run_sync(get_dashboard_snapshot, user, recent_limit)
+
+
+async def get_transaction_feed_async(db: AsyncSession, user, cursor: str = None, direction: str = FEED_OLDER, page_size: int = 10):
+    return await db.run_sync(get_transaction_feed, user, cursor, direction, page_size)
+
+
+async def get_admin_transactions_page_async(db: AsyncSession, page: int = 1, page_size: int = 10, **filters):
+    return await db.run_sync(get_admin_transactions_page, page, page_size, **filters)
@@ -0,0 +1,268 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import event, func, select, update, insert, delete, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import Expense, Transfer, Category, MonthlyRollup
+from app.services.flush_tracking import iter_flush_changes, insert_or_update, UNKNOWN
+
+# ================= MONTHLY ROLLUPS =================
+# One row per (user_id, year, month, category_id) with expense sums and
+# counts, and the transfers the user received / sent to someone else.
+# A self-transfer is received only, matching the balance ledger. Monthly cards and the pie chart read these rows instead of
+# scanning the user's whole history. Kept current by an after_flush hook.
+
+UNCATEGORISED = 0
+
+_TRACKED = {
+    Expense: ("user_id", "debit", "category_id", "created_at"),
+    Transfer: ("sender_id", "receiver_id", "amount", "created_at"),
+}
+
+_COUNTERS = ("expense_total", "expense_count", "received_total", "received_count", "sent_total", "sent_count")
+
+
+# ================= MONTH BOUNDARIES =================
+# created_at is stored as naive UTC. Months are calendar months in the
+# reporting timezone, and month filters are half-open UTC ranges
+# (created_at >= start AND created_at < end) so the (user, created_at)
+# indexes can serve them -- never EXTRACT(month FROM created_at).
+
+def report_timezone(tz_name: str = None):
+    return ZoneInfo(tz_name or settings.report_timezone)
+
+
+def month_bucket(created_at, tz=None):
+    """(year, month) a UTC timestamp falls in, as seen from the reporting timezone."""
+    created_at = created_at or datetime.utcnow()
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    local = created_at.astimezone(tz or report_timezone())
+    return local.year, local.month
+
+
+def current_month(tz=None):
+    return month_bucket(datetime.utcnow(), tz)
+
+
+def month_range(year: int, month: int, tz=None):
+    """Half-open [start, end) naive-UTC range covering one calendar month in the reporting timezone."""
+    tz = tz or report_timezone()
+    start = datetime(year, month, 1, tzinfo=tz)
+    end = datetime(year + 1, 1, 1, tzinfo=tz) if month == 12 else datetime(year, month + 1, 1, tzinfo=tz)
+    return (
+        start.astimezone(timezone.utc).replace(tzinfo=None),
+        end.astimezone(timezone.utc).replace(tzinfo=None)
+    )
+
+
+def _contributions(model, values, tz=None):
+    """Returns [(bucket_key, (expense_total, expense_count, received_total, received_count, sent_total, sent_count))]."""
+    year, month = month_bucket(values["created_at"], tz)
+
+    if model is Expense:
+        if values["user_id"] is None:
+            return []
+        key = (values["user_id"], year, month, values["category_id"] or UNCATEGORISED)
+        return [(key, (values["debit"] or 0.0, 1, 0.0, 0, 0.0, 0))]
+
+    amount = values["amount"] or 0.0
+    sender_id, receiver_id = values["sender_id"], values["receiver_id"]
+    contributions = []
+    if receiver_id is not None:
+        contributions.append(((receiver_id, year, month, UNCATEGORISED), (0.0, 0, amount, 1, 0.0, 0)))
+    if sender_id is not None and sender_id != receiver_id:
+        contributions.append(((sender_id, year, month, UNCATEGORISED), (0.0, 0, 0.0, 0, amount, 1)))
+    return contributions
+
+
+def compute_bucket_from_rows(connection, user_id: int, year: int, month: int, category_id: int):
+    """Slow path: counters for one bucket straight from expenses/transfers."""
+    start, end = month_range(year, month)
+
+    category_filter = Expense.category_id == category_id
+    if category_id == UNCATEGORISED:
+        category_filter = or_(Expense.category_id.is_(None), Expense.category_id == UNCATEGORISED)
+
+    expense_total, expense_count = connection.execute(
+        select(func.sum(Expense.debit), func.count(Expense.id)).where(
+            Expense.user_id == user_id,
+            Expense.created_at >= start,
+            Expense.created_at < end,
+            category_filter
+        )
+    ).one()
+
+    received_total, received_count, sent_total, sent_count = None, 0, None, 0
+    if category_id == UNCATEGORISED:
+        in_month = (Transfer.created_at >= start, Transfer.created_at < end)
+        received_total, received_count = connection.execute(
+            select(func.sum(Transfer.amount), func.count(Transfer.id)).where(
+                Transfer.receiver_id == user_id, *in_month
+            )
+        ).one()
+        sent_total, sent_count = connection.execute(
+            select(func.sum(Transfer.amount), func.count(Transfer.id)).where(
+                Transfer.sender_id == user_id, Transfer.receiver_id != user_id, *in_month
+            )
+        ).one()
+
+    return (
+        expense_total or 0.0, expense_count or 0,
+        received_total or 0.0, received_count or 0,
+        sent_total or 0.0, sent_count or 0
+    )
+
+
+def apply_rollup_deltas(connection, deltas):
+    """
+    Moves rollup rows by {(user_id, year, month, category_id): [6 counters]} on the
+    given connection (same transaction as the write). Missing buckets are seeded
+    from the raw rows of that one month.
+    """
+    table = MonthlyRollup.__table__
+    for key, values in deltas.items():
+        if not any(values):
+            continue
+        statement = (
+            update(table)
+            .where(*_bucket_filter(table, key))
+            .values({name: table.c[name] + value for name, value in zip(_COUNTERS, values)})
+        )
+        if connection.execute(statement).rowcount == 0:
+            # Raw rows are already flushed here, so they include this change.
+            # A concurrent seed could not see them, so on a conflict only the delta is applied.
+            insert_or_update(
+                connection,
+                _insert_statement(key, compute_bucket_from_rows(connection, *key)),
+                lambda statement=statement: connection.execute(statement)
+            )
+
+
+def apply_inserted_rows(connection, model, rows):
+    """
+    Rollup update for rows written with a Core INSERT (which bypasses the flush
+    hook). `rows` are the inserted parameter dicts; call on the same connection,
+    after the INSERT.
+    """
+    deltas = defaultdict(lambda: [0.0, 0, 0.0, 0, 0.0, 0])
+    keys = _TRACKED[model]
+    tz = report_timezone()
+    for row in rows:
+        for key, values in _contributions(model, {k: row.get(k) for k in keys}, tz):
+            for i, value in enumerate(values):
+                deltas[key][i] += value
+    apply_rollup_deltas(connection, deltas)
+
+
+def _bucket_filter(table, key):
+    user_id, year, month, category_id = key
+    return (
+        table.c.user_id == user_id,
+        table.c.year == year,
+        table.c.month == month,
+        table.c.category_id == category_id
+    )
+
+
+def _insert_statement(key, counters):
+    user_id, year, month, category_id = key
+    return insert(MonthlyRollup.__table__).values(
+        user_id=user_id, year=year, month=month, category_id=category_id,
+        **dict(zip(_COUNTERS, counters))
+    )
+
+
+def _store_bucket(connection, key, counters):
+    table = MonthlyRollup.__table__
+    statement = update(table).where(*_bucket_filter(table, key)).values(dict(zip(_COUNTERS, counters)))
+    if connection.execute(statement).rowcount == 0:
+        insert_or_update(connection, _insert_statement(key, counters), lambda: connection.execute(statement))
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_rollups_after_flush(session, flush_context):
+    deltas = defaultdict(lambda: [0.0, 0, 0.0, 0, 0.0, 0])
+    rebuild = set()
+
+    def add(contributions, sign):
+        for key, values in contributions:
+            for i, value in enumerate(values):
+                deltas[key][i] += sign * value
+
+    for model, before, after in iter_flush_changes(session, _TRACKED):
+        if before is UNKNOWN:
+            # Previous values were never loaded; only the new bucket can be recounted.
+            if after is not None:
+                rebuild.update(key for key, _ in _contributions(model, after))
+            continue
+        if before is not None:
+            add(_contributions(model, before), -1)
+        if after is not None:
+            add(_contributions(model, after), 1)
+
+    if not deltas and not rebuild:
+        return
+    connection = session.connection()
+    apply_rollup_deltas(connection, {k: v for k, v in deltas.items() if k not in rebuild})
+    for key in rebuild:
+        _store_bucket(connection, key, compute_bucket_from_rows(connection, *key))
+
+
+# ================= READS =================
+
+def get_month_totals(db: Session, user_id: int, year: int, month: int):
+    """(expense_total, received_total) for one month of one user."""
+    expense_total, received_total = db.execute(
+        select(func.sum(MonthlyRollup.expense_total), func.sum(MonthlyRollup.received_total)).where(
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.year == year,
+            MonthlyRollup.month == month
+        )
+    ).one()
+    return expense_total or 0.0, received_total or 0.0
+
+
+def category_totals_query(user_id: int):
+    """(category name, lifetime expense total) rows for the pie chart."""
+    return select(Category.name, func.sum(MonthlyRollup.expense_total))\
+        .join(Category, Category.id == MonthlyRollup.category_id)\
+        .where(MonthlyRollup.user_id == user_id)\
+        .group_by(Category.name)\
+        .having(func.sum(MonthlyRollup.expense_count) > 0)
+
+
+# ================= BACKFILL =================
+
+def rebuild_monthly_rollups(db: Session, chunk_size: int = 5000):
+    """
+    Recomputes every rollup row from the raw tables.
+    Rows are streamed, so memory is bounded by the number of buckets, not rows.
+    Returns the number of buckets written.
+    """
+    buckets = defaultdict(lambda: [0.0, 0, 0.0, 0, 0.0, 0])
+    tz = report_timezone()
+
+    def add(contributions):
+        for key, values in contributions:
+            for i, value in enumerate(values):
+                buckets[key][i] += value
+
+    expense_cols = _TRACKED[Expense]
+    for row in db.execute(select(*[getattr(Expense, c) for c in expense_cols]).execution_options(yield_per=chunk_size)):
+        add(_contributions(Expense, dict(zip(expense_cols, row)), tz))
+
+    transfer_cols = _TRACKED[Transfer]
+    for row in db.execute(select(*[getattr(Transfer, c) for c in transfer_cols]).execution_options(yield_per=chunk_size)):
+        add(_contributions(Transfer, dict(zip(transfer_cols, row)), tz))
+
+    db.execute(delete(MonthlyRollup))
+    rows = [
+        dict(zip(("user_id", "year", "month", "category_id"), key), **dict(zip(_COUNTERS, values)))
+        for key, values in buckets.items()
+    ]
+    for i in range(0, len(rows), chunk_size):
+        db.execute(insert(MonthlyRollup.__table__), rows[i:i + chunk_size])
+    db.commit()
+    return len(rows)
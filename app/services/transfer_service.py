@@ -1,76 +1,203 @@
+import time
+import random
+import threading
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.cache import cache_key, invalidate, invalidate_sync
+from fastapi_cache import FastAPICache
+from app.models.user import User
+from app.models.transfer import Transfer
+from app.schemas.transfer_schema import TransferCreate, TransferResponse
+from app.services.balance_service import ensure_ledger_rows, move_funds
+from app.services.rollup_service import apply_inserted_rows as apply_rollup_rows
+from app.services.email_service import send_transfer_notification
+from app.services.account_directory import lookup_user, lookup_user_id, lookup_user_id_async
 
+# ================= TRANSFER ENGINE =================
+# A transfer is one transaction: move both ledger rows (lock-ordered, with a
+# conditional debit -- see balance_service.move_funds), insert the Transfer
+# row, queue the notification emails, commit. The Transfer row is written
+# with a Core INSERT because the ledger was already moved explicitly; the
+# monthly rollups are updated from the same row. Deadlocks and lock wait
+# timeouts roll back and retry the whole transaction with backoff.
 
 
+class InsufficientBalance(ValueError):
+    pass
 
-from sqlalchemy.orm import Session
-from app.models.user import User
-from app.models.expense import Expense
-from app.schemas.transfer_schema import TransferCreate, TransferResponse
-from app.db.session import get_db
-from decimal import Decimal
 
-def create_transfer(db: Session, transfer: TransferCreate, current_user: User):
-    # Validate sender has sufficient balance
-    if current_user.balance < transfer.amount:
-        raise ValueError("Insufficient balance")
+class AccountNotFound(ValueError):
+    pass
+
+
+# MySQL: deadlock, lock wait timeout. PostgreSQL: serialization failure, deadlock.
+_RETRYABLE_MYSQL_CODES = {1213, 1205}
+_RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+_stats_lock = threading.Lock()
+transfer_stats = {"committed": 0, "insufficient": 0, "retries": 0, "failed": 0}
+
+
+def _count(key: str):
+    with _stats_lock:
+        transfer_stats[key] += 1
+
+
+def _is_retryable(error: DBAPIError) -> bool:
+    orig = error.orig
+    code = orig.args[0] if getattr(orig, "args", None) else None
+    if code in _RETRYABLE_MYSQL_CODES:
+        return True
+    if (getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)) in _RETRYABLE_SQLSTATES:
+        return True
+    # SQLite has one writer: a busy database is the same "try again" condition
+    return "database is locked" in str(orig)
+
+
+# Plain values: they stay readable after a rollback expires the ORM objects
+_Party = namedtuple("_Party", ("id", "email", "account_number"))
+
+
+class _LedgerSeedRace(Exception):
+    """Another transaction seeded the same ledger row first; retrying picks it up."""
 
-    # Find receiver by account number
-    receiver = db.query(User).filter(User.account_number == transfer.to_account_number).first()
-    if not receiver:
-        raise ValueError("Receiver account not found")
-
-    # Update balances
-    current_user.balance -= transfer.amount
-    receiver.balance += transfer.amount
-
-    # Create expense records for both parties
-    sender_expense = Expense(
-        user_id=current_user.id,
-        category_id=None,  # Assuming transfers don't have categories
-        debit=transfer.amount,
-        credit=0,
-        description=f"Transfer to {receiver.email}"
-    )
-    receiver_expense = Expense(
-        user_id=receiver.id,
-        category_id=None,
-        debit=0,
-        credit=transfer.amount,
-        description=f"Transfer from {current_user.email}"
-    )
 
-    db.add(sender_expense)
-    db.add(receiver_expense)
-    db.commit()
-    db.refresh(sender_expense)
-    db.refresh(receiver_expense)
+def _transfer_once(db: Session, sender: _Party, receiver: _Party, amount: float, description: str):
+    connection = db.connection()
+    try:
+        ensure_ledger_rows(connection, [sender.id, receiver.id])
+    except IntegrityError:
+        raise _LedgerSeedRace() from None
 
-    # Send email notifications
-    from app.services.email_service import send_transfer_notification
+    if not move_funds(connection, sender.id, receiver.id, amount):
+        raise InsufficientBalance("Insufficient balance")
+
+    values = {
+        "sender_id": sender.id,
+        "receiver_id": receiver.id,
+        "amount": amount,
+        "description": description,
+        "is_active": True,
+        "created_at": datetime.utcnow(),
+    }
+    transfer_id = connection.execute(insert(Transfer.__table__).values(**values)).inserted_primary_key[0]
+    apply_rollup_rows(connection, Transfer, [values])
+
+    # Email notifications go through the outbox, committed with the transfer
     send_transfer_notification(
-        sender_email=current_user.email,
+        db,
+        sender_email=sender.email,
         receiver_email=receiver.email,
-        amount=float(transfer.amount),
-        description=transfer.description or f"Transfer to {receiver.email}"
+        amount=amount,
+        description=description
     )
+    return {"id": transfer_id, **values}
+
+
+def execute_transfer(db: Session, sender, receiver, amount: float, description: str, max_retries: int = None):
+    """
+    Moves `amount` from sender to receiver (User rows or snapshots) and commits.
+    Returns the Transfer row as a dict. Raises InsufficientBalance (nothing
+    written) or, after max_retries, the last database error.
+    """
+    sender = _Party(sender.id, sender.email, sender.account_number)
+    receiver = _Party(receiver.id, receiver.email, receiver.account_number)
+    if amount <= 0:
+        raise ValueError("Amount must be positive")
+    if sender.id == receiver.id:
+        raise ValueError("Cannot transfer to your own account")
+    max_retries = settings.transfer_max_retries if max_retries is None else max_retries
+
+    attempt = 0
+    while True:
+        try:
+            row = _transfer_once(db, sender, receiver, amount, description)
+            db.commit()
+        except InsufficientBalance:
+            db.rollback()
+            _count("insufficient")
+            raise
+        except (_LedgerSeedRace, DBAPIError) as e:
+            db.rollback()
+            retryable = isinstance(e, _LedgerSeedRace) or _is_retryable(e)
+            if not retryable or attempt >= max_retries:
+                _count("failed")
+                raise
+            attempt += 1
+            _count("retries")
+            # Exponential backoff with jitter so the two sides of a deadlock do not collide again
+            time.sleep(min(0.005 * 2 ** attempt, 0.5) * random.uniform(0.5, 1.5))
+        else:
+            _count("committed")
+            return row
+
+
+def create_transfer(db: Session, transfer: TransferCreate, current_user):
+    receiver = lookup_user(db, transfer.to_account_number)
+    if not receiver:
+        raise AccountNotFound("Receiver account not found")
+
+    description = transfer.description or f"Transfer to {receiver.email}"
+    row = execute_transfer(db, current_user, receiver, float(transfer.amount), description)
 
     return TransferResponse(
-        id=sender_expense.id,  # Using expense id as transfer id
+        id=row["id"],
         from_account=current_user.account_number,
         to_account=transfer.to_account_number,
-        amount=transfer.amount,
-        description=transfer.description or f"Transfer to {receiver.email}",
-        created_at=sender_expense.created_at,
-        updated_at=sender_expense.updated_at
+        amount=row["amount"],
+        description=row["description"],
+        created_at=row["created_at"],
+        updated_at=row["created_at"]
     )
 
 def transfer_money(db: Session, from_account: str, to_account: str, amount: float):
-    current_user = db.query(User).filter(User.account_number == from_account).first()
+    current_user = lookup_user(db, from_account)
     if not current_user:
-        raise ValueError("Sender not found")
+        raise AccountNotFound("Sender not found")
     transfer = TransferCreate(to_account_number=to_account, amount=amount, description="Transfer")
     return create_transfer(db, transfer, current_user)
 
 def validate_account(db: Session, account_number: str) -> bool:
-    user = db.query(User).filter(User.account_number == account_number).first()
-    return user is not None
+    return lookup_user_id(db, account_number) is not None
+
+
+# ================= ACCOUNT LOOKUP CACHE =================
+# validate-account is public, so most lookups are for numbers that do not
+# exist. Both answers are cached in the response cache backend: known
+# accounts for ACCOUNT_CACHE_TTL, unknown ones for the much shorter
+# ACCOUNT_NEGATIVE_CACHE_TTL. Creating an account drops its entry.
+
+ACCOUNT_NAMESPACE = "validate-account"
+_ACCOUNT_NUMBER_MAX_LENGTH = User.__table__.c.account_number.type.length
+
+
+async def validate_account_cached(db: AsyncSession, account_number: str) -> bool:
+    account_number = account_number.strip()
+    if not account_number or len(account_number) > _ACCOUNT_NUMBER_MAX_LENGTH:
+        return False
+
+    key = cache_key(ACCOUNT_NAMESPACE, account_number)
+    backend = FastAPICache.get_backend()
+    _, cached = await backend.get_with_ttl(key)
+    if cached is not None:
+        # The redis backend returns bytes, the memory backend what was stored
+        return cached in ("1", b"1")
+
+    exists = await lookup_user_id_async(db, account_number) is not None
+    ttl = settings.account_cache_ttl if exists else settings.account_negative_cache_ttl
+    await backend.set(key, "1" if exists else "0", ttl)
+    return exists
+
+
+async def invalidate_account(account_number: str):
+    """Call after committing a new account (or an account number change)."""
+    await invalidate(ACCOUNT_NAMESPACE, account_number)
+
+
+def invalidate_account_sync(account_number: str):
+    invalidate_sync(ACCOUNT_NAMESPACE, account_number)
@@ -0,0 +1,100 @@
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models import User
+
+# ================= LOGGED-IN USER CACHE =================
+# Every HTML request resolves the session's user_id to a user + role, and
+# every /api/v1 call resolves its token's uid claim the same way.
+# A read-only snapshot of the fields the routes/templates use is cached per
+# worker for a few seconds, so most page views skip that lookup entirely.
+# Routes that modify the user load the ORM row themselves and call
+# invalidate_user() after committing; other workers catch up within the TTL.
+
+
+@dataclass(frozen=True)
+class RoleSnapshot:
+    id: Optional[int]
+    name: Optional[str]
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    username: str
+    email: str
+    account_number: Optional[str]
+    profile_picture: Optional[str]
+    role_id: Optional[int]
+    role: RoleSnapshot
+
+    @classmethod
+    def from_user(cls, user: User):
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            account_number=user.account_number,
+            profile_picture=user.profile_picture,
+            role_id=user.role_id,
+            role=RoleSnapshot(id=user.role.id if user.role else None, name=user.role.name if user.role else None)
+        )
+
+
+_cache_lock = threading.Lock()
+_user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+# Bumped by every invalidation; a read that started before it must not store its result
+_generation = 0
+
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cached_snapshot(user_id: int):
+    """(snapshot or None, generation at lookup time)."""
+    with _cache_lock:
+        snapshot = _user_cache.get(user_id)
+        cache_stats["hits" if snapshot is not None else "misses"] += 1
+        return snapshot, _generation
+
+
+def _store_snapshot(user, generation: int):
+    if user is None:
+        return None
+    snapshot = UserSnapshot.from_user(user)
+    with _cache_lock:
+        if generation == _generation:
+            _user_cache[user.id] = snapshot
+    return snapshot
+
+
+def _user_query(user_id: int):
+    return select(User).options(joinedload(User.role)).where(User.id == user_id)
+
+
+async def get_user_snapshot(db: AsyncSession, user_id: int):
+    """UserSnapshot for user_id (cached), or None if the user does not exist."""
+    snapshot, generation = _cached_snapshot(user_id)
+    if snapshot is not None:
+        return snapshot
+    return _store_snapshot(await db.scalar(_user_query(user_id)), generation)
+
+
+def get_user_snapshot_sync(db: Session, user_id: int):
+    """Same cache, for the sync Session (v1 API routes)."""
+    snapshot, generation = _cached_snapshot(user_id)
+    if snapshot is not None:
+        return snapshot
+    return _store_snapshot(db.scalar(_user_query(user_id)), generation)
+
+
+def invalidate_user(user_id: int):
+    """Call after committing any change to the user's row or role."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _user_cache.pop(user_id, None)
@@ -0,0 +1,230 @@
+"""
+The timed operations. Each case runs once per iteration with its own
+session (as a request would) and works for the dataset's regular user
+unless it is an admin view. Names are "<area>.<operation>"; they are the
+keys of the result JSON, so renaming one drops it from baseline compares.
+"""
+from datetime import timedelta
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload
+
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.models import User, Expense
+from app.schemas.transfer_schema import TransferCreate
+from app.services import report_service
+from app.services.category_service import (
+    get_merged_categories,
+    get_merged_categories_async,
+    invalidate_user_categories
+)
+from app.services.transfer_service import execute_transfer, create_transfer, validate_account
+from app.services.user_cache import UserSnapshot
+
+CASES = {}
+
+
+def case(name):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+class BenchContext:
+    """Users the cases act as, loaded once; plus the event loop for the async cases."""
+
+    def __init__(self, loop, user_id: int = None, admin_id: int = 1):
+        self.loop = loop
+        with SessionLocal() as db:
+            if user_id is None:
+                # The busiest regular user: the worst case the pages have to serve
+                user_id = db.scalar(
+                    select(Expense.user_id).where(Expense.user_id != admin_id)
+                    .group_by(Expense.user_id).order_by(func.count().desc(), Expense.user_id).limit(1)
+                ) or admin_id
+            load = select(User).options(joinedload(User.role))
+            user = db.scalars(load.where(User.id == user_id)).one()
+            admin = db.scalars(load.where(User.id == admin_id)).one()
+            receiver = db.scalars(load.where(User.id != user_id, User.id != admin_id).order_by(User.id).limit(1)).first()
+            # Detached snapshots, as the routes pass them
+            self.user = UserSnapshot.from_user(user)
+            self.admin = UserSnapshot.from_user(admin)
+            self.receiver = UserSnapshot.from_user(receiver or admin)
+            latest = db.scalar(select(func.max(Expense.created_at)))
+        # A one-month window at the end of the data, for the date filters
+        self.date_to = latest.date() if latest else None
+        self.date_from = self.date_to - timedelta(days=30) if latest else None
+        self.deep_cursor = None
+
+    def run(self, coroutine_fn):
+        return self.loop.run_until_complete(coroutine_fn())
+
+
+# ================= REPORT SERVICE =================
+
+@case("report.monthly_expense_report")
+def bench_monthly_expense_report(ctx):
+    with SessionLocal() as db:
+        report_service.get_monthly_expense_report(db, ctx.user)
+
+
+@case("report.monthly_transfers")
+def bench_monthly_transfers(ctx):
+    with SessionLocal() as db:
+        report_service.get_monthly_transfers(db, ctx.user)
+
+
+@case("report.recent_expenses")
+def bench_recent_expenses(ctx):
+    with SessionLocal() as db:
+        report_service.get_recent_expenses(db, ctx.user)
+
+
+@case("report.recent_transfers")
+def bench_recent_transfers(ctx):
+    with SessionLocal() as db:
+        report_service.get_recent_transfers(db, ctx.user)
+
+
+@case("report.user_categories")
+def bench_user_categories(ctx):
+    with SessionLocal() as db:
+        report_service.get_user_categories(db, ctx.user)
+
+
+@case("report.category_pie_data")
+def bench_category_pie_data(ctx):
+    with SessionLocal() as db:
+        report_service.get_category_pie_data(db, ctx.user)
+
+
+@case("report.paginated_expenses")
+def bench_paginated_expenses(ctx):
+    with SessionLocal() as db:
+        report_service.get_paginated_expenses(db, ctx.user, page=1)
+
+
+@case("report.paginated_expenses_page50")
+def bench_paginated_expenses_page50(ctx):
+    with SessionLocal() as db:
+        report_service.get_paginated_expenses(db, ctx.user, page=50)
+
+
+@case("report.paginated_transfers")
+def bench_paginated_transfers(ctx):
+    with SessionLocal() as db:
+        report_service.get_paginated_transfers(db, ctx.user, page=1)
+
+
+@case("report.total_transaction_count")
+def bench_total_transaction_count(ctx):
+    with SessionLocal() as db:
+        report_service.get_total_transaction_count(db, ctx.user)
+
+
+@case("report.dashboard_snapshot")
+def bench_dashboard_snapshot(ctx):
+    with SessionLocal() as db:
+        report_service.get_dashboard_snapshot(db, ctx.user)
+
+
+@case("report.transaction_feed")
+def bench_transaction_feed(ctx):
+    with SessionLocal() as db:
+        report_service.get_transaction_feed(db, ctx.user)
+
+
+@case("report.transaction_feed_page20")
+def bench_transaction_feed_page20(ctx):
+    with SessionLocal() as db:
+        if ctx.deep_cursor is None:
+            # Walk to page 20 once, during the warmup iteration
+            cursor = None
+            for _ in range(19):
+                cursor = report_service.get_transaction_feed(db, ctx.user, cursor=cursor)["next_cursor"]
+                if cursor is None:
+                    break
+            ctx.deep_cursor = cursor or ""
+        report_service.get_transaction_feed(db, ctx.user, cursor=ctx.deep_cursor or None)
+
+
+@case("report.admin_transactions_page")
+def bench_admin_transactions_page(ctx):
+    with SessionLocal() as db:
+        report_service.get_admin_transactions_page(db, page=1)
+
+
+@case("report.admin_transactions_filtered")
+def bench_admin_transactions_filtered(ctx):
+    with SessionLocal() as db:
+        report_service.get_admin_transactions_page(
+            db, page=3, username=ctx.user.username, tx_type="expense",
+            tx_from=ctx.date_from, tx_to=ctx.date_to
+        )
+
+
+@case("report.export_csv")
+def bench_export_csv(ctx):
+    with SessionLocal() as db:
+        for _ in report_service.encode_export_csv(report_service.iter_export_rows(db, ctx.user.id)):
+            pass
+
+
+# ================= CATEGORY MERGE =================
+
+@case("category.merged_cold")
+def bench_merged_cold(ctx):
+    invalidate_user_categories(ctx.user.id)
+    with SessionLocal() as db:
+        get_merged_categories(db, ctx.user.id)
+
+
+@case("category.merged_warm")
+def bench_merged_warm(ctx):
+    with SessionLocal() as db:
+        get_merged_categories(db, ctx.user.id)
+
+
+# ================= PAGE DATA ASSEMBLY =================
+# What the HTML routes fetch before rendering, on the async engine like main.py.
+
+@case("page.transactions")
+def bench_transactions(ctx):
+    async def assemble():
+        async with AsyncSessionLocal() as db:
+            await report_service.get_transaction_feed_async(db, ctx.user, page_size=10)
+            await get_merged_categories_async(db, ctx.user.id)
+    ctx.run(assemble)
+
+
+@case("page.admin_settings")
+def bench_admin_settings(ctx):
+    async def assemble():
+        async with AsyncSessionLocal() as db:
+            await db.scalar(select(func.count(User.id)))
+            (await db.scalars(
+                select(User).options(joinedload(User.role)).order_by(User.id).offset(0).limit(5)
+            )).all()
+            await report_service.get_admin_transactions_page_async(db, page=1, page_size=10)
+    ctx.run(assemble)
+
+
+# ================= TRANSFER SERVICE =================
+
+@case("transfer.validate_account")
+def bench_validate_account(ctx):
+    with SessionLocal() as db:
+        validate_account(db, ctx.receiver.account_number)
+
+
+@case("transfer.execute")
+def bench_execute(ctx):
+    with SessionLocal() as db:
+        execute_transfer(db, ctx.user, ctx.receiver, 0.01, "bench")
+
+
+@case("transfer.create_transfer")
+def bench_create_transfer(ctx):
+    with SessionLocal() as db:
+        create_transfer(db, TransferCreate(to_account_number=ctx.receiver.account_number, amount=0.01, description="bench"), ctx.user)
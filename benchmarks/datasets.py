@@ -0,0 +1,72 @@
+"""
+Seeded SQLite datasets for the benchmark suite.
+
+A dataset is built once per (expenses, users, seed) and kept under
+benchmarks/.data/; every run works on a fresh copy, so the transfer
+benchmarks (which write) never change the numbers of the next run.
+"""
+import shutil
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+DATA_DIR = Path(__file__).resolve().parent / ".data"
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Inter-user transfers, as a share of the expense count
+TRANSFER_RATIO = 0.1
+CHUNK_SIZE = 10_000
+
+# Fixed end of history, so a seed always produces the same rows
+END = date(2026, 1, 1)
+
+
+def parse_size(value: str) -> int:
+    """'1k' / '100k' / '1m' or a plain number of expenses."""
+    value = value.strip().lower()
+    return SIZES[value] if value in SIZES else int(value)
+
+
+def dataset_path(expenses: int, users: int, seed: int) -> Path:
+    return DATA_DIR / f"synth-expenses{expenses}-users{users}-seed{seed}.db"
+
+
+def work_path(expenses: int, users: int, seed: int) -> Path:
+    source = dataset_path(expenses, users, seed)
+    return source.with_name(f"work-{source.name}")
+
+
+def build(path: Path, expenses: int, users: int, seed: int):
+    """
+    Generates the dataset with scripts/generate_data.py (power-law users,
+    seasonal dates) into a new SQLite file. User 1 is the admin.
+    """
+    # Imported here: app.db.session reads DATABASE_URL when first imported
+    from app.db.base import Base
+    from scripts.generate_data import generate
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".partial")
+    partial.unlink(missing_ok=True)
+    engine = create_engine(f"sqlite:///{partial}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        generate(
+            db, users, expenses, int(expenses * TRANSFER_RATIO),
+            seed=seed, end=END, chunk_size=CHUNK_SIZE
+        )
+    engine.dispose()
+    partial.replace(path)
+
+
+def prepare(expenses: int, users: int, seed: int, rebuild: bool = False) -> Path:
+    """Builds the dataset if needed and returns the path of a fresh working copy."""
+    source = dataset_path(expenses, users, seed)
+    if rebuild or not source.exists():
+        build(source, expenses, users, seed)
+    work = work_path(expenses, users, seed)
+    shutil.copyfile(source, work)
+    return work
@@ -0,0 +1,245 @@
+"""
+End-to-end load test of the real app, in-process, on a seeded SQLite database.
+
+Each virtual user logs in (session cookie for the HTML routes, bearer token
+for /api/v1), then `--concurrency` workers keep picking a route from the
+weighted `--mix` for `--duration` seconds. Requests go through the full
+ASGI stack (middleware, dependencies, templates, threadpool for the sync
+v1 routes) without a network in between. Reports throughput, error rate
+and p50/p95/p99 latency per route.
+
+    python benchmarks/loadtest.py --size 100k --concurrency 32 --duration 20
+    python benchmarks/loadtest.py --mix dashboard=5,transfer=1 --save before.json
+    python benchmarks/loadtest.py --mix dashboard=5,transfer=1 --compare before.json
+
+Routes (names for --mix): login, dashboard, transactions, settings,
+expenses_api, transfer. Virtual users are dataset users 1..N, so user 1
+(the admin) gets the admin view of /settings. Datasets are shared with
+benchmarks/run.py; the run works on a fresh copy.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+from benchmarks import datasets
+from scripts.bench_concurrency import percentile
+
+PASSWORD = "loadtest"
+
+DEFAULT_MIX = "login=2,dashboard=30,transactions=25,settings=8,expenses_api=25,transfer=10"
+
+
+class VirtualUser:
+    def __init__(self, user_id, username, email, account_number, client):
+        self.id = user_id
+        self.username = username
+        self.email = email
+        self.account_number = account_number
+        self.client = client
+        self.token_headers = {}
+
+
+# route name -> (call(vu, peer), expected status codes)
+ROUTES = {
+    "login": (
+        lambda vu, peer: vu.client.post("/login", data={"username": vu.username, "password": PASSWORD}),
+        (303,)
+    ),
+    "dashboard": (lambda vu, peer: vu.client.get("/dashboard"), (200,)),
+    "transactions": (lambda vu, peer: vu.client.get("/transactions"), (200,)),
+    "settings": (lambda vu, peer: vu.client.get("/settings"), (200,)),
+    "expenses_api": (
+        lambda vu, peer: vu.client.get("/api/v1/expenses/expenses/", params={"limit": 20}, headers=vu.token_headers),
+        (200,)
+    ),
+    "transfer": (
+        lambda vu, peer: vu.client.post(
+            "/api/v1/transfers/transfers/transfer",
+            json={"to_account_number": peer.account_number, "amount": 0.01, "description": "loadtest"},
+            headers=vu.token_headers
+        ),
+        (200,)
+    ),
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise SystemExit(f"unknown route '{name}' in --mix (known: {', '.join(ROUTES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def set_passwords(user_ids):
+    """Seeded users cannot log in; give the virtual users one known password (hashed once)."""
+    from sqlalchemy import update, select
+    from app.db.session import SessionLocal
+    from app.models import User
+    from app.core.security import get_password_hash
+
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id.in_(user_ids)).values(hashed_password=get_password_hash(PASSWORD)))
+        db.commit()
+        return db.execute(
+            select(User.id, User.username, User.email, User.account_number).where(User.id.in_(user_ids)).order_by(User.id)
+        ).all()
+
+
+async def log_in(vu):
+    response = await vu.client.post("/login", data={"username": vu.username, "password": PASSWORD})
+    if response.status_code != 303:
+        raise SystemExit(f"HTML login failed for {vu.username}: {response.status_code}")
+    response = await vu.client.post("/api/v1/auth/login", data={"username": vu.email, "password": PASSWORD})
+    if response.status_code != 200:
+        raise SystemExit(f"API login failed for {vu.email}: {response.status_code}")
+    vu.token_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def worker(vu, peers, mix, rng, deadline, samples):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        call, expected = ROUTES[name]
+        peer = rng.choice(peers)
+        started = time.perf_counter()
+        try:
+            response = await call(vu, peer)
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        samples[name].append(((time.perf_counter() - started) * 1000, status, status in expected))
+
+
+def report(samples, elapsed):
+    routes = {}
+    for name, rows in samples.items():
+        if not rows:
+            continue
+        latencies = [ms for ms, _, _ in rows]
+        errors = sum(1 for _, _, ok in rows if not ok)
+        statuses = {}
+        for _, status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        routes[name] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 1),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "statuses": statuses,
+        }
+    total = sum(r["requests"] for r in routes.values())
+    errors = sum(r["errors"] for r in routes.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "routes": routes,
+    }
+
+
+async def run(args, mix):
+    from app.main import app
+    from app.db.session import engine, async_engine
+
+    rows = set_passwords(list(range(1, args.virtual_users + 1)))
+    await app.router.startup()
+    # Unhandled errors become 500 responses, as behind a server
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    users = [
+        VirtualUser(*row, httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60))
+        for row in rows
+    ]
+    try:
+        for vu in users:
+            await log_in(vu)
+
+        samples = {name: [] for name in mix}
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(users[i % len(users)], [u for u in users if u is not users[i % len(users)]] or users,
+                   mix, random.Random(args.seed + i), deadline, samples)
+            for i in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+    finally:
+        for vu in users:
+            await vu.client.aclose()
+        await app.router.shutdown()
+        # aiosqlite connections run on their own threads; close them so the process can exit
+        await async_engine.dispose()
+        engine.dispose()
+    return report(samples, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process HTTP load test of the app")
+    parser.add_argument("--size", default="1k", help="dataset: 1k, 100k, 1m or a number of expenses")
+    parser.add_argument("--users", type=int, default=100, help="dataset users")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--virtual-users", type=int, default=20, help="distinct logged-in accounts")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight,... (see the module docstring)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="print the results saved in this JSON file next to the current ones")
+    args = parser.parse_args()
+    if args.virtual_users > args.users:
+        parser.error("--virtual-users cannot exceed --users")
+    mix = parse_mix(args.mix)
+
+    # Settings are read when app modules are first imported, so point them at the copy first
+    work = datasets.work_path(datasets.parse_size(args.size), args.users, args.seed)
+    os.environ["DATABASE_URL"] = f"sqlite:///{work}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{work}"
+    os.environ["EMAIL_WORKER_ENABLED"] = "false"
+    os.environ.setdefault("GMAIL_EMAIL", "loadtest@example.com")
+    os.environ.setdefault("GMAIL_APP_PASSWORD", "unused")
+    datasets.prepare(datasets.parse_size(args.size), args.users, args.seed)
+
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    result = asyncio.run(run(args, mix))
+    result["config"] = {
+        "size": args.size, "users": args.users, "seed": args.seed, "virtual_users": args.virtual_users,
+        "concurrency": args.concurrency, "duration": args.duration, "mix": mix,
+    }
+
+    before = previous.get("routes", {})
+    print(f"{'route':<14} {'requests':>9} {'rps':>8} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, stats in result["routes"].items():
+        line = (f"{name:<14} {stats['requests']:>9} {stats['rps']:>8.1f} {stats['error_rate']:>7.1%}"
+                f" {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+        if name in before:
+            line += f"    (before: p50 {before[name]['p50_ms']}, p99 {before[name]['p99_ms']}, {before[name]['rps']} rps)"
+        print(line)
+    print(f"total: {result['requests']} requests in {result['elapsed_s']}s, "
+          f"{result['rps']} rps, {result['error_rate']:.1%} errors"
+          + (f"    (before: {previous['rps']} rps)" if previous else ""))
+    for name, stats in result["routes"].items():
+        if stats["errors"]:
+            print(f"  {name}: responses {stats['statuses']}")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(result, indent=2))
+        print(f"results saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Service-level benchmarks against a seeded SQLite database.
+
+Times every report_service read, the category merge, the data assembly of
+the /transactions and /settings (admin) pages and the transfer service,
+calling them in-process (no HTTP). Datasets are generated once from a seed
+and cached in benchmarks/.data/; each run starts from a fresh copy.
+
+    python benchmarks/run.py --size 1k
+    python benchmarks/run.py --size 100k --save benchmarks/results/main-100k.json
+    python benchmarks/run.py --size 100k --baseline benchmarks/results/main-100k.json
+    python benchmarks/run.py --size 1m --users 1000 --only report. --repeat 5
+
+--size is 1k, 100k, 1m or a number of expenses. With --baseline, cases
+whose median and fastest run both got slower than --threshold (and by more
+than --min-delta-ms) are reported and the exit status is 1.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import sqlite3
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from benchmarks import datasets
+from scripts.bench_concurrency import percentile
+
+
+def timed(fn, ctx, repeat, warmup):
+    for _ in range(warmup):
+        fn(ctx)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(ctx)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Returns [(name, before_ms, after_ms, change)] for the cases whose median
+    got slower. The fastest run must have slowed down too: a median pushed up
+    by a few noisy iterations is not a regression.
+    """
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        after_ms, before_ms = stats["median_ms"], before["median_ms"]
+        slower = all(
+            stats[key] - before[key] > min_delta_ms and stats[key] > before[key] * (1 + threshold)
+            for key in ("median_ms", "min_ms")
+        )
+        if slower:
+            regressions.append((name, before_ms, after_ms, after_ms / before_ms - 1 if before_ms else float("inf")))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service-level benchmarks on a seeded SQLite dataset")
+    parser.add_argument("--size", default="1k", help="1k, 100k, 1m or a number of expenses")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--user-id", type=int, help="the user the cases act as (default: the busiest regular user)")
+    parser.add_argument("--repeat", type=int, default=20, help="timed iterations per case")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed iterations per case")
+    parser.add_argument("--only", action="append", default=[], help="run cases whose name contains this (repeatable)")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the cached dataset")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown of the median (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    expenses = datasets.parse_size(args.size)
+    work = datasets.work_path(expenses, args.users, args.seed)
+    # Settings are read when app modules are first imported, so point them at the copy first
+    os.environ["DATABASE_URL"] = f"sqlite:///{work}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{work}"
+    os.environ["EMAIL_WORKER_ENABLED"] = "false"
+    os.environ.setdefault("GMAIL_EMAIL", "bench@example.com")
+    os.environ.setdefault("GMAIL_APP_PASSWORD", "unused")
+
+    started = time.perf_counter()
+    datasets.prepare(expenses, args.users, args.seed, rebuild=args.rebuild)
+    print(f"dataset: {expenses} expenses, {args.users} users, seed {args.seed} ({time.perf_counter() - started:.1f}s)")
+
+    from app.db.session import SessionLocal, engine, async_engine
+    from app.services.account_directory import warm_directory
+    from benchmarks.cases import CASES, BenchContext
+
+    with SessionLocal() as db:
+        # As a running worker would have it after startup
+        warm_directory(db)
+
+    loop = asyncio.new_event_loop()
+    ctx = BenchContext(loop, args.user_id)
+    selected = {name: fn for name, fn in CASES.items() if not args.only or any(part in name for part in args.only)}
+
+    results = {}
+    for name, fn in selected.items():
+        results[name] = summarize(timed(fn, ctx, args.repeat, args.warmup))
+
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+    engine.dispose()
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else {}
+    before = baseline.get("results", {})
+    print(f"{'case':<40} {'median':>10} {'p95':>10} {'min':>10}" + (f" {'baseline':>10} {'change':>8}" if baseline else ""))
+    for name, stats in results.items():
+        line = f"{name:<40} {stats['median_ms']:>10.3f} {stats['p95_ms']:>10.3f} {stats['min_ms']:>10.3f}"
+        if name in before:
+            base = before[name]["median_ms"]
+            change = f"{(stats['median_ms'] / base - 1) * 100:+.0f}%" if base else "n/a"
+            line += f" {base:>10.3f} {change:>8}"
+        print(line)
+
+    meta = {
+        "expenses": expenses,
+        "users": args.users,
+        "seed": args.seed,
+        "user_id": ctx.user.id,
+        "repeat": args.repeat,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+        print(f"results saved to {args.save}")
+
+    if not baseline:
+        return 0
+    base_meta = baseline.get("meta", {})
+    for key in ("expenses", "users", "seed", "user_id"):
+        if base_meta.get(key) != meta[key]:
+            print(f"warning: baseline was taken with {key}={base_meta.get(key)}, this run uses {meta[key]}")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for name, before_ms, after_ms, change in regressions:
+        print(f"REGRESSION {name}: {before_ms:.3f} -> {after_ms:.3f} ms ({change * 100:+.0f}%)")
+    print(f"{len(regressions)} regression(s) against {args.baseline}" if regressions else "no regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Rebuilds the monthly_rollups table from the expenses/transfers tables.
+Run once after the migration; safe to re-run at any time.
+
+    python scripts/backfill_monthly_rollups.py [--chunk-size 5000]
+"""
+import sys
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import SessionLocal
+from app.services.rollup_service import rebuild_monthly_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the monthly rollup table")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        buckets = rebuild_monthly_rollups(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"{buckets} monthly rollup row(s) written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Concurrent request throughput of the HTML routes against ONE running worker.
+With the sync Session every query blocked the event loop, so a single worker
+served requests one at a time; with AsyncSession they overlap while waiting
+on the database.
+
+    git checkout <before>;  uvicorn app.main:app --workers 1
+    python scripts/bench_concurrency.py --username alice --password pw --save before.json
+    git checkout <after>;   uvicorn app.main:app --workers 1
+    python scripts/bench_concurrency.py --username alice --password pw --compare before.json
+
+The difference shows best against a networked MySQL/Postgres (round-trip
+latency is what the event loop used to sit through).
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+import httpx
+
+DEFAULT_PATHS = ["/dashboard", "/transactions", "/categories"]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run_path(client, path, total, concurrency):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(path)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            target = queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.get(target)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "req_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+    }
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        response = await client.post("/login", data={"username": args.username, "password": args.password})
+        if "session" not in client.cookies:
+            sys.exit(f"login failed ({response.status_code})")
+
+        # Warm-up (connection pool, caches)
+        for path in args.paths:
+            await client.get(path)
+
+        return {path: await run_path(client, path, args.requests, args.concurrency) for path in args.paths}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent throughput of the HTML routes on one worker")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--requests", type=int, default=200, help="requests per path")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="print the results saved in this JSON file next to the current ones")
+    args = parser.parse_args()
+
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    results = asyncio.run(run(args))
+
+    for path, result in results.items():
+        line = f"{path:<16} {result['req_per_sec']:>8} req/s  p50 {result['p50_ms']:>7} ms  p95 {result['p95_ms']:>7} ms"
+        if result["errors"]:
+            line += f"  ({result['errors']} errors)"
+        if path in previous:
+            before = previous[path]["req_per_sec"]
+            line += f"   before {before} req/s ({result['req_per_sec'] / before:.2f}x)" if before else ""
+        print(line)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+        print(f"results saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
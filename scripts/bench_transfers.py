@@ -0,0 +1,210 @@
+"""
+Concurrent transfer stress test for the transfer engine.
+Creates `--accounts` funded users, then `--threads` threads move random
+amounts between them (half of the traffic on one hot pair, in both
+directions, to provoke lock contention). While it runs, a sampler keeps
+reading the total balance of those accounts, which must never change;
+at the end the ledger is also checked against the raw transfer rows.
+
+    python scripts/bench_transfers.py --threads 16 --duration 10
+    python scripts/bench_transfers.py --threads 16 --save before.json
+    python scripts/bench_transfers.py --threads 16 --compare before.json
+
+Writes to DATABASE_URL (users named bench_<tag>_N); use a scratch database.
+Exits non-zero if the invariant is broken.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import uuid
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import select, func
+
+from app.db.session import SessionLocal
+from app.models import User, Transfer, UserBalance
+from app.services.balance_service import compute_totals_from_rows
+from app.services.transfer_service import execute_transfer, InsufficientBalance, transfer_stats
+from scripts.bench_concurrency import percentile
+
+
+def create_accounts(count, opening_balance):
+    tag = uuid.uuid4().hex[:6]
+    db = SessionLocal()
+    try:
+        users = [
+            User(username=f"bench_{tag}_{i}", email=f"bench_{tag}_{i}@example.com",
+                 hashed_password="!", account_number=f"BT{tag}{i:06d}")
+            for i in range(count)
+        ]
+        db.add_all(users)
+        db.flush()
+        # Opening balance = an income (self-transfer); the flush hook seeds the ledger
+        db.add_all([
+            Transfer(sender_id=u.id, receiver_id=u.id, amount=opening_balance, description="Opening balance")
+            for u in users
+        ])
+        db.commit()
+        return [(u.id, u.email, u.account_number) for u in users]
+    finally:
+        db.close()
+
+
+def total_balance(db, user_ids):
+    return db.execute(
+        select(func.sum(UserBalance.total_income - UserBalance.total_expense))
+        .where(UserBalance.user_id.in_(user_ids))
+    ).scalar() or 0.0
+
+
+class Account:
+    def __init__(self, row):
+        self.id, self.email, self.account_number = row
+
+
+def worker(accounts, deadline, max_amount, hot_share, result):
+    db = SessionLocal()
+    rng = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            if rng.random() < hot_share:
+                sender, receiver = rng.sample(accounts[:2], 2)
+            else:
+                sender, receiver = rng.sample(accounts, 2)
+            amount = round(rng.uniform(1, max_amount), 2)
+            started = time.perf_counter()
+            try:
+                execute_transfer(db, sender, receiver, amount, "bench")
+                result["latencies"].append((time.perf_counter() - started) * 1000)
+            except InsufficientBalance:
+                result["insufficient"] += 1
+            except Exception as e:
+                result["errors"] += 1
+                result["last_error"] = f"{type(e).__name__}: {e}"[:300]
+    finally:
+        db.close()
+
+
+def sampler(user_ids, stop, samples):
+    db = SessionLocal()
+    try:
+        while not stop.is_set():
+            samples.append(total_balance(db, user_ids))
+            db.rollback()  # fresh snapshot for the next read
+            stop.wait(0.05)
+    finally:
+        db.close()
+
+
+def run(args):
+    rows = create_accounts(args.accounts, args.opening_balance)
+    accounts = [Account(row) for row in rows]
+    user_ids = [a.id for a in accounts]
+
+    db = SessionLocal()
+    expected = total_balance(db, user_ids)
+    db.close()
+
+    results = [{"latencies": [], "insufficient": 0, "errors": 0, "last_error": None} for _ in range(args.threads)]
+    samples = []
+    stop = threading.Event()
+    watcher = threading.Thread(target=sampler, args=(user_ids, stop, samples))
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(accounts, deadline, args.max_amount, args.hot_share, result))
+        for result in results
+    ]
+    started = time.perf_counter()
+    watcher.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    watcher.join()
+
+    db = SessionLocal()
+    try:
+        final_total = total_balance(db, user_ids)
+        connection = db.connection()
+        ledger = dict(db.execute(
+            select(UserBalance.user_id, UserBalance.total_income - UserBalance.total_expense)
+            .where(UserBalance.user_id.in_(user_ids))
+        ).all())
+        drifted = 0
+        negative = 0
+        for uid in user_ids:
+            income, expense = compute_totals_from_rows(connection, uid)
+            if abs((income - expense) - ledger.get(uid, 0.0)) > 0.005:
+                drifted += 1
+            if ledger.get(uid, 0.0) < -0.005:
+                negative += 1
+    finally:
+        db.close()
+
+    latencies = [ms for r in results for ms in r["latencies"]]
+    bad_samples = sum(1 for total in samples if abs(total - expected) > 0.005)
+    errors = [r["last_error"] for r in results if r["last_error"]]
+    return {
+        "threads": args.threads,
+        "accounts": args.accounts,
+        "committed": len(latencies),
+        "transfers_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "insufficient": sum(r["insufficient"] for r in results),
+        "errors": sum(r["errors"] for r in results),
+        "retries": transfer_stats["retries"],
+        "expected_total": round(expected, 2),
+        "final_total": round(final_total, 2),
+        "samples": len(samples),
+        "bad_samples": bad_samples,
+        "ledger_drift": drifted,
+        "negative_balances": negative,
+        "last_error": errors[-1] if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent transfer stress test")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--opening-balance", type=float, default=1000.0)
+    parser.add_argument("--max-amount", type=float, default=200.0)
+    parser.add_argument("--hot-share", type=float, default=0.5, help="share of transfers between accounts 0 and 1")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="print the results saved in this JSON file next to the current ones")
+    args = parser.parse_args()
+
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    result = run(args)
+
+    for key, value in result.items():
+        line = f"{key:<18} {value}"
+        if key in previous:
+            line += f"    (before: {previous[key]})"
+        print(line)
+
+    ok = (
+        result["bad_samples"] == 0
+        and abs(result["final_total"] - result["expected_total"]) <= 0.005
+        and result["ledger_drift"] == 0
+        and result["negative_balances"] == 0
+    )
+    print("invariant OK" if ok else "INVARIANT BROKEN")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(result, indent=2))
+        print(f"results saved to {args.save}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
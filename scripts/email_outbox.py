@@ -0,0 +1,44 @@
+"""
+Inspects and drains the email outbox outside the web process.
+
+    python scripts/email_outbox.py                 # counts per status
+    python scripts/email_outbox.py --drain         # send everything that is due, then exit
+    python scripts/email_outbox.py --requeue-dead  # give dead-lettered emails another round
+
+Local testing without Gmail (pip install aiosmtpd):
+
+    python -m aiosmtpd -n -l 127.0.0.1:8025
+    SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=false SMTP_USERNAME= python scripts/email_outbox.py --drain
+"""
+import sys
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import SessionLocal
+from app.services.email_service import OutboxWorker, outbox_counts, requeue_dead
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Email outbox maintenance")
+    parser.add_argument("--drain", action="store_true", help="send all due emails and exit")
+    parser.add_argument("--requeue-dead", action="store_true", help="move dead emails back to pending")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.requeue_dead:
+            print(f"requeued {requeue_dead(db)} dead emails")
+        if args.drain:
+            worker = OutboxWorker(SessionLocal)
+            processed = worker.drain(args.batch_size)
+            print(f"processed {processed} emails: {worker.stats}")
+        for status, count in sorted(outbox_counts(db).items()):
+            print(f"{status:<8} {count}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Prints the EXPLAIN plan of every hot report/pagination query, so you can check
+that the (user_id, created_at) indexes are actually picked up.
+
+    python scripts/explain_hot_queries.py --user-id 1 --save before.json
+    alembic upgrade head
+    python scripts/explain_hot_queries.py --user-id 1 --compare before.json
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import select, func, or_
+from app.db.session import engine
+from app.models import Expense, Transfer
+from app.services.rollup_service import current_month, month_range, category_totals_query
+from app.services import report_service
+
+
+class _User:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+def hot_queries(user_id: int):
+    user = _User(user_id)
+    year, month = current_month()
+    start, end = month_range(year, month)
+    page_size = 10
+
+    return {
+        "dashboard_numbers": report_service._dashboard_numbers_query(user, year, month),
+        "dashboard_lists": report_service._dashboard_lists_query(user, 5),
+        "category_pie": category_totals_query(user_id),
+        "month_expenses_range": select(func.sum(Expense.debit), func.count(Expense.id)).where(
+            Expense.user_id == user_id, Expense.created_at >= start, Expense.created_at < end
+        ),
+        "month_transfers_range": select(func.sum(Transfer.amount), func.count(Transfer.id)).where(
+            or_(Transfer.sender_id == user_id, Transfer.receiver_id == user_id),
+            Transfer.created_at >= start, Transfer.created_at < end
+        ),
+        "recent_expenses": select(Expense).where(Expense.user_id == user_id)
+            .order_by(Expense.created_at.desc()).limit(5),
+        "recent_transfers": select(Transfer).where(
+            or_(Transfer.sender_id == user_id, Transfer.receiver_id == user_id)
+        ).order_by(Transfer.created_at.desc()).limit(5),
+        "paginated_expenses_page_100": select(Expense).where(Expense.user_id == user_id)
+            .order_by(Expense.created_at.desc()).offset(99 * page_size).limit(page_size),
+        "paginated_transfers_page_100": select(Transfer).where(
+            or_(Transfer.sender_id == user_id, Transfer.receiver_id == user_id)
+        ).order_by(Transfer.created_at.desc()).offset(99 * page_size).limit(page_size),
+        "transaction_count_expenses": select(func.count(Expense.id)).where(Expense.user_id == user_id),
+        "transaction_count_transfers": select(func.count(Transfer.id)).where(
+            or_(Transfer.sender_id == user_id, Transfer.receiver_id == user_id)
+        ),
+    }
+
+
+def explain(conn, stmt):
+    compiled = stmt.compile(dialect=engine.dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    result = conn.exec_driver_sql(prefix + str(compiled), params)
+    columns = list(result.keys())
+    return [dict(zip(columns, [str(v) for v in row])) for row in result]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot report queries")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--save", help="write the plans to this JSON file")
+    parser.add_argument("--compare", help="print the plans saved in this JSON file next to the current ones")
+    args = parser.parse_args()
+
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    plans = {}
+
+    with engine.connect() as conn:
+        for name, stmt in hot_queries(args.user_id).items():
+            plans[name] = explain(conn, stmt)
+
+            print(f"=== {name}")
+            if name in previous:
+                print("--- before")
+                for row in previous[name]:
+                    print("   ", row)
+                print("--- after")
+            for row in plans[name]:
+                print("   ", row)
+            print()
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(plans, indent=2))
+        print(f"plans saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Generates a large, realistic synthetic dataset: users, public and personal
+categories, expenses, incomes and transfers. The same seed (and --end)
+always produces the same rows.
+
+Shape of the data:
+  - per-user activity follows a power law (Zipf over users: a few own most rows)
+  - category popularity is Zipf-like; personal categories get a share
+  - dates are seasonal (December high, January/February low, busier
+    weekends and lunch/evening hours) over --months of history
+  - every user is paid a monthly salary in line with their spending
+    (an income = a transfer to themselves); a final top-up keeps every
+    balance non-negative
+
+Rows are written with Core executemany INSERTs in chunked transactions.
+By default the balance ledger and monthly rollups are rebuilt in one pass
+at the end (fastest; keep the app from writing meanwhile). With
+--incremental they are moved chunk by chunk in the same transactions,
+which is slower but safe beside a running app.
+
+    python scripts/generate_data.py --users 1000 --expenses 1000000 --transfers 100000
+    python scripts/generate_data.py --users 50 --expenses 20000 --password secret --seed 7
+
+Writes to DATABASE_URL and appends to whatever is there; use a scratch database.
+"""
+import sys
+import math
+import time
+import random
+import argparse
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import select, insert, func
+from sqlalchemy.orm import Session
+
+from app.models import Role, User, Category, Expense, Transfer
+from app.services.balance_service import apply_inserted_rows as apply_balance_rows, reconcile_balances
+from app.services.rollup_service import apply_inserted_rows as apply_rollup_rows, rebuild_monthly_rollups
+
+# name -> (median amount, spread of the lognormal)
+PUBLIC_CATEGORIES = {
+    "Food": (12, 0.6), "Groceries": (45, 0.5), "Transport": (8, 0.7), "Shopping": (40, 0.9),
+    "Entertainment": (25, 0.8), "Utilities": (70, 0.4), "Health": (35, 0.9), "Rent": (900, 0.3),
+    "Travel": (180, 1.0), "Education": (60, 0.8), "Insurance": (120, 0.3), "Gifts": (30, 0.8),
+    "Subscriptions": (12, 0.4), "Personal care": (20, 0.6), "Pets": (25, 0.7), "Other": (20, 1.0),
+}
+PERSONAL_NAMES = (
+    "Coffee", "Gym", "Kids", "Car", "Hobbies", "Books", "Charity", "Games",
+    "Garden", "Music", "Photography", "Side project", "Snacks", "Taxi", "Phone", "Home office",
+)
+DESCRIPTIONS = {
+    "Food": ("Lunch", "Dinner out", "Takeaway", "Breakfast"),
+    "Groceries": ("Supermarket", "Farmers market", "Corner shop"),
+    "Transport": ("Bus ticket", "Train", "Fuel", "Parking"),
+    "Rent": ("Monthly rent",),
+    "Utilities": ("Electricity", "Water", "Internet", "Gas"),
+}
+# Seasonality: spending per calendar month (Jan..Dec), weekday (Mon..Sun) and hour
+MONTH_WEIGHTS = (0.8, 0.8, 0.95, 1.0, 1.0, 1.05, 1.1, 1.1, 0.95, 1.0, 1.15, 1.5)
+WEEKDAY_WEIGHTS = (0.85, 0.9, 0.9, 0.95, 1.15, 1.35, 1.1)
+HOUR_WEIGHTS = (
+    0.1, 0.05, 0.05, 0.05, 0.05, 0.1, 0.3, 0.6, 0.8, 0.9, 1.0, 1.2,
+    1.8, 1.6, 1.0, 0.9, 1.0, 1.3, 1.7, 1.8, 1.4, 1.0, 0.6, 0.3,
+)
+# Activity of the user ranked r is 1/r**ACTIVITY_ZIPF: the busiest 20% of
+# users produce about three quarters of the rows
+ACTIVITY_ZIPF = 0.9
+CATEGORY_ZIPF = 1.1
+PERSONAL_SHARE = 0.25
+UNCATEGORISED_SHARE = 0.05
+
+
+class Sampler:
+    """Draws from a fixed weighted population in O(log n) per draw."""
+
+    def __init__(self, rng, population, weights):
+        self.rng = rng
+        self.population = list(population)
+        self.cumulative = list(accumulate(weights))
+        self.total = self.cumulative[-1]
+
+    def draw(self):
+        return self.population[bisect(self.cumulative, self.rng.random() * self.total)]
+
+
+def _ensure_role(connection, name):
+    role_id = connection.execute(select(Role.id).where(Role.name == name)).scalar()
+    if role_id is None:
+        role_id = connection.execute(insert(Role.__table__).values(name=name)).inserted_primary_key[0]
+    return role_id
+
+
+class Generator:
+    def __init__(self, db: Session, seed: int, end: date, months: int, chunk_size: int, incremental: bool):
+        self.db = db
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.end = datetime.combine(end, datetime.min.time())
+        self.start = self.end - timedelta(days=round(months * 30.44))
+        self.months = months
+        self.chunk_size = chunk_size
+        self.incremental = incremental
+        self.counts = {"users": 0, "categories": 0, "expenses": 0, "incomes": 0, "transfers": 0}
+        # user_id -> money out so far, to size salaries and the final top-up
+        self.spent = {}
+
+        days = [self.start.date() + timedelta(days=i) for i in range((self.end - self.start).days)]
+        self.days = Sampler(self.rng, days, [MONTH_WEIGHTS[d.month - 1] * WEEKDAY_WEIGHTS[d.weekday()] for d in days])
+        self.hours = Sampler(self.rng, range(24), HOUR_WEIGHTS)
+
+    # --- Writing ---
+
+    def _write(self, model, rows):
+        connection = self.db.connection()
+        connection.execute(insert(model.__table__), rows)
+        if self.incremental and model in (Expense, Transfer):
+            apply_balance_rows(connection, model, rows)
+            apply_rollup_rows(connection, model, rows)
+        self.db.commit()
+
+    def _stream(self, model, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._write(model, chunk)
+                chunk = []
+        if chunk:
+            self._write(model, chunk)
+
+    # --- Draws ---
+
+    def when(self):
+        day = self.days.draw()
+        return datetime(day.year, day.month, day.day, self.hours.draw(), self.rng.randrange(60), self.rng.randrange(60))
+
+    def amount(self, median, spread):
+        return round(max(0.5, self.rng.lognormvariate(math.log(median), spread)), 2)
+
+    # --- Steps ---
+
+    def users(self, count, admins, hashed_password):
+        connection = self.db.connection()
+        admin_role = _ensure_role(connection, "admin")
+        user_role = _ensure_role(connection, "user")
+        taken = set(connection.execute(select(User.account_number).where(User.account_number.is_not(None))).scalars())
+        first = (connection.execute(select(func.max(User.id))).scalar() or 0) + 1
+
+        rows = []
+        for i in range(count):
+            number = None
+            while number is None or number in taken:
+                number = str(self.rng.randrange(10 ** 9, 10 ** 10))
+            taken.add(number)
+            rows.append({
+                "username": f"synth{self.seed}_{first + i}",
+                "email": f"synth{self.seed}_{first + i}@example.com",
+                "hashed_password": hashed_password,
+                "account_number": number,
+                "balance": 0,
+                "role_id": admin_role if i < admins else user_role,
+            })
+        ids = []
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            self._write(User, chunk)
+            by_name = dict(self.db.execute(
+                select(User.username, User.id).where(User.username.in_([row["username"] for row in chunk]))
+            ).all())
+            ids += [by_name[row["username"]] for row in chunk]
+        self.counts["users"] = len(ids)
+        self.user_ids = ids
+        self.admin_ids = ids[:admins]
+        ranks = list(range(1, len(ids) + 1))
+        self.rng.shuffle(ranks)
+        self.activity = {uid: 1 / rank ** ACTIVITY_ZIPF for uid, rank in zip(ids, ranks)}
+        self.active_users = Sampler(self.rng, ids, [self.activity[uid] for uid in ids])
+
+    def categories(self, max_personal):
+        owner = self.admin_ids[0] if self.admin_ids else None
+        rows = [{"name": name, "user_id": owner, "created_at": self.start} for name in PUBLIC_CATEGORIES] if owner else []
+        # Busier users keep more personal categories
+        top = max(self.activity.values(), default=1.0)
+        for uid in self.user_ids:
+            share = (self.activity[uid] / top) ** 0.3
+            for name in self.rng.sample(PERSONAL_NAMES, min(len(PERSONAL_NAMES), round(max_personal * share))):
+                rows.append({"name": name, "user_id": uid, "created_at": self.start})
+        self._stream(Category, rows)
+        self.counts["categories"] = len(rows)
+
+        # All categories of the new users are new; read back their ids
+        public, self.personal = {}, {}
+        for start in range(0, len(self.user_ids), self.chunk_size):
+            user_ids = self.user_ids[start:start + self.chunk_size]
+            for category_id, name, uid in self.db.execute(
+                select(Category.id, Category.name, Category.user_id)
+                .where(Category.user_id.in_(user_ids)).order_by(Category.id)
+            ):
+                if uid == owner and name in PUBLIC_CATEGORIES and name not in public:
+                    public[name] = category_id
+                else:
+                    self.personal.setdefault(uid, []).append(category_id)
+        names = [name for name in PUBLIC_CATEGORIES if name in public]
+        self.public = Sampler(
+            self.rng,
+            [(public[name], name) for name in names],
+            [1 / (rank + 1) ** CATEGORY_ZIPF for rank in range(len(names))]
+        ) if names else None
+
+    def expenses(self, count):
+        def rows():
+            for _ in range(count):
+                uid = self.active_users.draw()
+                roll = self.rng.random()
+                personal = self.personal.get(uid)
+                if roll < UNCATEGORISED_SHARE or self.public is None:
+                    category_id, name = None, "Other"
+                elif personal and roll < UNCATEGORISED_SHARE + PERSONAL_SHARE:
+                    category_id, name = self.rng.choice(personal), "Other"
+                else:
+                    category_id, name = self.public.draw()
+                debit = self.amount(*PUBLIC_CATEGORIES[name])
+                self.spent[uid] = self.spent.get(uid, 0.0) + debit
+                yield {
+                    "user_id": uid,
+                    "description": self.rng.choice(DESCRIPTIONS.get(name, (name,))),
+                    "debit": debit,
+                    "category_id": category_id,
+                    "created_at": self.when(),
+                }
+        self._stream(Expense, rows())
+        self.counts["expenses"] = count
+
+    def transfers(self, count):
+        def rows():
+            for _ in range(count if len(self.user_ids) > 1 else 0):
+                sender = self.active_users.draw()
+                receiver = self.active_users.draw()
+                while receiver == sender:
+                    receiver = self.active_users.draw()
+                amount = self.amount(40, 1.0)
+                self.spent[sender] = self.spent.get(sender, 0.0) + amount
+                yield {
+                    "sender_id": sender,
+                    "receiver_id": receiver,
+                    "amount": amount,
+                    "description": "Transfer",
+                    "is_active": True,
+                    "created_at": self.when(),
+                }
+        self._stream(Transfer, rows())
+        self.counts["transfers"] = count if len(self.user_ids) > 1 else 0
+
+    def incomes(self):
+        """Monthly salary ~ the user's average monthly spend, plus a top-up covering any shortfall."""
+        def rows():
+            for uid in self.user_ids:
+                monthly = round(self.spent.get(uid, 0.0) / self.months * self.rng.uniform(1.0, 1.3), 2)
+                paid = 0.0
+                if monthly > 0:
+                    for month in range(self.months):
+                        payday = self.start + timedelta(days=round(month * 30.44) + 1, hours=9)
+                        paid += monthly
+                        yield self._income(uid, monthly, "Salary", payday)
+                shortfall = round(self.spent.get(uid, 0.0) - paid, 2)
+                if shortfall > 0:
+                    yield self._income(uid, shortfall, "Opening balance", self.start)
+        self._stream(Transfer, rows())
+
+    def _income(self, uid, amount, description, created_at):
+        self.counts["incomes"] += 1
+        return {
+            "sender_id": uid, "receiver_id": uid, "amount": amount,
+            "description": description, "is_active": True, "created_at": created_at,
+        }
+
+    def finish(self):
+        if not self.incremental:
+            reconcile_balances(self.db)
+            rebuild_monthly_rollups(self.db)
+
+
+def generate(
+    db: Session,
+    users: int,
+    expenses: int,
+    transfers: int,
+    seed: int = 42,
+    end: date = None,
+    months: int = 24,
+    admins: int = 1,
+    max_personal_categories: int = 6,
+    hashed_password: str = "!",
+    chunk_size: int = 10000,
+    incremental: bool = False
+):
+    """Appends the dataset through `db` and returns the row counts per table."""
+    generator = Generator(db, seed, end or date.today(), months, chunk_size, incremental)
+    generator.users(users, admins, hashed_password)
+    generator.categories(max_personal_categories)
+    generator.expenses(expenses)
+    generator.transfers(transfers)
+    generator.incomes()
+    generator.finish()
+    return generator.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--expenses", type=int, default=100000)
+    parser.add_argument("--transfers", type=int, default=10000, help="between different users (incomes come on top)")
+    parser.add_argument("--admins", type=int, default=1, help="the first N users are admins (and own the public categories)")
+    parser.add_argument("--max-personal-categories", type=int, default=6, help="per user; busier users get more")
+    parser.add_argument("--months", type=int, default=24, help="months of history")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD (default today)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", help="login password for every generated user (default: cannot log in)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows per INSERT / transaction")
+    parser.add_argument("--incremental", action="store_true", help="move the ledger and rollups per chunk instead of rebuilding them")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+    from app.core.security import get_password_hash
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        counts = generate(
+            db, args.users, args.expenses, args.transfers,
+            seed=args.seed, end=args.end, months=args.months, admins=args.admins,
+            max_personal_categories=args.max_personal_categories,
+            hashed_password=get_password_hash(args.password) if args.password else "!",
+            chunk_size=args.chunk_size, incremental=args.incremental
+        )
+    finally:
+        db.close()
+    print(", ".join(f"{n} {name}" for name, n in counts.items()) + f" in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Imports a bank statement (CSV or OFX) for one user, streaming the file and
+writing it in batches. Same code path as POST /api/v1/imports/statement.
+
+    python scripts/import_statement.py statement.csv --username alice
+    python scripts/import_statement.py export.ofx --user-id 3 --chunk-size 5000
+    python scripts/import_statement.py statement.csv --username alice --create-categories --errors-out errors.json
+
+CSV needs a header row with `date`, `amount` (signed; or `debit`/`credit`)
+and optionally `description`, `category`, `type` (expense/income).
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import SessionLocal
+from app.models import User
+from app.services.import_service import import_statement, detect_format, CSV, OFX
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a CSV/OFX bank statement")
+    parser.add_argument("path")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user-id", type=int)
+    target.add_argument("--username")
+    parser.add_argument("--format", choices=[CSV, OFX], default=None, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per INSERT batch / commit")
+    parser.add_argument("--create-categories", action="store_true", help="create categories that do not exist yet")
+    parser.add_argument("--errors-out", help="write the row errors to this JSON file")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            user = db.get(User, args.user_id)
+        else:
+            user = db.query(User).filter(User.username == args.username).first()
+        if user is None:
+            sys.exit("user not found")
+
+        started = time.perf_counter()
+        with open(args.path, encoding="utf-8-sig", errors="replace", newline="") as f:
+            report = import_statement(
+                db, user.id, f,
+                file_format=args.format or detect_format(args.path),
+                chunk_size=args.chunk_size,
+                create_categories=args.create_categories
+            )
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    print(f"imported {report['imported']} rows ({report['expenses']} expenses, {report['incomes']} incomes) "
+          f"in {elapsed:.2f}s, {report['failed']} failed, {report['categories_created']} categories created")
+    for error in report["errors"][:20]:
+        print(f"  line {error['line']}: {error['error']}")
+    if args.errors_out:
+        Path(args.errors_out).write_text(json.dumps(report["errors"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Dashboard latency while a login storm hits the same worker.
+First measures /dashboard alone, then again while `--storm` concurrent
+clients keep POSTing /login (each one a bcrypt verify). With hashing on
+its own bounded pool the dashboard numbers should barely move; with
+bcrypt on the event loop every dashboard request queued behind them.
+
+    uvicorn app.main:app --workers 1
+    python scripts/loadtest_login_storm.py --username alice --password pw --storm 50
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+from scripts.bench_concurrency import percentile
+
+
+async def measure_dashboard(client, duration, interval):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/dashboard")
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            sys.exit(f"/dashboard returned {response.status_code}")
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_storm(url, username, password, stop, counts):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        while not stop.is_set():
+            response = await client.post("/login", data={"username": username, "password": password})
+            key = "shed" if response.status_code == 503 else "ok" if response.status_code in (200, 303) else "error"
+            counts[key] += 1
+
+
+def summary(latencies):
+    return f"n={len(latencies):<5} p50 {percentile(latencies, 50):7.1f} ms  p95 {percentile(latencies, 95):7.1f} ms  max {max(latencies):7.1f} ms"
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        await client.post("/login", data={"username": args.username, "password": args.password})
+        if "session" not in client.cookies:
+            sys.exit("login failed")
+        await client.get("/dashboard")
+
+        baseline = await measure_dashboard(client, args.duration, args.interval)
+
+        stop = asyncio.Event()
+        counts = {"ok": 0, "shed": 0, "error": 0}
+        storm = [
+            asyncio.create_task(login_storm(args.url, args.username, args.password, stop, counts))
+            for _ in range(args.storm)
+        ]
+        await asyncio.sleep(0.5)
+        during = await measure_dashboard(client, args.duration, args.interval)
+        stop.set()
+        await asyncio.gather(*storm)
+
+    print(f"/dashboard idle    {summary(baseline)}")
+    print(f"/dashboard storm   {summary(during)}")
+    print(f"logins: {counts['ok']} ok, {counts['shed']} shed (503), {counts['error']} errors "
+          f"over {args.duration:.0f}s with {args.storm} concurrent clients")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard latency during a login storm")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--storm", type=int, default=50, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--interval", type=float, default=0.05, help="pause between dashboard requests")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Rebuilds the user_balances ledger from the expenses/transfers tables and reports drift.
+
+    python scripts/reconcile_balances.py            # rebuild + report
+    python scripts/reconcile_balances.py --dry-run  # report only
+"""
+import sys
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import SessionLocal
+from app.services.balance_service import reconcile_balances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile the per-user balance ledger")
+    parser.add_argument("--dry-run", action="store_true", help="only report drift, do not write")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = reconcile_balances(db, apply=not args.dry_run)
+    finally:
+        db.close()
+
+    for row in drift:
+        print(
+            f"user {row['user_id']}: stored income={row['stored_income']} expense={row['stored_expense']} "
+            f"-> actual income={row['actual_income']} expense={row['actual_expense']}"
+        )
+    action = "reported" if args.dry_run else "fixed"
+    print(f"{len(drift)} drifted balance row(s) {action}")
+    return 1 if drift and args.dry_run else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Settings are read when app modules are first imported, so point them at a
+# throwaway SQLite file before anything imports `app`
+ROOT = Path(__file__).resolve().parents[1]
+_db_file = Path(tempfile.mkdtemp(prefix="expense-tracker-tests-")) / "test.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_file}"
+os.environ["EMAIL_WORKER_ENABLED"] = "false"
+os.environ.setdefault("GMAIL_EMAIL", "tests@example.com")
+os.environ.setdefault("GMAIL_APP_PASSWORD", "unused")
+# app.main mounts ./static
+os.chdir(ROOT)
+
+import pytest
+from sqlalchemy import event
+
+from app.db.base import Base
+from app.db.session import engine, SessionLocal
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def count_queries():
+    """Returns a list that collects every statement run on the sync engine while the test runs."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _record)
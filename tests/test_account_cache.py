@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends import Backend
+
+from app.core.cache import CountingBackend, build_backend
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models import User
+from app.services.transfer_service import ACCOUNT_NAMESPACE, validate_account_cached
+
+
+class BytesBackend(Backend):
+    """Stores values the way redis does without decode_responses: str in, bytes out."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get_with_ttl(self, key):
+        value = self.values.get(key)
+        return (60 if value is not None else -2), value
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+
+    async def clear(self, namespace=None, key=None):
+        return 1 if self.values.pop(key, None) is not None else 0
+
+
+def _validate(*account_numbers):
+    # Pooled aiosqlite connections belong to the loop that opened them (and
+    # keep a non-daemon thread alive), so the pool is emptied before it ends
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return [await validate_account_cached(db, number) for number in account_numbers]
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+def test_validate_account_reads_bytes_from_custom_backend(db, monkeypatch):
+    db.add(User(username="cached", email="cached@example.com", hashed_password="x", account_number="5000000002"))
+    db.commit()
+
+    # Same construction as CACHE_BACKEND=package.module:factory at startup
+    backend = CountingBackend(build_backend(f"{__name__}:BytesBackend"))
+    monkeypatch.setattr(FastAPICache, "_backend", backend)
+    monkeypatch.setattr(FastAPICache, "_prefix", "tests")
+
+    assert _validate("5000000002", "5000000003", "5000000002", "5000000003") == [True, False, True, False]
+    assert backend.backend.values == {
+        f"tests:{ACCOUNT_NAMESPACE}:5000000002": b"1",
+        f"tests:{ACCOUNT_NAMESPACE}:5000000003": b"0",
+    }
+    # The second round was answered from the cached bytes
+    assert backend.snapshot()[ACCOUNT_NAMESPACE] == {"hits": 2, "misses": 2}
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from app.models import Role, User, Category, Expense, Transfer
+from app.services.report_service import get_dashboard_snapshot
+
+
+def _seed_user(db):
+    role = db.query(Role).filter_by(name="user").first() or Role(name="user")
+    user = User(
+        username="dashboard", email="dashboard@example.com", hashed_password="x",
+        account_number="5000000001", role=role
+    )
+    food, rent = Category(name="Food"), Category(name="Rent")
+    db.add_all([user, food, rent])
+    db.flush()
+
+    now = datetime.utcnow()
+    db.add(Transfer(sender_id=user.id, receiver_id=user.id, amount=1000.0, description="Salary", created_at=now))
+    for day in range(12):
+        category = food if day % 2 else rent
+        db.add(Expense(
+            description=f"expense {day}", debit=10.0 + day, user_id=user.id,
+            category_id=category.id, created_at=now - timedelta(hours=day)
+        ))
+    db.commit()
+    return user.id
+
+
+def test_dashboard_snapshot_runs_two_statements(db, count_queries):
+    user = db.get(User, _seed_user(db))
+    # Warm-up: loads the user's lazy attributes (and any per-process cache)
+    get_dashboard_snapshot(db, user)
+
+    count_queries.clear()
+    snapshot = get_dashboard_snapshot(db, user)
+
+    assert len(count_queries) == 2, count_queries
+    assert snapshot["balance"] == 1000.0 - sum(10.0 + day for day in range(12))
+    assert len(snapshot["recent_expenses"]) == 5
+    assert sorted(snapshot["chart_labels"]) == ["Food", "Rent"]